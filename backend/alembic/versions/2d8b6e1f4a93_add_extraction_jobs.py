@@ -0,0 +1,58 @@
+"""add extraction_jobs
+
+Revision ID: 2d8b6e1f4a93
+Revises: 9c1e4d7a2b6f
+Create Date: 2026-10-18 18:41:07.215933
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "2d8b6e1f4a93"
+down_revision: Union[str, Sequence[str], None] = "9c1e4d7a2b6f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "extraction_jobs",
+        sa.Column("id", sa.String(length=32), nullable=False),
+        sa.Column("video_id", sa.String(length=20), nullable=False),
+        sa.Column("video_url", sa.Text(), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column(
+            "result", postgresql.JSONB(astext_type=sa.Text()), nullable=True
+        ),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("error_code", sa.String(length=30), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_extraction_jobs_created_at"),
+        "extraction_jobs",
+        ["created_at"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_extraction_jobs_finished_at"),
+        "extraction_jobs",
+        ["finished_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_extraction_jobs_finished_at"), table_name="extraction_jobs")
+    op.drop_index(op.f("ix_extraction_jobs_created_at"), table_name="extraction_jobs")
+    op.drop_table("extraction_jobs")
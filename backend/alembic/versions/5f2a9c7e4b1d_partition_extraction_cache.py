@@ -0,0 +1,133 @@
+"""partition extraction_cache by expires_at month
+
+Revision ID: 5f2a9c7e4b1d
+Revises: 81dd5994fceb
+Create Date: 2026-10-18 14:20:05.118342
+
+"""
+
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5f2a9c7e4b1d"
+down_revision: Union[str, Sequence[str], None] = "81dd5994fceb"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Rows that expired before the previous month are not carried over
+MONTHS_BACK = 1
+MONTHS_AHEAD = 3
+
+
+def _add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def _create_partition(month: datetime):
+    # Same naming as app.services.cache_partitions.partition_name
+    op.execute(
+        f"CREATE TABLE extraction_cache_y{month.year:04d}m{month.month:02d} "
+        "PARTITION OF extraction_cache "
+        f"FOR VALUES FROM ('{month.isoformat()}') "
+        f"TO ('{_add_months(month, 1).isoformat()}')"
+    )
+
+
+def _columns():
+    return [
+        sa.Column("video_id", sa.String(length=20), nullable=False),
+        sa.Column("prompt_version", sa.String(length=10), nullable=False),
+        sa.Column("model", sa.String(length=50), nullable=False),
+        sa.Column(
+            "raw_result", postgresql.JSONB(astext_type=sa.Text()), nullable=False
+        ),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+    ]
+
+
+def upgrade() -> None:
+    # 1. Keep the old table aside while the partitioned one is created
+    op.drop_index(op.f("ix_extraction_cache_expires_at"), table_name="extraction_cache")
+    op.rename_table("extraction_cache", "extraction_cache_old")
+    op.execute(
+        "ALTER TABLE extraction_cache_old "
+        "RENAME CONSTRAINT extraction_cache_pkey TO extraction_cache_old_pkey"
+    )
+
+    # 2. Partition key must be part of the primary key
+    op.create_table(
+        "extraction_cache",
+        *_columns(),
+        sa.PrimaryKeyConstraint("video_id", "prompt_version", "model", "expires_at"),
+        postgresql_partition_by="RANGE (expires_at)",
+    )
+    op.create_index(
+        op.f("ix_extraction_cache_expires_at"),
+        "extraction_cache",
+        ["expires_at"],
+        unique=False,
+    )
+
+    # 3. Monthly partitions; the app's partition manager keeps creating new ones
+    current = datetime.now(timezone.utc).replace(
+        day=1, hour=0, minute=0, second=0, microsecond=0
+    )
+    first = _add_months(current, -MONTHS_BACK)
+    end = _add_months(current, MONTHS_AHEAD + 1)
+    for offset in range(MONTHS_BACK + MONTHS_AHEAD + 1):
+        _create_partition(_add_months(first, offset))
+
+    # 4. Carry over the rows that fall into a partition
+    op.execute(
+        sa.text(
+            "INSERT INTO extraction_cache "
+            "SELECT video_id, prompt_version, model, raw_result, created_at, expires_at "
+            "FROM extraction_cache_old "
+            "WHERE expires_at >= :first AND expires_at < :end"
+        ).bindparams(first=first, end=end)
+    )
+    op.drop_table("extraction_cache_old")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.rename_table("extraction_cache", "extraction_cache_partitioned")
+    op.execute("DROP INDEX IF EXISTS ix_extraction_cache_expires_at")
+    op.execute(
+        "ALTER TABLE extraction_cache_partitioned "
+        "RENAME CONSTRAINT extraction_cache_pkey TO extraction_cache_partitioned_pkey"
+    )
+    op.create_table(
+        "extraction_cache",
+        *_columns(),
+        sa.PrimaryKeyConstraint("video_id", "prompt_version", "model"),
+    )
+    op.create_index(
+        op.f("ix_extraction_cache_expires_at"),
+        "extraction_cache",
+        ["expires_at"],
+        unique=False,
+    )
+    # Keep the newest row per key
+    op.execute(
+        "INSERT INTO extraction_cache "
+        "SELECT DISTINCT ON (video_id, prompt_version, model) "
+        "video_id, prompt_version, model, raw_result, created_at, expires_at "
+        "FROM extraction_cache_partitioned "
+        "ORDER BY video_id, prompt_version, model, expires_at DESC"
+    )
+    # Dropping the parent drops its partitions
+    op.drop_table("extraction_cache_partitioned")
@@ -0,0 +1,59 @@
+"""add extraction_content_cache
+
+Revision ID: 6a3f0c9d2e71
+Revises: 2d8b6e1f4a93
+Create Date: 2026-10-18 21:12:44.903126
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "6a3f0c9d2e71"
+down_revision: Union[str, Sequence[str], None] = "2d8b6e1f4a93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "extraction_content_cache",
+        sa.Column("content_hash", sa.String(length=64), nullable=False),
+        sa.Column("prompt_version", sa.String(length=10), nullable=False),
+        sa.Column("model", sa.String(length=50), nullable=False),
+        sa.Column(
+            "raw_result", postgresql.JSONB(astext_type=sa.Text()), nullable=False
+        ),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("content_hash", "prompt_version", "model"),
+    )
+    op.create_index(
+        op.f("ix_extraction_content_cache_expires_at"),
+        "extraction_content_cache",
+        ["expires_at"],
+        unique=False,
+    )
+    # Content entries used to share extraction_cache under "~"-prefixed keys;
+    # they are rebuilt as videos are extracted
+    op.execute("DELETE FROM extraction_cache WHERE video_id LIKE '~%'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        op.f("ix_extraction_content_cache_expires_at"),
+        table_name="extraction_content_cache",
+    )
+    op.drop_table("extraction_content_cache")
@@ -0,0 +1,49 @@
+"""add video_id to recipes
+
+Revision ID: 81dd5994fceb
+Revises: d0d81e1147d4
+Create Date: 2026-10-18 11:02:47.915320
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "81dd5994fceb"
+down_revision: Union[str, Sequence[str], None] = "d0d81e1147d4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 1. Add column as nullable (recipes from non-YouTube URLs stay NULL)
+    op.add_column("recipes", sa.Column("video_id", sa.String(length=20), nullable=True))
+
+    # 2. Backfill with the same pattern as YouTubeService.extract_video_id
+    op.execute(
+        """
+        UPDATE recipes
+        SET video_id = substring(source_url from '(?:v=|/)([0-9A-Za-z_-]{11})')
+        WHERE video_id IS NULL
+        """
+    )
+
+    # 3. B-tree index without blocking writes on large tables
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f("ix_recipes_video_id"),
+            "recipes",
+            ["video_id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_recipes_video_id"), table_name="recipes")
+    op.drop_column("recipes", "video_id")
@@ -0,0 +1,57 @@
+"""add llm_calls ledger
+
+Revision ID: 9c1e4d7a2b6f
+Revises: 5f2a9c7e4b1d
+Create Date: 2026-10-18 16:05:12.774310
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9c1e4d7a2b6f"
+down_revision: Union[str, Sequence[str], None] = "5f2a9c7e4b1d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "llm_calls",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("video_id", sa.String(length=20), nullable=True),
+        sa.Column("provider", sa.String(length=20), nullable=False),
+        sa.Column("model", sa.String(length=50), nullable=False),
+        sa.Column("prompt_version", sa.String(length=10), nullable=False),
+        sa.Column("outcome", sa.String(length=20), nullable=False),
+        sa.Column("prompt_tokens", sa.Integer(), nullable=True),
+        sa.Column("output_tokens", sa.Integer(), nullable=True),
+        sa.Column("latency_ms", sa.Float(), nullable=False),
+        sa.Column("wait_ms", sa.Float(), server_default="0", nullable=False),
+        sa.Column("cost_usd", sa.Float(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_llm_calls_created_at"), "llm_calls", ["created_at"], unique=False
+    )
+    op.create_index(
+        op.f("ix_llm_calls_video_id"), "llm_calls", ["video_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_llm_calls_video_id"), table_name="llm_calls")
+    op.drop_index(op.f("ix_llm_calls_created_at"), table_name="llm_calls")
+    op.drop_table("llm_calls")
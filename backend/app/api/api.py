@@ -1,9 +1,10 @@
 from fastapi import APIRouter
 
-from app.api.endpoints import auth, extract, recipes, security
+from app.api.endpoints import admin, auth, extract, recipes, security
 
 api_router = APIRouter()
 api_router.include_router(recipes.router, prefix="/recipes", tags=["recipes"])
 api_router.include_router(extract.router, prefix="/extract", tags=["extract"])
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(security.router, prefix="/security", tags=["security"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
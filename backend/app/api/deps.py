@@ -1,4 +1,7 @@
-from fastapi import Depends, HTTPException, Request, status
+import secrets
+from typing import Optional
+
+from fastapi import Depends, Header, HTTPException, Request, status
 from jose import JWTError, jwt
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -119,3 +122,19 @@ async def get_current_user_optional(
         return result.scalar_one_or_none()
     except (JWTError, ValueError):
         return None
+
+
+async def require_admin(x_admin_key: Optional[str] = Header(None)) -> None:
+    """
+    Guard for operational endpoints: the X-Admin-Key header must match
+    ADMIN_API_KEY. Admin endpoints are disabled when no key is configured.
+    """
+    if not (
+        settings.ADMIN_API_KEY
+        and x_admin_key
+        and secrets.compare_digest(x_admin_key, settings.ADMIN_API_KEY)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import require_admin
+from app.core.config import settings
+from app.core.database import get_db
+from app.services.cache_partitions import cache_table_stats
+from app.services.llm_ledger import llm_spend_by_day, llm_spend_by_video
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/cache/stats")
+async def read_cache_stats(db: AsyncSession = Depends(get_db)):
+    """
+    extraction_cache row counts (live / stale / expired), created_at age
+    distribution and on-disk size per monthly partition.
+    """
+    return await cache_table_stats(
+        db, stale_grace=timedelta(days=settings.CACHE_STALE_GRACE_DAYS)
+    )
+
+
+@router.get("/llm/spend")
+async def read_llm_spend(
+    days: int = Query(30, ge=1, le=366), db: AsyncSession = Depends(get_db)
+):
+    """
+    LLM calls, failures, tokens, cost (USD) and latency (avg, p95 of
+    successful calls) per UTC day, model and prompt version.
+    """
+    return await llm_spend_by_day(db, days)
+
+
+@router.get("/llm/videos")
+async def read_llm_spend_by_video(
+    days: int = Query(30, ge=1, le=366),
+    limit: int = Query(20, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    The videos that cost the most in LLM calls, re-extractions included.
+    """
+    return await llm_spend_by_video(db, days, limit)
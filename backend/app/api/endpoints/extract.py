@@ -1,15 +1,36 @@
-from typing import Any
+from typing import Callable
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
-from app.models.db import Recipe as RecipeModel
-from app.models.recipe import RecipeData
-from app.schemas.recipe import Ingredient, RecipeCreate, RecipeGenerateRequest, Step
-from app.services.cache import CacheService
-from app.services.gemini import GeminiService
+from app.core.config import settings
+from app.core.database import get_db, get_session_factory
+from app.core.exceptions import (
+    ClientDisconnectedError,
+    DeadlineExceededError,
+    ExtractionQueueFullError,
+    LLMOverloadedError,
+    NoTranscriptError,
+    TranscriptFetchBusyError,
+)
+from app.schemas.recipe import (
+    ExtractionJobResponse,
+    RecipeBatchRequest,
+    RecipeCreate,
+    RecipeGenerateRequest,
+)
+from app.services.deadlines import cancel_on_disconnect, deadline_after
+from app.services.extraction import ExtractionService, build_recipe_response
+from app.services.extraction_batch import BatchExtractor
+from app.services.extraction_jobs import extraction_jobs
+from app.services.extraction_progress import (
+    StageTimings,
+    stage,
+    stream_extraction,
+    timing,
+)
+from app.services.negative_cache import negative_cache
 from app.services.youtube import YouTubeService
 
 router = APIRouter()
@@ -17,92 +38,179 @@ router = APIRouter()
 
 @router.post("", response_model=RecipeCreate)
 async def extract_recipe(
-    request: RecipeGenerateRequest, db: AsyncSession = Depends(get_db)
+    request: RecipeGenerateRequest,
+    http_request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    session_factory: Callable = Depends(get_session_factory),
 ):
     """
     Extract a recipe from a YouTube URL.
     Checks existing recipes first, then the extraction cache, finally triggers AI.
+    Holds the request open for the whole extraction; prefer POST /extract/jobs.
+    Fails with 504 past EXTRACTION_DEADLINE_SECONDS; if the client disconnects,
+    the extraction is cancelled.
+    Responses carry the duration of each stage in a Server-Timing header.
     """
+    deadline = deadline_after(settings.EXTRACTION_DEADLINE_SECONDS)
+    timings = StageTimings()
     try:
-        # 1. Extract Video ID
-        video_id = YouTubeService.extract_video_id(request.video_url)
-
-        # 2. Check for existing public recipes (Instant result)
-        # Using filter_by(source_url=...) or checking video_id embedded in source_url
-        # Since source_url is stored, we can search by it.
-        stmt = (
-            select(RecipeModel)
-            .where(RecipeModel.source_url.like(f"%{video_id}%"))
-            .limit(1)
-        )
-        result = await db.execute(stmt)
-        existing_recipe = result.scalar_one_or_none()
-
-        if existing_recipe:
-            recipe_data_dict: dict[str, Any] = existing_recipe.data
-            return RecipeCreate(
-                id=str(existing_recipe.id),
-                is_public=existing_recipe.is_public,
-                title=recipe_data_dict.get("title", "Unknown"),
-                description=recipe_data_dict.get("description"),
-                video_url=request.video_url,
-                thumbnail_url=f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg",
-                servings=recipe_data_dict.get("servings"),
-                prep_time_minutes=recipe_data_dict.get("prep_time_minutes"),
-                cook_time_minutes=recipe_data_dict.get("cook_time_minutes"),
-                ingredients=[
-                    Ingredient(**i) if isinstance(i, dict) else i
-                    for i in recipe_data_dict.get("ingredients", [])
-                ],
-                steps=[
-                    Step(**s) if isinstance(s, dict) else s
-                    for s in recipe_data_dict.get("instructions", [])
-                ],
-                dietary_tags=recipe_data_dict.get("dietary_tags", []),
+        with timing(timings, route="POST /extract", video_url=request.video_url):
+            result = await cancel_on_disconnect(
+                ExtractionService(db, session_factory).run(
+                    request.video_url, deadline=deadline
+                ),
+                http_request.is_disconnected,
+                settings.DISCONNECT_POLL_SECONDS,
             )
+        response.headers["Server-Timing"] = timings.server_timing()
+        return result
 
-        # 3. Check Cache
-        cache_service = CacheService(db)
-        cached_recipe = await cache_service.get_cached_extraction(video_id)
-
-        recipe_data: RecipeData
-        if cached_recipe:
-            recipe_data = cached_recipe
-        else:
-            # 3. Get Transcript (if not cached)
-            yt_service = YouTubeService()
-            # This is synchronous (network I/O wrapper)
-            transcript = yt_service.get_transcript(video_id)
-
-            # 4. Generate Recipe
-            recipe_data = await GeminiService().extract_recipe(transcript, video_id)
-
-            # 5. Save to Cache
-            await cache_service.save_extraction(video_id, recipe_data)
-
-        # 6. Map to Schema (RecipeData -> RecipeCreate)
-        return RecipeCreate(
-            title=recipe_data.title,
-            description=recipe_data.description,
-            video_url=request.video_url,
-            thumbnail_url=f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg",
-            servings=recipe_data.servings,
-            prep_time_minutes=recipe_data.prep_time_minutes,
-            cook_time_minutes=recipe_data.cook_time_minutes,
-            ingredients=[Ingredient(**i.model_dump()) for i in recipe_data.ingredients],
-            steps=[
-                Step(
-                    step_number=s.step_number,
-                    instruction=s.instruction,
-                    duration_seconds=s.duration_seconds,
-                )
-                for s in recipe_data.instructions
-            ],  # Mapping instructions -> steps
-            dietary_tags=recipe_data.dietary_tags,
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e),
+            headers={"Server-Timing": timings.server_timing()},
+        )
+    except NoTranscriptError as e:
+        # Handled globally (422 NO_TRANSCRIPT)
+        e.headers = {"Server-Timing": timings.server_timing()}
+        raise
+    except (TranscriptFetchBusyError, LLMOverloadedError) as e:
+        raise HTTPException(
+            status_code=503,
+            detail=e.message,
+            headers={"Retry-After": "5", "Server-Timing": timings.server_timing()},
+        )
+    except DeadlineExceededError as e:
+        raise HTTPException(
+            status_code=504,
+            detail=e.message,
+            headers={"Server-Timing": timings.server_timing()},
         )
+    except ClientDisconnectedError as e:
+        # Nobody reads this; 499 keeps it apart from real errors in access logs
+        raise HTTPException(status_code=499, detail=e.message)
+    except Exception as e:
+        # Log error in production
+        raise HTTPException(
+            status_code=500,
+            detail=str(e),
+            headers={"Server-Timing": timings.server_timing()},
+        )
+
+
+@router.get("/stream")
+async def stream_extraction_progress(
+    video_url: str = Query(..., description="YouTube video URL"),
+):
+    """
+    Extract a recipe and report progress as Server-Sent Events (GET, so it works
+    with EventSource): `stage` events for existing_recipe, cache_check,
+    transcript, content_check, llm and save; `partial` events with the recipe
+    fields generated so far; then one `result` (RecipeCreate) or `error` event.
+    A stream that joins an extraction already running for the same video (see
+    generate_coalesced) first gets that extraction's stage events so far and
+    its latest partial, then the rest as they happen.
+    """
+    return StreamingResponse(
+        stream_extraction(video_url),
+        media_type="text/event-stream",
+        # No caching or proxy buffering, or events arrive all at once at the end
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
+
+@router.post("/jobs", response_model=ExtractionJobResponse, status_code=202)
+async def create_extraction_job(
+    request: RecipeGenerateRequest,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Enqueue an extraction and return a job id right away.
+    Existing recipes and cache hits are answered with an already completed job.
+    The lookups' durations are returned in a Server-Timing header.
+    """
+    try:
+        video_id = YouTubeService.extract_video_id(request.video_url)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        # Log error in production
-        raise HTTPException(status_code=500, detail=str(e))
+    negative_cache.check(video_id)
+
+    extraction_service = ExtractionService(db)
+    timings = StageTimings()
+    with timing(timings, route="POST /extract/jobs", video_id=video_id):
+        with stage("existing_recipe") as info:
+            existing = await extraction_service.find_existing_recipe(
+                video_id, request.video_url
+            )
+            info["hit"] = existing is not None
+        if not existing:
+            with stage("cache_check") as info:
+                cached_recipe = await extraction_service.get_cached(video_id)
+                info["hit"] = cached_recipe is not None
+    response.headers["Server-Timing"] = timings.server_timing()
+
+    if existing:
+        job = await extraction_jobs.add_completed(video_id, request.video_url, existing)
+        return job.to_response()
+
+    if cached_recipe:
+        job = await extraction_jobs.add_completed(
+            video_id,
+            request.video_url,
+            build_recipe_response(cached_recipe, request.video_url, video_id),
+        )
+        return job.to_response()
+
+    try:
+        job = await extraction_jobs.submit(video_id, request.video_url)
+    except ExtractionQueueFullError as e:
+        raise HTTPException(
+            status_code=503, detail=e.message, headers={"Retry-After": "5"}
+        )
+    return job.to_response()
+
+
+@router.get("/jobs/{job_id}", response_model=ExtractionJobResponse)
+async def get_extraction_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, description="Seconds to long-poll for completion"),
+):
+    """
+    Poll an extraction job. Pass `wait` to long-poll until the job finishes.
+    """
+    job = await extraction_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Extraction job not found")
+
+    job = await extraction_jobs.wait(
+        job, timeout=min(wait, settings.EXTRACTION_JOB_MAX_WAIT_SECONDS)
+    )
+    return job.to_response()
+
+
+@router.post("/batch")
+async def extract_batch(request: RecipeBatchRequest):
+    """
+    Extract many URLs at once. Results are streamed back as NDJSON, one line per
+    unique video, as soon as each is ready (cache hits first).
+    """
+    if not request.video_urls:
+        raise HTTPException(status_code=400, detail="No video URLs provided")
+    if len(request.video_urls) > settings.EXTRACT_BATCH_MAX_URLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.EXTRACT_BATCH_MAX_URLS} URLs per batch",
+        )
+
+    # The stream outlives the request's dependencies, so the extractor
+    # opens its own database sessions.
+    extractor = BatchExtractor(concurrency=settings.EXTRACT_BATCH_CONCURRENCY)
+
+    async def lines():
+        async for result in extractor.run(request.video_urls):
+            yield result.model_dump_json() + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
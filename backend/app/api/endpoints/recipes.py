@@ -12,6 +12,7 @@ from app.models.db import Recipe as RecipeModel
 from app.models.user import User as UserModel
 from app.schemas.recipe import Recipe, RecipeCreate
 from app.services.discovery import DiscoveryService
+from app.services.youtube import YouTubeService
 
 router = APIRouter()
 
@@ -40,11 +41,17 @@ async def create_recipe(
     Save a generated recipe to the database.
     """
     try:
+        try:
+            video_id = YouTubeService.extract_video_id(recipe.video_url)
+        except ValueError:
+            video_id = None
+
         # Map RecipeCreate schema to RecipeModel DB model
         db_recipe = RecipeModel(
             id=uuid.uuid4(),
             user_id=current_user.id,
             source_url=recipe.video_url,
+            video_id=video_id,
             is_public=recipe.is_public,
             data=recipe.model_dump(
                 exclude={"id", "is_public"}
@@ -1,7 +1,54 @@
 class NoTranscriptError(Exception):
-    """Raised when no transcript is found for a video."""
+    """Raised when no transcript is found for a video.
 
-    def __init__(self, video_id: str):
+    `transient` marks upstream failures (network, throttling) as opposed to
+    videos that simply have no captions.
+    """
+
+    def __init__(self, video_id: str, transient: bool = False):
         self.video_id = video_id
+        self.transient = transient
         self.message = f"No transcript available for video {video_id}"
         super().__init__(self.message)
+
+
+class ExtractionQueueFullError(Exception):
+    """Raised when the extraction job queue is at capacity."""
+
+    def __init__(self, max_depth: int):
+        self.max_depth = max_depth
+        self.message = f"Extraction queue is full ({max_depth} pending jobs)"
+        super().__init__(self.message)
+
+
+class TranscriptFetchBusyError(Exception):
+    """Raised when no transcript fetch slot is available in time."""
+
+    def __init__(self, reason: str):
+        self.message = f"Transcript service is busy: {reason}"
+        super().__init__(self.message)
+
+
+class LLMOverloadedError(Exception):
+    """Raised when an LLM call cannot be admitted before its deadline."""
+
+    def __init__(self, reason: str):
+        self.message = f"Recipe extraction service is busy: {reason}"
+        super().__init__(self.message)
+
+
+class DeadlineExceededError(Exception):
+    """Raised when a request's deadline passes before a pipeline stage finishes."""
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.message = f"Recipe extraction timed out during {stage}"
+        super().__init__(self.message)
+
+
+class ClientDisconnectedError(Exception):
+    """Raised when the client went away and its request's work was abandoned."""
+
+    def __init__(self):
+        self.message = "Client closed the request"
+        super().__init__(self.message)
@@ -0,0 +1,80 @@
+import math
+import threading
+from collections import defaultdict, deque
+from typing import Deque, Dict, Iterable
+
+
+def percentile(values: Iterable[float], q: float) -> float:
+    """
+    Nearest-rank percentile (q in 0..100). Returns 0.0 for an empty series.
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class Metrics:
+    """
+    Minimal in-process metrics registry (counters, gauges and rolling timings).
+    Exposed as JSON on GET /metrics.
+    """
+
+    TIMING_WINDOW = 1000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._gauges: Dict[str, float] = {}
+        self._timings: Dict[str, Deque[float]] = defaultdict(
+            lambda: deque(maxlen=self.TIMING_WINDOW)
+        )
+
+    def incr(self, name: str, value: float = 1):
+        with self._lock:
+            self._counters[name] += value
+
+    def set_gauge(self, name: str, value: float):
+        with self._lock:
+            self._gauges[name] = value
+
+    def add_gauge(self, name: str, delta: float):
+        with self._lock:
+            self._gauges[name] = self._gauges.get(name, 0) + delta
+
+    def observe(self, name: str, value: float):
+        with self._lock:
+            self._timings[name].append(value)
+
+    def counter(self, name: str) -> float:
+        return self._counters.get(name, 0)
+
+    def gauge(self, name: str) -> float:
+        return self._gauges.get(name, 0)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            timings = {
+                name: {
+                    "count": len(values),
+                    "p50": percentile(values, 50),
+                    "p95": percentile(values, 95),
+                    "max": max(values, default=0.0),
+                }
+                for name, values in self._timings.items()
+            }
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "timings": timings,
+            }
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._timings.clear()
+
+
+metrics = Metrics()
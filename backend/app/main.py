@@ -9,8 +9,20 @@ from app.core.config import settings
 from app.core.database import Base, engine
 from app.core.exceptions import NoTranscriptError
 from app.core.logger import logger
+from app.core.metrics import metrics
 from app.models import db as db_models  # noqa: F401
 from app.models import user as user_models  # noqa: F401
+from app.services.cache import cache_stats
+from app.services.cache_backends import close_cache_backends
+from app.services.cache_fill import cache_filler
+from app.services.cache_partitions import cache_partitions
+from app.services.cache_refresh import cache_refresher
+from app.services.extraction_jobs import extraction_jobs
+from app.services.llm_ledger import llm_ledger
+from app.services.llm_providers import close_providers
+from app.services.llm_router import llm_router
+from app.services.transcript_executor import transcript_executor
+from app.services.transcript_workers import transcript_workers
 
 
 @asynccontextmanager
@@ -21,8 +33,23 @@ async def lifespan(app: FastAPI):
             await conn.run_sync(Base.metadata.create_all)
     except Exception as e:
         logger.error(f"Database connection failed, skipping initialization: {e}")
+    transcript_workers.start()
+    cache_partitions.start()
+    extraction_jobs.start()
+    cache_refresher.start()
+    llm_ledger.start()
     yield
     # Shutdown
+    await cache_refresher.stop()
+    await cache_partitions.stop()
+    await extraction_jobs.stop()
+    await cache_filler.stop()
+    # After the work that makes LLM calls, so its last entries are written
+    await llm_ledger.stop()
+    transcript_executor.shutdown()
+    transcript_workers.shutdown()
+    await close_providers()
+    await close_cache_backends()
 
 
 app = FastAPI(
@@ -37,6 +64,8 @@ async def no_transcript_exception_handler(request: Request, exc: NoTranscriptErr
     return JSONResponse(
         status_code=422,
         content={"detail": exc.message, "code": "NO_TRANSCRIPT"},
+        # Set by endpoints that report stage timings
+        headers=getattr(exc, "headers", None),
     )
 
 
@@ -73,3 +102,15 @@ async def health_check():
     Health check endpoint to verify backend status.
     """
     return {"status": "ok", "service": "chefstream-backend"}
+
+
+@app.get("/metrics")
+async def read_metrics():
+    """
+    In-process counters, gauges and timings for this backend worker.
+    """
+    return {
+        **metrics.snapshot(),
+        "cache": cache_stats(),
+        "llm_providers": llm_router.snapshot(),
+    }
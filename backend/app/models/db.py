@@ -2,7 +2,17 @@ import uuid
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    DateTime,
+    Float,
+    ForeignKey,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+)
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
@@ -22,6 +32,10 @@ class Recipe(Base):
     )
 
     source_url: Mapped[str] = mapped_column(Text, nullable=False)
+    # Canonical YouTube video id parsed from source_url (indexed lookup)
+    video_id: Mapped[Optional[str]] = mapped_column(
+        String(20), nullable=True, index=True
+    )
     data: Mapped[dict] = mapped_column(JSONB, nullable=False)
     is_public: Mapped[bool] = mapped_column(Boolean, default=True)
     created_at: Mapped[datetime] = mapped_column(
@@ -32,7 +46,13 @@ class Recipe(Base):
 
 
 class ExtractionCache(Base):
+    """
+    Partitioned by expires_at month (see app.services.cache_partitions);
+    the partition key has to be part of the primary key.
+    """
+
     __tablename__ = "extraction_cache"
+    __table_args__ = {"postgresql_partition_by": "RANGE (expires_at)"}
 
     video_id: Mapped[str] = mapped_column(String(20), primary_key=True)
     prompt_version: Mapped[str] = mapped_column(String(10), primary_key=True)
@@ -41,4 +61,95 @@ class ExtractionCache(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
-    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), primary_key=True, index=True
+    )
+
+
+class ExtractionContentCache(Base):
+    """
+    Extraction results indexed by normalized-transcript hash (see
+    app.services.cache.content_key), so re-uploads of a video reuse them.
+    Kept out of extraction_cache, whose rows are all keyed by video_id.
+    """
+
+    __tablename__ = "extraction_content_cache"
+
+    content_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    prompt_version: Mapped[str] = mapped_column(String(10), primary_key=True)
+    model: Mapped[str] = mapped_column(String(50), primary_key=True)
+    raw_result: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, index=True
+    )
+
+
+class Transcript(Base):
+    """
+    Cleaned transcript text (zlib-compressed), independent of prompt/model versions.
+    """
+
+    __tablename__ = "transcripts"
+
+    video_id: Mapped[str] = mapped_column(String(20), primary_key=True)
+    language: Mapped[str] = mapped_column(String(10), primary_key=True)
+    content: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+
+class ExtractionJobRecord(Base):
+    """
+    State of an asynchronous extraction job (see app.services.extraction_jobs),
+    shared so any replica can answer polls for it.
+    """
+
+    __tablename__ = "extraction_jobs"
+
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    video_id: Mapped[str] = mapped_column(String(20), nullable=False)
+    video_url: Mapped[str] = mapped_column(Text, nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False)
+    result: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    error_code: Mapped[Optional[str]] = mapped_column(String(30), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, index=True
+    )
+    finished_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True, index=True
+    )
+
+
+class LLMCall(Base):
+    """
+    Append-only ledger of LLM calls (see app.services.llm_ledger): one row per
+    provider call, including failed, rejected and cancelled (hedged) ones.
+    Token counts are missing when the provider did not report them. latency_ms
+    is the provider call that produced the outcome; wait_ms is the rest of the
+    time spent in the limiter (queueing, backoff and overloaded attempts).
+    """
+
+    __tablename__ = "llm_calls"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), index=True
+    )
+    video_id: Mapped[Optional[str]] = mapped_column(
+        String(20), nullable=True, index=True
+    )
+    provider: Mapped[str] = mapped_column(String(20), nullable=False)
+    model: Mapped[str] = mapped_column(String(50), nullable=False)
+    prompt_version: Mapped[str] = mapped_column(String(10), nullable=False)
+    outcome: Mapped[str] = mapped_column(String(20), nullable=False)
+    prompt_tokens: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    output_tokens: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    latency_ms: Mapped[float] = mapped_column(Float, nullable=False)
+    wait_ms: Mapped[float] = mapped_column(Float, nullable=False, server_default="0")
+    # At the prices configured when the call was made
+    cost_usd: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
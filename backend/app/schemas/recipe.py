@@ -48,6 +48,36 @@ class RecipeGenerateRequest(BaseModel):
     video_url: str
 
 
+class RecipeBatchRequest(BaseModel):
+    video_urls: List[str]
+
+
+class BatchExtractionResult(BaseModel):
+    """One NDJSON line of POST /extract/batch."""
+
+    video_url: str
+    video_id: Optional[str] = None
+    status: str  # ok, error
+    source: Optional[str] = None  # cache, extracted
+    recipe: Optional[RecipeCreate] = None
+    error: Optional[str] = None
+    error_code: Optional[str] = None
+
+
+# --- Extraction Jobs ---
+
+
+class ExtractionJobResponse(BaseModel):
+    job_id: str
+    status: str  # pending, running, completed, failed
+    video_url: str
+    result: Optional[RecipeCreate] = None
+    error: Optional[str] = None
+    error_code: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+
 # --- Database Response Model ---
 
 
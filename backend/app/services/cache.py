@@ -1,68 +1,336 @@
+import hashlib
+import re
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Dict, Hashable, Iterable, Mapping, Optional, Tuple
 
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.logger import logger
-from app.models.db import ExtractionCache
+from app.core.metrics import metrics
 from app.models.recipe import RecipeData
+from app.services.cache_backends import (
+    CacheBackend,
+    CacheEntry,
+    get_cache_backend,
+    get_content_cache_backend,
+)
+from app.services.cache_refresh import cache_refresher
+from app.services.gemini import PROMPT_VERSION
+from app.services.llm_providers import model_versions
+
+
+class L1Cache:
+    """
+    Bounded in-process LRU + TTL cache of serialized RecipeData (JSON bytes).
+    Evicts least recently used entries past `max_entries` or `max_bytes`.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[Hashable, Tuple[float, bytes]] = OrderedDict()
+        self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, payload = entry
+        if time.monotonic() >= expires_at:
+            self.invalidate(key)
+            return None
+        self._entries.move_to_end(key)
+        return payload
+
+    def set(self, key: Hashable, payload: bytes, ttl_seconds: Optional[float] = None):
+        ttl = (
+            self.ttl_seconds
+            if ttl_seconds is None
+            else min(ttl_seconds, self.ttl_seconds)
+        )
+        if ttl <= 0 or len(payload) > self.max_bytes:
+            return
+        self.invalidate(key)
+        self._entries[key] = (time.monotonic() + ttl, payload)
+        self.bytes += len(payload)
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.bytes -= len(evicted)
+            metrics.incr("cache.l1.evictions")
+        self._update_gauges()
+
+    def invalidate(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= len(entry[1])
+            self._update_gauges()
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+        self._update_gauges()
+
+    def _update_gauges(self):
+        metrics.set_gauge("cache.l1.entries", len(self._entries))
+        metrics.set_gauge("cache.l1.bytes", self.bytes)
+
+
+extraction_l1 = L1Cache(
+    max_entries=settings.L1_CACHE_MAX_ENTRIES,
+    max_bytes=settings.L1_CACHE_MAX_BYTES,
+    ttl_seconds=settings.L1_CACHE_TTL_SECONDS,
+)
+
+
+_NON_WORD_RE = re.compile(r"[^\w\s]+")
+
+
+def normalize_transcript(transcript: str) -> str:
+    """
+    Case, punctuation and whitespace differences between re-uploads of the
+    same video don't change the recipe.
+    """
+    return " ".join(_NON_WORD_RE.sub(" ", transcript.lower()).split())
+
+
+def content_key(transcript: str) -> str:
+    return hashlib.sha256(normalize_transcript(transcript).encode("utf-8")).hexdigest()
+
+
+def _hit_ratio(tier: str) -> float:
+    hits = metrics.counter(f"cache.{tier}.hit")
+    lookups = hits + metrics.counter(f"cache.{tier}.miss")
+    return hits / lookups if lookups else 0.0
+
+
+def cache_stats() -> dict:
+    """
+    Hit ratios per cache tier (L1 = in-process, L2 = cache backend by video_id,
+    content = content index by transcript hash, consulted before the model).
+    """
+    return {
+        "l1_hit_ratio": _hit_ratio("l1"),
+        "l2_hit_ratio": _hit_ratio("l2"),
+        "content_hit_ratio": _hit_ratio("content"),
+        "l1_entries": len(extraction_l1),
+        "l1_bytes": extraction_l1.bytes,
+    }
 
 
 class CacheService:
-    def __init__(self, db: AsyncSession):
+    def __init__(
+        self,
+        db: AsyncSession,
+        backend: Optional[CacheBackend] = None,
+        content_backend: Optional[CacheBackend] = None,
+    ):
         self.db = db
+        # Where L2 entries live (CACHE_BACKEND): Postgres, in-memory or Redis
+        self.backend = backend if backend is not None else get_cache_backend(db)
+        # The content index, keyed by transcript hash instead of video_id
+        self.content_backend = (
+            content_backend
+            if content_backend is not None
+            else get_content_cache_backend(db)
+        )
         # Configurable constants could be in settings
-        self.PROMPT_VERSION = "v1"
+        self.PROMPT_VERSION = PROMPT_VERSION
         self.MODEL_VERSION = "gemini-flash-latest"
+        # Entries answered by any configured provider are valid hits
+        self.MODEL_VERSIONS = model_versions()
         self.TTL_DAYS = 30
+        # Expired entries are served (and refreshed in the background) this long
+        self.STALE_GRACE = timedelta(days=settings.CACHE_STALE_GRACE_DAYS)
 
-    async def get_cached_extraction(self, video_id: str) -> Optional[RecipeData]:
+    def _l1_key(self, video_id: str) -> Tuple[str, str, str]:
+        return (video_id, self.PROMPT_VERSION, self.MODEL_VERSION)
+
+    async def get_cached_extraction(
+        self, video_id: str, allow_stale: bool = True
+    ) -> Optional[RecipeData]:
         """
         Retrieve cached extraction if valid.
+        Checks the in-process L1 tier before asking the cache backend.
+        With `allow_stale`, an entry expired less than STALE_GRACE ago is returned
+        as is and a background refresh is scheduled (stale-while-revalidate).
         """
-        query = select(ExtractionCache).where(
-            ExtractionCache.video_id == video_id,
-            ExtractionCache.prompt_version == self.PROMPT_VERSION,
-            ExtractionCache.model == self.MODEL_VERSION,
-            ExtractionCache.expires_at > datetime.now(timezone.utc),
+        l1_key = self._l1_key(video_id)
+        payload = extraction_l1.get(l1_key)
+        if payload is not None:
+            metrics.incr("cache.l1.hit")
+            cache_refresher.record_hit(video_id)
+            return RecipeData.model_validate_json(payload)
+        metrics.incr("cache.l1.miss")
+
+        now = datetime.now(timezone.utc)
+        cache_entry = await self.backend.get(
+            video_id,
+            self.PROMPT_VERSION,
+            self.MODEL_VERSIONS,
+            valid_after=now - self.STALE_GRACE if allow_stale else now,
         )
-        result = await self.db.execute(query)
-        cache_entry = result.scalar_one_or_none()
 
         if cache_entry:
             # Parse raw_result (JSON) back to RecipeData
             # Note: stored JSON keys must match RecipeData fields
             try:
                 data = cache_entry.raw_result
-                return RecipeData(**data)
+                recipe_data = RecipeData(**data)
             except Exception as e:
                 logger.error(f"Cache parse error: {e}")
+                metrics.incr("cache.l2.miss")
                 return None
+
+            metrics.incr("cache.l2.hit")
+            remaining = cache_entry.expires_at - now
+            if remaining.total_seconds() <= 0:
+                metrics.incr("cache.l2.stale")
+                cache_refresher.schedule(video_id)
+                return recipe_data
+
+            cache_refresher.record_hit(video_id)
+            # Never keep an entry in L1 past its expires_at
+            extraction_l1.set(
+                l1_key,
+                recipe_data.model_dump_json().encode(),
+                ttl_seconds=remaining.total_seconds(),
+            )
+            return recipe_data
+
+        metrics.incr("cache.l2.miss")
         return None
 
-    async def save_extraction(self, video_id: str, recipe_data: RecipeData):
+    async def get_cached_extractions(
+        self, video_ids: Iterable[str]
+    ) -> Dict[str, RecipeData]:
         """
-        Save extraction result to cache.
+        Batch lookup: L1 first, then a single backend read for the remaining videos.
+        Stale entries are served and refreshed like in get_cached_extraction.
         """
-        # Convert RecipeData to dict for JSONB storage
-        data = recipe_data.model_dump()
+        found: Dict[str, RecipeData] = {}
+        remaining = []
+        for video_id in video_ids:
+            payload = extraction_l1.get(self._l1_key(video_id))
+            if payload is not None:
+                metrics.incr("cache.l1.hit")
+                cache_refresher.record_hit(video_id)
+                found[video_id] = RecipeData.model_validate_json(payload)
+            else:
+                metrics.incr("cache.l1.miss")
+                remaining.append(video_id)
 
-        # Calculate expiration
-        expires_at = datetime.now(timezone.utc) + timedelta(days=self.TTL_DAYS)
+        if not remaining:
+            return found
 
-        # Upsert logic (delete existing or update)
-        # Simple approach: Delete old cache for this key then insert
-        # Or use merge/upsert. Let's try merge if supported well or checking existence.
-        # Given the PK is (video_id, prompt_version, model), merege works.
+        now = datetime.now(timezone.utc)
+        entries = await self.backend.get_many(
+            remaining,
+            self.PROMPT_VERSION,
+            self.MODEL_VERSIONS,
+            valid_after=now - self.STALE_GRACE,
+        )
+        for video_id, cache_entry in entries.items():
+            try:
+                recipe_data = RecipeData(**cache_entry.raw_result)
+            except Exception as e:
+                logger.error(f"Cache parse error: {e}")
+                continue
+            found[video_id] = recipe_data
 
-        cache_entry = ExtractionCache(
+            remaining_ttl = (cache_entry.expires_at - now).total_seconds()
+            if remaining_ttl <= 0:
+                metrics.incr("cache.l2.stale")
+                cache_refresher.schedule(video_id)
+                continue
+            cache_refresher.record_hit(video_id)
+            extraction_l1.set(
+                self._l1_key(video_id),
+                recipe_data.model_dump_json().encode(),
+                ttl_seconds=remaining_ttl,
+            )
+
+        hits = sum(1 for video_id in remaining if video_id in found)
+        metrics.incr("cache.l2.hit", hits)
+        metrics.incr("cache.l2.miss", len(remaining) - hits)
+        return found
+
+    def _entry(
+        self, video_id: str, recipe_data: RecipeData, model: Optional[str]
+    ) -> CacheEntry:
+        return CacheEntry(
             video_id=video_id,
             prompt_version=self.PROMPT_VERSION,
-            model=self.MODEL_VERSION,
-            raw_result=data,
-            expires_at=expires_at,
+            model=model or self.MODEL_VERSION,
+            raw_result=recipe_data.model_dump(),
+            expires_at=datetime.now(timezone.utc) + timedelta(days=self.TTL_DAYS),
+        )
+
+    async def get_cached_by_content(
+        self, transcript: str
+    ) -> Optional[Tuple[RecipeData, str]]:
+        """
+        Fresh extraction of an identical (normalized) transcript, e.g. from a
+        re-upload under another video_id, with the model version that made it.
+        """
+        cache_entry = await self.content_backend.get(
+            content_key(transcript),
+            self.PROMPT_VERSION,
+            self.MODEL_VERSIONS,
+            valid_after=datetime.now(timezone.utc),
         )
+        if cache_entry is not None:
+            try:
+                recipe_data = RecipeData(**cache_entry.raw_result)
+            except Exception as e:
+                logger.error(f"Cache parse error: {e}")
+            else:
+                metrics.incr("cache.content.hit")
+                return recipe_data, cache_entry.model
 
-        await self.db.merge(cache_entry)
-        await self.db.commit()
+        metrics.incr("cache.content.miss")
+        return None
+
+    async def save_extraction(
+        self,
+        video_id: str,
+        recipe_data: RecipeData,
+        model: Optional[str] = None,
+        transcript: Optional[str] = None,
+    ):
+        """
+        Save extraction result to cache.
+        `model` is the model version of the provider that answered
+        (defaults to MODEL_VERSION). With `transcript`, the result is also
+        saved to the content index.
+        """
+        await self.backend.save(self._entry(video_id, recipe_data, model))
+        if transcript is not None:
+            await self.content_backend.save(
+                self._entry(content_key(transcript), recipe_data, model)
+            )
+
+        # The L1 copy (if any) is stale now; the next read repopulates it
+        extraction_l1.invalidate(self._l1_key(video_id))
+
+    async def save_many(
+        self, recipes: Mapping[str, RecipeData], model: Optional[str] = None
+    ):
+        """
+        Bulk write for backfills and imports: one statement per batch of entries
+        instead of a round trip and commit per video.
+        """
+        await self.backend.save_many(
+            [
+                self._entry(video_id, recipe_data, model)
+                for video_id, recipe_data in recipes.items()
+            ]
+        )
+        for video_id in recipes:
+            extraction_l1.invalidate(self._l1_key(video_id))
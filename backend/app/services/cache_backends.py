@@ -0,0 +1,477 @@
+import hashlib
+import json
+import struct
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+from sqlalchemy import delete, func, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.metrics import metrics
+from app.models.db import ExtractionCache, ExtractionContentCache
+
+
+@dataclass
+class CacheEntry:
+    video_id: str  # In the content index (get_content_cache_backend): the hash
+    prompt_version: str
+    model: str
+    raw_result: dict
+    expires_at: datetime
+
+
+def save_lock_key(video_id: str, prompt_version: str, model: str) -> int:
+    """
+    Advisory lock id serializing saves of one cache key. Prefixed so it never
+    matches the extraction lease on the same key, which a lease holder keeps
+    while it saves.
+    """
+    parts = ("extraction_cache", video_id, prompt_version, model)
+    digest = hashlib.blake2b("|".join(parts).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def _newest(entries: Dict[str, CacheEntry], entry: CacheEntry):
+    # With several models' entries for a video, the one expiring last wins
+    current = entries.get(entry.video_id)
+    if current is None or entry.expires_at > current.expires_at:
+        entries[entry.video_id] = entry
+
+
+class CacheBackend(ABC):
+    """
+    Storage of extraction results behind CacheService.
+    Reads return, per video, the newest entry written by any of `models`
+    that expires after `valid_after`.
+    """
+
+    name: str
+
+    async def get(
+        self,
+        video_id: str,
+        prompt_version: str,
+        models: Sequence[str],
+        valid_after: datetime,
+    ) -> Optional[CacheEntry]:
+        found = await self.get_many([video_id], prompt_version, models, valid_after)
+        return found.get(video_id)
+
+    @abstractmethod
+    async def get_many(
+        self,
+        video_ids: Sequence[str],
+        prompt_version: str,
+        models: Sequence[str],
+        valid_after: datetime,
+    ) -> Dict[str, CacheEntry]:
+        pass
+
+    async def save(self, entry: CacheEntry):
+        await self.save_many([entry])
+
+    @abstractmethod
+    async def save_many(self, entries: Sequence[CacheEntry]):
+        pass
+
+
+class PostgresCacheBackend(CacheBackend):
+    """
+    The extraction_cache table, read and written through the request's session.
+    """
+
+    name = "postgres"
+    # 8 bind parameters per row (3 to delete, 5 to insert); asyncpg allows 32767
+    BATCH_SIZE = 1000
+    # Taken in ascending key order, so concurrent saves can't deadlock
+    LOCK_KEYS = text(
+        "SELECT pg_advisory_xact_lock(key) FROM "
+        "(SELECT key FROM unnest(CAST(:keys AS bigint[])) WITH ORDINALITY "
+        "AS keys (key, position) ORDER BY position) AS ordered"
+    )
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    @staticmethod
+    def _entry(row: ExtractionCache) -> CacheEntry:
+        return CacheEntry(
+            video_id=row.video_id,
+            prompt_version=row.prompt_version,
+            model=row.model,
+            raw_result=row.raw_result,
+            expires_at=row.expires_at,
+        )
+
+    async def get(
+        self,
+        video_id: str,
+        prompt_version: str,
+        models: Sequence[str],
+        valid_after: datetime,
+    ) -> Optional[CacheEntry]:
+        query = (
+            select(ExtractionCache)
+            .where(
+                ExtractionCache.video_id == video_id,
+                ExtractionCache.prompt_version == prompt_version,
+                ExtractionCache.model.in_(models),
+                ExtractionCache.expires_at > valid_after,
+            )
+            .order_by(ExtractionCache.expires_at.desc())
+            .limit(1)
+        )
+        result = await self.db.execute(query)
+        row = result.scalar_one_or_none()
+        return self._entry(row) if row is not None else None
+
+    async def get_many(
+        self,
+        video_ids: Sequence[str],
+        prompt_version: str,
+        models: Sequence[str],
+        valid_after: datetime,
+    ) -> Dict[str, CacheEntry]:
+        query = select(ExtractionCache).where(
+            ExtractionCache.video_id.in_(video_ids),
+            ExtractionCache.prompt_version == prompt_version,
+            ExtractionCache.model.in_(models),
+            ExtractionCache.expires_at > valid_after,
+        )
+        result = await self.db.execute(query)
+        found: Dict[str, CacheEntry] = {}
+        for row in result.scalars().all():
+            _newest(found, self._entry(row))
+        return found
+
+    async def save_many(self, entries: Sequence[CacheEntry]):
+        """
+        Replace the stored rows of each (video_id, prompt_version, model) key,
+        up to BATCH_SIZE keys per statement, committed once. expires_at is part
+        of the primary key (it is the partition key) and differs on every
+        write, and old and new rows may sit in different partitions, so no
+        unique constraint can make the INSERT conflict with the row it
+        supersedes. Instead each statement deletes the keys' existing rows (in
+        a CTE) and inserts the new ones, under transaction-level advisory
+        locks on the keys: a concurrent save of the same key waits for this
+        one to commit, then deletes its row.
+        """
+        # One row per key; the last write wins
+        rows = {
+            (e.video_id, e.prompt_version, e.model): {
+                "video_id": e.video_id,
+                "prompt_version": e.prompt_version,
+                "model": e.model,
+                "raw_result": e.raw_result,
+                "expires_at": e.expires_at,
+            }
+            for e in entries
+        }
+        keys = list(rows)
+        if not keys:
+            return
+
+        lock_keys = sorted({save_lock_key(*key) for key in keys})
+        await self.db.execute(self.LOCK_KEYS, {"keys": lock_keys})
+        for start in range(0, len(keys), self.BATCH_SIZE):
+            batch = keys[start : start + self.BATCH_SIZE]
+            superseded = (
+                delete(ExtractionCache)
+                .where(
+                    tuple_(
+                        ExtractionCache.video_id,
+                        ExtractionCache.prompt_version,
+                        ExtractionCache.model,
+                    ).in_(batch)
+                )
+                .cte("superseded")
+            )
+            stmt = (
+                insert(ExtractionCache)
+                .values([rows[key] for key in batch])
+                .add_cte(superseded)
+            )
+            await self.db.execute(stmt)
+        await self.db.commit()
+
+
+class PostgresContentCacheBackend(CacheBackend):
+    """
+    The extraction_content_cache table: one row per (content_hash,
+    prompt_version, model), replaced in place on every save.
+    """
+
+    name = "postgres"
+    # 5 bind parameters per row; asyncpg allows 32767
+    BATCH_SIZE = 1000
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_many(
+        self,
+        video_ids: Sequence[str],
+        prompt_version: str,
+        models: Sequence[str],
+        valid_after: datetime,
+    ) -> Dict[str, CacheEntry]:
+        query = select(ExtractionContentCache).where(
+            ExtractionContentCache.content_hash.in_(video_ids),
+            ExtractionContentCache.prompt_version == prompt_version,
+            ExtractionContentCache.model.in_(models),
+            ExtractionContentCache.expires_at > valid_after,
+        )
+        result = await self.db.execute(query)
+        found: Dict[str, CacheEntry] = {}
+        for row in result.scalars().all():
+            _newest(
+                found,
+                CacheEntry(
+                    video_id=row.content_hash,
+                    prompt_version=row.prompt_version,
+                    model=row.model,
+                    raw_result=row.raw_result,
+                    expires_at=row.expires_at,
+                ),
+            )
+        return found
+
+    async def save_many(self, entries: Sequence[CacheEntry]):
+        # One row per key (ON CONFLICT can't touch a row twice); last write wins
+        rows = list(
+            {
+                (e.video_id, e.prompt_version, e.model): {
+                    "content_hash": e.video_id,
+                    "prompt_version": e.prompt_version,
+                    "model": e.model,
+                    "raw_result": e.raw_result,
+                    "expires_at": e.expires_at,
+                }
+                for e in entries
+            }.values()
+        )
+        if not rows:
+            return
+        for start in range(0, len(rows), self.BATCH_SIZE):
+            stmt = insert(ExtractionContentCache).values(
+                rows[start : start + self.BATCH_SIZE]
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[
+                    ExtractionContentCache.content_hash,
+                    ExtractionContentCache.prompt_version,
+                    ExtractionContentCache.model,
+                ],
+                set_={
+                    "raw_result": stmt.excluded.raw_result,
+                    "expires_at": stmt.excluded.expires_at,
+                    "created_at": func.now(),
+                },
+            )
+            await self.db.execute(stmt)
+        await self.db.commit()
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    Process-local store for development, tests and single-replica deployments.
+    Drops the oldest written entries past `max_entries`.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Tuple[str, str, str], CacheEntry] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+
+    async def get_many(
+        self,
+        video_ids: Sequence[str],
+        prompt_version: str,
+        models: Sequence[str],
+        valid_after: datetime,
+    ) -> Dict[str, CacheEntry]:
+        found: Dict[str, CacheEntry] = {}
+        for video_id in video_ids:
+            for model in models:
+                entry = self._entries.get((video_id, prompt_version, model))
+                if entry is not None and entry.expires_at > valid_after:
+                    _newest(found, entry)
+        return found
+
+    async def save_many(self, entries: Sequence[CacheEntry]):
+        for entry in entries:
+            key = (entry.video_id, entry.prompt_version, entry.model)
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+# expires_at (unix seconds, big-endian double) followed by zlib-compressed JSON
+_EXPIRES = struct.Struct(">d")
+
+
+def encode_entry(entry: CacheEntry) -> bytes:
+    payload = json.dumps(entry.raw_result, separators=(",", ":")).encode("utf-8")
+    return _EXPIRES.pack(entry.expires_at.timestamp()) + zlib.compress(payload)
+
+
+def decode_entry(
+    video_id: str, prompt_version: str, model: str, value: bytes
+) -> CacheEntry:
+    (expires_at,) = _EXPIRES.unpack_from(value)
+    raw_result = json.loads(zlib.decompress(value[_EXPIRES.size :]))
+    return CacheEntry(
+        video_id=video_id,
+        prompt_version=prompt_version,
+        model=model,
+        raw_result=raw_result,
+        expires_at=datetime.fromtimestamp(expires_at, timezone.utc),
+    )
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Any server speaking the Redis protocol (Redis, Valkey, KeyDB, Dragonfly).
+    One key per (prompt_version, model, video_id); the server evicts entries
+    once they are past the stale grace period. Batch reads send their MGETs in
+    a single pipelined round trip. Server errors are logged and treated as
+    misses so a cache outage does not fail extractions.
+    """
+
+    name = "redis"
+    MGET_CHUNK = 500
+
+    def __init__(
+        self, client: redis.Redis, stale_grace: timedelta, key_prefix: str = "ext"
+    ):
+        self.client = client
+        self.stale_grace = stale_grace
+        self.key_prefix = key_prefix
+
+    def key(self, video_id: str, prompt_version: str, model: str) -> str:
+        return f"{self.key_prefix}:{prompt_version}:{model}:{video_id}"
+
+    async def get_many(
+        self,
+        video_ids: Sequence[str],
+        prompt_version: str,
+        models: Sequence[str],
+        valid_after: datetime,
+    ) -> Dict[str, CacheEntry]:
+        lookups = [(video_id, model) for video_id in video_ids for model in models]
+        if not lookups:
+            return {}
+        keys = [self.key(v, prompt_version, m) for v, m in lookups]
+
+        pipe = self.client.pipeline(transaction=False)
+        for start in range(0, len(keys), self.MGET_CHUNK):
+            pipe.mget(keys[start : start + self.MGET_CHUNK])
+        try:
+            replies = await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Redis cache read failed: {e}")
+            metrics.incr("cache.redis.errors")
+            return {}
+
+        values: List[Optional[bytes]] = [value for reply in replies for value in reply]
+        found: Dict[str, CacheEntry] = {}
+        for (video_id, model), value in zip(lookups, values):
+            if value is None:
+                continue
+            try:
+                entry = decode_entry(video_id, prompt_version, model, value)
+            except (struct.error, zlib.error, ValueError) as e:
+                logger.error(f"Corrupt Redis cache entry for {video_id}: {e}")
+                continue
+            if entry.expires_at > valid_after:
+                _newest(found, entry)
+        return found
+
+    async def save_many(self, entries: Sequence[CacheEntry]):
+        if not entries:
+            return
+        # All SETs in one pipelined round trip
+        pipe = self.client.pipeline(transaction=False)
+        for entry in entries:
+            pipe.set(
+                self.key(entry.video_id, entry.prompt_version, entry.model),
+                encode_entry(entry),
+                pxat=entry.expires_at + self.stale_grace,
+            )
+        try:
+            await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Redis cache write of {len(entries)} entries failed: {e}")
+            metrics.incr("cache.redis.errors")
+
+
+_redis_clients: Dict[str, redis.Redis] = {}
+
+
+def get_redis_client(url: str) -> redis.Redis:
+    """
+    One connection pool per URL for the whole process.
+    """
+    client = _redis_clients.get(url)
+    if client is None:
+        client = _redis_clients[url] = redis.from_url(url)
+    return client
+
+
+async def close_cache_backends():
+    for client in _redis_clients.values():
+        await client.aclose()
+    _redis_clients.clear()
+
+
+memory_cache_backend = MemoryCacheBackend(max_entries=settings.CACHE_MEMORY_MAX_ENTRIES)
+memory_content_cache_backend = MemoryCacheBackend(
+    max_entries=settings.CACHE_MEMORY_MAX_ENTRIES
+)
+
+
+def get_cache_backend(db: AsyncSession) -> CacheBackend:
+    """
+    The backend selected by CACHE_BACKEND (postgres, memory or redis).
+    """
+    if settings.CACHE_BACKEND == "memory":
+        return memory_cache_backend
+    if settings.CACHE_BACKEND == "redis":
+        return RedisCacheBackend(
+            get_redis_client(settings.CACHE_REDIS_URL),
+            stale_grace=timedelta(days=settings.CACHE_STALE_GRACE_DAYS),
+        )
+    return PostgresCacheBackend(db)
+
+
+def get_content_cache_backend(db: AsyncSession) -> CacheBackend:
+    """
+    Where content-hash entries live: the same kind of store as CACHE_BACKEND,
+    in a key space of their own.
+    """
+    if settings.CACHE_BACKEND == "memory":
+        return memory_content_cache_backend
+    if settings.CACHE_BACKEND == "redis":
+        return RedisCacheBackend(
+            get_redis_client(settings.CACHE_REDIS_URL),
+            stale_grace=timedelta(days=settings.CACHE_STALE_GRACE_DAYS),
+            key_prefix="content",
+        )
+    return PostgresContentCacheBackend(db)
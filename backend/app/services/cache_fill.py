@@ -0,0 +1,94 @@
+import asyncio
+from typing import Callable, Optional, Set
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.logger import logger
+from app.core.metrics import metrics
+from app.models.recipe import RecipeData
+from app.services.cache import CacheService
+
+
+class CacheFiller:
+    """
+    Takes over model calls whose requester went away mid-answer. The call has
+    already been paid for, so instead of cancelling it we let it finish and
+    save the result to the extraction cache for the next request, in a session
+    of our own (the request's is closed by then).
+
+    At most `max_pending` calls are finished this way; past that, abandoned
+    calls are cancelled like any other abandoned work.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        max_pending: int,
+        session_factory: Callable = AsyncSessionLocal,
+    ):
+        self.enabled = enabled
+        self.max_pending = max_pending
+        self.session_factory = session_factory
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    def adopt(
+        self,
+        video_id: str,
+        call: asyncio.Future,
+        transcript: str,
+        model: Callable[[], Optional[str]],
+    ) -> bool:
+        """
+        Finish `call` (an extraction of `transcript`) in the background and cache
+        its result under the model `model()` reports once it is done.
+        Returns False if the call was not taken over; the caller cancels it.
+        """
+        if not self.enabled or self.pending >= self.max_pending:
+            metrics.incr("extraction.handoff.dropped")
+            return False
+        task = asyncio.create_task(
+            self._fill(video_id, call, transcript, model),
+            name=f"cache-fill-{video_id}",
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        metrics.incr("extraction.handoff.adopted")
+        return True
+
+    async def _fill(
+        self,
+        video_id: str,
+        call: asyncio.Future,
+        transcript: str,
+        model: Callable[[], Optional[str]],
+    ):
+        try:
+            recipe_data: RecipeData = await call
+            async with self.session_factory() as db:
+                await CacheService(db).save_extraction(
+                    video_id, recipe_data, model=model(), transcript=transcript
+                )
+        except asyncio.CancelledError:
+            call.cancel()
+            raise
+        except Exception as e:
+            logger.warning(f"Cache fill of abandoned extraction {video_id} failed: {e}")
+            metrics.incr("extraction.handoff.failed")
+            return
+        metrics.incr("extraction.handoff.saved")
+
+    async def stop(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+
+cache_filler = CacheFiller(
+    enabled=settings.EXTRACTION_HANDOFF_ENABLED,
+    max_pending=settings.EXTRACTION_HANDOFF_MAX_PENDING,
+)
@@ -0,0 +1,234 @@
+import asyncio
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.logger import logger
+from app.core.metrics import metrics
+from app.models.db import ExtractionCache, ExtractionContentCache
+
+PARENT_TABLE = ExtractionCache.__tablename__
+_PARTITION_RE = re.compile(rf"^{PARENT_TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+# Upper bounds of the created_at age buckets reported by cache_table_stats
+AGE_BUCKETS: List[Tuple[str, timedelta]] = [
+    ("lt_1d", timedelta(days=1)),
+    ("lt_7d", timedelta(days=7)),
+    ("lt_30d", timedelta(days=30)),
+]
+
+
+def month_start(moment: datetime) -> datetime:
+    return moment.astimezone(timezone.utc).replace(
+        day=1, hour=0, minute=0, second=0, microsecond=0
+    )
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{PARENT_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[datetime]:
+    match = _PARTITION_RE.match(name)
+    if not match:
+        return None
+    return datetime(int(match[1]), int(match[2]), 1, tzinfo=timezone.utc)
+
+
+def create_partition_sql(month: datetime) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} "
+        f"PARTITION OF {PARENT_TABLE} "
+        f"FOR VALUES FROM ('{month.isoformat()}') "
+        f"TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+class CachePartitionManager:
+    """
+    Keeps the extraction_cache table partitioned by expires_at month:
+    creates partitions `months_ahead` months into the future, and drops whole
+    partitions once every row in them is past the stale grace period, instead
+    of deleting expired rows one by one. The (much smaller, unpartitioned)
+    extraction_content_cache is pruned by row on the same schedule.
+    """
+
+    def __init__(
+        self,
+        months_ahead: int,
+        retention: timedelta,
+        interval_seconds: float,
+        session_factory: Callable = AsyncSessionLocal,
+    ):
+        self.months_ahead = months_ahead
+        self.retention = retention
+        self.interval_seconds = interval_seconds
+        self.session_factory = session_factory
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(), name="cache-partitions")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.maintain()
+            except Exception as e:
+                logger.warning(f"extraction_cache partition maintenance failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    async def is_partitioned(self, db: AsyncSession) -> bool:
+        result = await db.execute(
+            text("SELECT relkind FROM pg_class WHERE relname = :name"),
+            {"name": PARENT_TABLE},
+        )
+        return result.scalar_one_or_none() == "p"
+
+    async def partitions(self, db: AsyncSession) -> List[str]:
+        result = await db.execute(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE parent.relname = :name ORDER BY child.relname"
+            ),
+            {"name": PARENT_TABLE},
+        )
+        return list(result.scalars().all())
+
+    async def maintain(self, now: Optional[datetime] = None) -> Dict[str, List[str]]:
+        """
+        Create missing future partitions and drop expired ones.
+        Returns the names of both.
+        """
+        now = now or datetime.now(timezone.utc)
+        created: List[str] = []
+        dropped: List[str] = []
+        async with self.session_factory() as db:
+            if not await self.is_partitioned(db):
+                # Tables created by create_all outside of migrations
+                logger.warning(f"{PARENT_TABLE} is not partitioned; run the migrations")
+                return {"created": created, "dropped": dropped}
+
+            existing = set(await self.partitions(db))
+            current = month_start(now)
+            for offset in range(self.months_ahead + 1):
+                month = add_months(current, offset)
+                if partition_name(month) not in existing:
+                    await db.execute(text(create_partition_sql(month)))
+                    created.append(partition_name(month))
+
+            # A partition's rows all expire before its upper bound
+            cutoff = now - self.retention
+            for name in sorted(existing):
+                month = partition_month(name)
+                if month is not None and add_months(month, 1) <= cutoff:
+                    await db.execute(text(f"DROP TABLE IF EXISTS {name}"))
+                    dropped.append(name)
+
+            pruned = await db.execute(
+                delete(ExtractionContentCache).where(
+                    ExtractionContentCache.expires_at <= cutoff
+                )
+            )
+
+            await db.commit()
+
+        metrics.incr("cache.partitions.created", len(created))
+        metrics.incr("cache.partitions.dropped", len(dropped))
+        metrics.incr("cache.content.pruned", pruned.rowcount)
+        if created or dropped:
+            logger.info(
+                f"{PARENT_TABLE} partitions created: {created}, dropped: {dropped}"
+            )
+        return {"created": created, "dropped": dropped}
+
+
+async def cache_table_stats(db: AsyncSession, stale_grace: timedelta) -> dict:
+    """
+    Row counts by freshness and created_at age, plus on-disk size per partition.
+    """
+    now = datetime.now(timezone.utc)
+    expires_at = ExtractionCache.expires_at
+    age_columns = [
+        func.count().filter(ExtractionCache.created_at > now - bound).label(label)
+        for label, bound in AGE_BUCKETS
+    ]
+    result = await db.execute(
+        select(
+            func.count().label("rows"),
+            func.count().filter(expires_at > now).label("live"),
+            func.count()
+            .filter(expires_at <= now, expires_at > now - stale_grace)
+            .label("stale"),
+            func.count().filter(expires_at <= now - stale_grace).label("expired"),
+            func.min(ExtractionCache.created_at).label("oldest_created_at"),
+            *age_columns,
+        )
+    )
+    row = result.one()
+
+    # Buckets are cumulative in SQL; report each range on its own
+    age: Dict[str, int] = {}
+    previous = 0
+    for label, _ in AGE_BUCKETS:
+        age[label] = row._mapping[label] - previous
+        previous = row._mapping[label]
+    age["older"] = row.rows - previous
+
+    sizes = await db.execute(
+        text(
+            "SELECT child.relname, pg_total_relation_size(child.oid), child.reltuples "
+            "FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = :name ORDER BY child.relname"
+        ),
+        {"name": PARENT_TABLE},
+    )
+    partitions = [
+        {"name": name, "bytes": size, "estimated_rows": max(int(tuples), 0)}
+        for name, size, tuples in sizes.all()
+    ]
+    if partitions:
+        total_bytes = sum(partition["bytes"] for partition in partitions)
+    else:
+        total = await db.execute(
+            text("SELECT pg_total_relation_size(:name)"), {"name": PARENT_TABLE}
+        )
+        total_bytes = total.scalar_one()
+
+    return {
+        "rows": row.rows,
+        "live": row.live,
+        "stale": row.stale,
+        "expired": row.expired,
+        "bytes": total_bytes,
+        "oldest_created_at": row.oldest_created_at,
+        "age_distribution": age,
+        "partitions": partitions,
+    }
+
+
+cache_partitions = CachePartitionManager(
+    months_ahead=settings.CACHE_PARTITION_MONTHS_AHEAD,
+    retention=timedelta(days=settings.CACHE_STALE_GRACE_DAYS),
+    interval_seconds=settings.CACHE_PARTITION_MAINTENANCE_INTERVAL_SECONDS,
+)
@@ -0,0 +1,190 @@
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Optional, Set
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.logger import logger
+from app.core.metrics import metrics
+from app.services.llm_limiter import gemini_limiter, openai_limiter
+
+
+class CacheRefresher:
+    """
+    Background re-extraction of extraction_cache entries.
+
+    - Stale entries served by get_cached_extraction are queued for refresh
+      (stale-while-revalidate).
+    - Every `interval_seconds`, the hottest videos (by in-process hit count) whose
+      entries expire within `ahead_seconds` are queued proactively.
+
+    Refreshes run one at a time, at most one per `min_interval_seconds`, and
+    only while no LLM limiter has user requests queued, so they never compete
+    with user traffic. Duplicate and overflow requests are dropped.
+    """
+
+    MAX_TRACKED_VIDEOS = 10000
+
+    def __init__(
+        self,
+        enabled: bool,
+        max_pending: int,
+        min_interval_seconds: float,
+        interval_seconds: float,
+        ahead_seconds: float,
+        hot_min_hits: int,
+        batch_size: int,
+        session_factory: Callable = AsyncSessionLocal,
+    ):
+        self.enabled = enabled
+        self.max_pending = max_pending
+        self.min_interval_seconds = min_interval_seconds
+        self.interval_seconds = interval_seconds
+        self.ahead_seconds = ahead_seconds
+        self.hot_min_hits = hot_min_hits
+        self.batch_size = batch_size
+        self.session_factory = session_factory
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: List[asyncio.Task] = []
+        self._pending: Set[str] = set()
+        self._hits: Counter = Counter()
+
+    def start(self):
+        if not self.enabled:
+            return
+        loop = asyncio.get_running_loop()
+        if self._tasks and self._loop is loop:
+            return
+        # Tasks are bound to the loop they were started on
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._pending.clear()
+        self._tasks = [
+            asyncio.create_task(self._worker(self._queue), name="cache-refresh"),
+            asyncio.create_task(self._scan_loop(), name="cache-refresh-scan"),
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._loop = None
+
+    def clear(self):
+        self._pending.clear()
+        self._hits.clear()
+
+    def record_hit(self, video_id: str):
+        self._hits[video_id] += 1
+        if len(self._hits) > self.MAX_TRACKED_VIDEOS:
+            self._hits = Counter(
+                dict(self._hits.most_common(self.MAX_TRACKED_VIDEOS // 2))
+            )
+
+    def schedule(self, video_id: str) -> bool:
+        """
+        Queue a refresh for a video; returns False if it was dropped.
+        """
+        if not self.enabled or video_id in self._pending:
+            return False
+        self.start()
+        try:
+            self._queue.put_nowait(video_id)
+        except asyncio.QueueFull:
+            metrics.incr("cache.refresh.dropped")
+            return False
+        self._pending.add(video_id)
+        metrics.incr("cache.refresh.scheduled")
+        return True
+
+    async def refresh_hot(self) -> int:
+        """
+        Queue hot videos whose entries expire within `ahead_seconds`.
+        Hit counts are halved on every scan so popularity fades over time.
+        """
+        hot = [
+            video_id
+            for video_id, hits in self._hits.most_common(self.batch_size)
+            if hits >= self.hot_min_hits
+        ]
+        self._hits = Counter({v: c // 2 for v, c in self._hits.items() if c > 1})
+        if not hot:
+            return 0
+
+        # Local import: the cache module imports this one
+        from app.services.cache import CacheService
+
+        now = datetime.now(timezone.utc)
+        horizon = now + timedelta(seconds=self.ahead_seconds)
+        async with self.session_factory() as db:
+            cache_service = CacheService(db)
+            entries = await cache_service.backend.get_many(
+                hot,
+                cache_service.PROMPT_VERSION,
+                cache_service.MODEL_VERSIONS,
+                valid_after=now - cache_service.STALE_GRACE,
+            )
+        due = [
+            video_id
+            for video_id, entry in entries.items()
+            if entry.expires_at < horizon
+        ]
+
+        return sum(self.schedule(video_id) for video_id in due)
+
+    async def _scan_loop(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                queued = await self.refresh_hot()
+                if queued:
+                    logger.info(f"Queued {queued} hot cache entries for refresh")
+            except Exception as e:
+                logger.warning(f"Hot cache scan failed: {e}")
+
+    async def _wait_for_idle_llm(self):
+        while any(limiter.busy for limiter in (gemini_limiter, openai_limiter)):
+            metrics.incr("cache.refresh.deferred")
+            await asyncio.sleep(self.min_interval_seconds)
+
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            video_id = await queue.get()
+            try:
+                await self._wait_for_idle_llm()
+                await self._refresh(video_id)
+                metrics.incr("cache.refresh.completed")
+            except Exception as e:
+                logger.warning(f"Cache refresh failed for {video_id}: {e}")
+                metrics.incr("cache.refresh.failed")
+            finally:
+                self._pending.discard(video_id)
+                queue.task_done()
+            # Pace refreshes
+            await asyncio.sleep(self.min_interval_seconds)
+
+    async def _refresh(self, video_id: str):
+        # Local import: extraction imports the cache module, which imports this one
+        from app.services.extraction import ExtractionService
+
+        async with self.session_factory() as db:
+            # Coalesces with a user-triggered extraction of the same video.
+            # Skips the content index: it holds the result being replaced
+            await ExtractionService(db, self.session_factory).generate_coalesced(
+                video_id, use_content_cache=False
+            )
+
+
+cache_refresher = CacheRefresher(
+    enabled=settings.CACHE_REFRESH_ENABLED,
+    max_pending=settings.CACHE_REFRESH_MAX_PENDING,
+    min_interval_seconds=settings.CACHE_REFRESH_MIN_INTERVAL_SECONDS,
+    interval_seconds=settings.CACHE_REFRESH_INTERVAL_SECONDS,
+    ahead_seconds=settings.CACHE_REFRESH_AHEAD_HOURS * 3600,
+    hot_min_hits=settings.CACHE_REFRESH_HOT_MIN_HITS,
+    batch_size=settings.CACHE_REFRESH_BATCH_SIZE,
+)
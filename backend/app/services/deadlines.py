@@ -0,0 +1,62 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from app.core.exceptions import ClientDisconnectedError, DeadlineExceededError
+from app.core.metrics import metrics
+
+T = TypeVar("T")
+
+
+def deadline_after(seconds: float) -> float:
+    """
+    A deadline `seconds` from now, as a time.monotonic() timestamp (the form
+    LLMLimiter.call takes).
+    """
+    return time.monotonic() + seconds
+
+
+def remaining(deadline: Optional[float]) -> Optional[float]:
+    """
+    Seconds left before `deadline` (never negative), or None without a deadline.
+    """
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+async def wait_until(aw: Awaitable[T], deadline: Optional[float], stage: str) -> T:
+    """
+    Await `aw`, cancelling it and raising DeadlineExceededError(stage) once
+    `deadline` passes.
+    """
+    if deadline is None:
+        return await aw
+    try:
+        return await asyncio.wait_for(aw, remaining(deadline))
+    except asyncio.TimeoutError:
+        raise DeadlineExceededError(stage)
+
+
+async def cancel_on_disconnect(
+    aw: Awaitable[T],
+    is_disconnected: Callable[[], Awaitable[bool]],
+    poll_seconds: float,
+) -> T:
+    """
+    Run `aw` while checking every `poll_seconds` that the client is still
+    there; if it left, cancel the work and raise ClientDisconnectedError.
+    """
+    task = asyncio.ensure_future(aw)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_seconds)
+            if done:
+                return task.result()
+            if await is_disconnected():
+                metrics.incr("extraction.client_disconnects")
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                raise ClientDisconnectedError()
+    finally:
+        task.cancel()
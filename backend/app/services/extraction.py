@@ -0,0 +1,311 @@
+import asyncio
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.exceptions import NoTranscriptError
+from app.models.db import Recipe as RecipeModel
+from app.models.recipe import RecipeData
+from app.schemas.recipe import Ingredient, RecipeCreate, Step
+from app.services.cache import CacheService
+from app.services.cache_fill import cache_filler
+from app.services.deadlines import wait_until
+from app.services.extraction_lease import extraction_lease, lease_key
+from app.services.extraction_progress import ProgressFanout, stage, tracking
+from app.services.gemini import GeminiService
+from app.services.negative_cache import negative_cache
+from app.services.singleflight import SingleFlight
+from app.services.transcript_executor import transcript_executor
+from app.services.transcript_store import TranscriptStore
+from app.services.youtube import YouTubeService
+
+# Concurrent misses for the same cache key share one transcript + Gemini call
+extraction_flights = SingleFlight("extraction.singleflight")
+# Progress of each in-flight extraction, by cache key, for all of its callers
+_flight_progress: Dict[str, ProgressFanout] = {}
+
+
+def thumbnail_url(video_id: str) -> str:
+    return f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg"
+
+
+def build_recipe_response(
+    recipe_data: RecipeData, video_url: str, video_id: str
+) -> RecipeCreate:
+    """
+    Map an extraction result (RecipeData) to the API schema (RecipeCreate).
+    """
+    return RecipeCreate(
+        title=recipe_data.title,
+        description=recipe_data.description,
+        video_url=video_url,
+        thumbnail_url=thumbnail_url(video_id),
+        servings=recipe_data.servings,
+        prep_time_minutes=recipe_data.prep_time_minutes,
+        cook_time_minutes=recipe_data.cook_time_minutes,
+        ingredients=[Ingredient(**i.model_dump()) for i in recipe_data.ingredients],
+        steps=[
+            Step(
+                step_number=s.step_number,
+                instruction=s.instruction,
+                duration_seconds=s.duration_seconds,
+            )
+            for s in recipe_data.instructions
+        ],  # Mapping instructions -> steps
+        dietary_tags=recipe_data.dietary_tags,
+    )
+
+
+def build_existing_recipe_response(
+    recipe: RecipeModel, video_url: str, video_id: str
+) -> RecipeCreate:
+    """
+    Map a saved recipe row to the API schema (RecipeCreate).
+    """
+    recipe_data_dict: dict[str, Any] = recipe.data
+    return RecipeCreate(
+        id=str(recipe.id),
+        is_public=recipe.is_public,
+        title=recipe_data_dict.get("title", "Unknown"),
+        description=recipe_data_dict.get("description"),
+        video_url=video_url,
+        thumbnail_url=thumbnail_url(video_id),
+        servings=recipe_data_dict.get("servings"),
+        prep_time_minutes=recipe_data_dict.get("prep_time_minutes"),
+        cook_time_minutes=recipe_data_dict.get("cook_time_minutes"),
+        ingredients=[
+            Ingredient(**i) if isinstance(i, dict) else i
+            for i in recipe_data_dict.get("ingredients", [])
+        ],
+        steps=[
+            Step(**s) if isinstance(s, dict) else s
+            for s in recipe_data_dict.get("instructions", [])
+        ],
+        dietary_tags=recipe_data_dict.get("dietary_tags", []),
+    )
+
+
+class ExtractionService:
+    """
+    The extraction pipeline shared by the synchronous endpoint and the job workers:
+    existing recipes, then the extraction cache, finally transcript + AI.
+    """
+
+    def __init__(self, db: AsyncSession, session_factory: Callable = AsyncSessionLocal):
+        self.db = db
+        self.session_factory = session_factory
+        self.cache_service = CacheService(db)
+
+    async def find_existing_recipe(
+        self, video_id: str, video_url: str
+    ) -> Optional[RecipeCreate]:
+        """
+        Check for an existing saved recipe for this video (instant result).
+        """
+        # Indexed equality match on the canonical video_id column
+        stmt = select(RecipeModel).where(RecipeModel.video_id == video_id).limit(1)
+        result = await self.db.execute(stmt)
+        existing_recipe = result.scalar_one_or_none()
+
+        if existing_recipe:
+            return build_existing_recipe_response(existing_recipe, video_url, video_id)
+        return None
+
+    async def get_cached(
+        self, video_id: str, allow_stale: bool = True
+    ) -> Optional[RecipeData]:
+        return await self.cache_service.get_cached_extraction(
+            video_id, allow_stale=allow_stale
+        )
+
+    def cache_key(self, video_id: str) -> tuple[str, str, str]:
+        return (
+            video_id,
+            self.cache_service.PROMPT_VERSION,
+            self.cache_service.MODEL_VERSION,
+        )
+
+    async def generate(
+        self,
+        video_id: str,
+        deadline: Optional[float] = None,
+        use_content_cache: bool = True,
+    ) -> RecipeData:
+        """
+        Generate an extraction, coordinating with other replicas through a lease:
+        the winner calls the model, the others pick its result up from the cache.
+        `deadline` is a time.monotonic() timestamp bounding the transcript fetch
+        and the model call. Refreshes pass `use_content_cache=False`: the content
+        index would hand them back the very result they are replacing.
+        """
+        if not settings.EXTRACTION_LEASE_ENABLED:
+            return await self._generate(video_id, deadline, use_content_cache)
+        return await extraction_lease.run(
+            lease_key(*self.cache_key(video_id)),
+            work=lambda: self._generate(video_id, deadline, use_content_cache),
+            # Only a fresh entry means the lease holder finished
+            check=lambda: self.get_cached(video_id, allow_stale=False),
+        )
+
+    async def generate_coalesced(
+        self,
+        video_id: str,
+        deadline: Optional[float] = None,
+        use_content_cache: bool = True,
+    ) -> RecipeData:
+        """
+        generate(), shared with concurrent callers for the same cache key.
+        The shared work outlives whichever caller started it, so it runs in a
+        session of its own rather than in that caller's, and without any
+        caller's deadline: each caller stops waiting at its own.
+        Its stage and partial events go to every tracked caller, including
+        those that join while it runs.
+        """
+        key = self.cache_key(video_id)
+        fanout = (
+            _flight_progress.get(key) if extraction_flights.in_flight(key) else None
+        )
+        if fanout is None:
+            fanout = _flight_progress[key] = ProgressFanout()
+
+        async def work() -> RecipeData:
+            # Not the progress of the caller that happened to start the work
+            with tracking(fanout):
+                async with self.session_factory() as db:
+                    service = ExtractionService(db, self.session_factory)
+                    return await service.generate(
+                        video_id, use_content_cache=use_content_cache
+                    )
+
+        try:
+            with fanout.subscribed():
+                return await wait_until(
+                    extraction_flights.do(key, work), deadline, "llm"
+                )
+        finally:
+            # The last caller out of a finished (or abandoned) flight
+            if not extraction_flights.in_flight(key) and (
+                _flight_progress.get(key) is fanout
+            ):
+                del _flight_progress[key]
+
+    async def get_transcript(
+        self, video_id: str, deadline: Optional[float] = None
+    ) -> str:
+        """
+        Stored transcript if we have one, otherwise fetch it from YouTube and store it.
+        """
+        with stage("transcript") as info:
+            transcript_store = TranscriptStore(self.db)
+            transcript = await transcript_store.get(video_id)
+            if transcript is not None:
+                info["source"] = "store"
+                return transcript
+
+            # yt-dlp is blocking, so it runs on the bounded transcript executor
+            info["source"] = "youtube"
+            try:
+                transcript = await transcript_executor.fetch(video_id, deadline)
+            except NoTranscriptError as e:
+                negative_cache.record(video_id, transient=e.transient)
+                raise
+            negative_cache.forget(video_id)
+
+            await transcript_store.save(video_id, transcript)
+            return transcript
+
+    async def _generate(
+        self,
+        video_id: str,
+        deadline: Optional[float] = None,
+        use_content_cache: bool = True,
+    ) -> RecipeData:
+        """
+        Get the transcript, run the AI extraction and store the result in cache.
+        An identical transcript extracted before (re-upload, mirror channel)
+        reuses that result instead of calling the model.
+        """
+        transcript = await self.get_transcript(video_id, deadline)
+
+        same_content = None
+        if use_content_cache:
+            with stage("content_check") as info:
+                same_content = await self.cache_service.get_cached_by_content(
+                    transcript
+                )
+                info["hit"] = same_content is not None
+        if same_content is not None:
+            recipe_data, model = same_content
+            with stage("save"):
+                await self.cache_service.save_extraction(
+                    video_id, recipe_data, model=model
+                )
+            return recipe_data
+
+        # Give the connection back to the pool while the model answers
+        await self.db.commit()
+
+        extractor = GeminiService()
+        with stage("llm") as info:
+            call = asyncio.ensure_future(
+                extractor.extract_recipe(transcript, video_id, deadline)
+            )
+            try:
+                recipe_data = await asyncio.shield(call)
+            except asyncio.CancelledError:
+                # The last waiter is gone, but the answer is already being paid
+                # for: finish it for the cache if we can, otherwise stop it
+                if not cache_filler.adopt(
+                    video_id, call, transcript, lambda: extractor.answered_by
+                ):
+                    call.cancel()
+                raise
+            info["model"] = extractor.answered_by
+
+        with stage("save"):
+            await self.cache_service.save_extraction(
+                video_id,
+                recipe_data,
+                model=extractor.answered_by,
+                transcript=transcript,
+            )
+        return recipe_data
+
+    async def extract(
+        self, video_id: str, deadline: Optional[float] = None
+    ) -> RecipeData:
+        """
+        Return the cached extraction for a video or generate a fresh one.
+        Concurrent misses for the same key are coalesced into a single generation.
+        """
+        with stage("cache_check") as info:
+            cached_recipe = await self.get_cached(video_id)
+            info["hit"] = cached_recipe is not None
+        if cached_recipe:
+            return cached_recipe
+        # Generation runs in a session of its own: don't sit on this one's
+        # connection for the length of a model call
+        await self.db.commit()
+        return await self.generate_coalesced(video_id, deadline)
+
+    async def run(
+        self, video_url: str, deadline: Optional[float] = None
+    ) -> RecipeCreate:
+        """
+        Full pipeline for a YouTube URL, returning the API response schema.
+        """
+        video_id = YouTubeService.extract_video_id(video_url)
+        # Videos known to have no transcript are rejected before any I/O
+        negative_cache.check(video_id)
+
+        with stage("existing_recipe") as info:
+            existing = await self.find_existing_recipe(video_id, video_url)
+            info["hit"] = existing is not None
+        if existing:
+            return existing
+
+        recipe_data = await self.extract(video_id, deadline)
+        return build_recipe_response(recipe_data, video_url, video_id)
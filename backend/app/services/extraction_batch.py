@@ -0,0 +1,111 @@
+import asyncio
+from typing import AsyncIterator, Callable, Dict, List
+
+from app.core.database import AsyncSessionLocal
+from app.core.exceptions import (
+    LLMOverloadedError,
+    NoTranscriptError,
+    TranscriptFetchBusyError,
+)
+from app.core.logger import logger
+from app.core.metrics import metrics
+from app.schemas.recipe import BatchExtractionResult
+from app.services.cache import CacheService
+from app.services.extraction import ExtractionService, build_recipe_response
+from app.services.negative_cache import negative_cache
+from app.services.youtube import YouTubeService
+
+
+class BatchExtractor:
+    """
+    Extracts a list of URLs and yields one result per unique video as soon as it
+    is ready: invalid URLs and cache hits first, then misses as they complete
+    through a bounded-concurrency pipeline.
+    """
+
+    def __init__(self, concurrency: int, session_factory: Callable = AsyncSessionLocal):
+        self.concurrency = concurrency
+        self.session_factory = session_factory
+
+    async def run(self, video_urls: List[str]) -> AsyncIterator[BatchExtractionResult]:
+        # Validate and de-duplicate by video_id (first URL wins)
+        videos: Dict[str, str] = {}
+        for video_url in video_urls:
+            try:
+                video_id = YouTubeService.extract_video_id(video_url)
+            except ValueError as e:
+                yield BatchExtractionResult(
+                    video_url=video_url, status="error", error=str(e)
+                )
+                continue
+            videos.setdefault(video_id, video_url)
+
+        misses = []
+        async with self.session_factory() as db:
+            cached = await CacheService(db).get_cached_extractions(list(videos))
+        for video_id, video_url in videos.items():
+            if video_id in cached:
+                yield self._ok(video_id, video_url, cached[video_id], "cache")
+                continue
+            try:
+                negative_cache.check(video_id)
+            except NoTranscriptError as e:
+                yield self._error(video_id, video_url, e.message, "NO_TRANSCRIPT")
+                continue
+            misses.append(video_id)
+
+        metrics.incr("extraction.batch.cache_hits", len(cached))
+        metrics.incr("extraction.batch.misses", len(misses))
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = [
+            asyncio.create_task(self._extract(semaphore, video_id, videos[video_id]))
+            for video_id in misses
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Client went away: stop the work nobody will read
+            for task in tasks:
+                task.cancel()
+
+    async def _extract(
+        self, semaphore: asyncio.Semaphore, video_id: str, video_url: str
+    ) -> BatchExtractionResult:
+        async with semaphore:
+            try:
+                async with self.session_factory() as db:
+                    recipe_data = await ExtractionService(
+                        db, self.session_factory
+                    ).extract(video_id)
+                return self._ok(video_id, video_url, recipe_data, "extracted")
+            except NoTranscriptError as e:
+                return self._error(video_id, video_url, e.message, "NO_TRANSCRIPT")
+            except TranscriptFetchBusyError as e:
+                return self._error(video_id, video_url, e.message, "TRANSCRIPT_BUSY")
+            except LLMOverloadedError as e:
+                return self._error(video_id, video_url, e.message, "LLM_BUSY")
+            except Exception as e:
+                logger.error(f"Batch extraction failed for {video_id}: {e}")
+                return self._error(video_id, video_url, str(e))
+
+    @staticmethod
+    def _ok(video_id, video_url, recipe_data, source) -> BatchExtractionResult:
+        return BatchExtractionResult(
+            video_url=video_url,
+            video_id=video_id,
+            status="ok",
+            source=source,
+            recipe=build_recipe_response(recipe_data, video_url, video_id),
+        )
+
+    @staticmethod
+    def _error(video_id, video_url, error, code=None) -> BatchExtractionResult:
+        return BatchExtractionResult(
+            video_url=video_url,
+            video_id=video_id,
+            status="error",
+            error=error,
+            error_code=code,
+        )
@@ -0,0 +1,405 @@
+import asyncio
+import time
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import delete, or_, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.exceptions import (
+    ExtractionQueueFullError,
+    LLMOverloadedError,
+    NoTranscriptError,
+    TranscriptFetchBusyError,
+)
+from app.core.logger import logger
+from app.core.metrics import metrics
+from app.models.db import ExtractionJobRecord
+from app.schemas.recipe import ExtractionJobResponse, RecipeCreate
+from app.services.extraction import ExtractionService, build_recipe_response
+from app.services.extraction_progress import StageTimings, timing
+
+
+class JobStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class ExtractionJob:
+    def __init__(self, video_id: str, video_url: str):
+        self.id = uuid.uuid4().hex
+        self.video_id = video_id
+        self.video_url = video_url
+        self.status = JobStatus.PENDING
+        self.result: Optional[RecipeCreate] = None
+        self.error: Optional[str] = None
+        self.error_code: Optional[str] = None
+        self.created_at = datetime.now(timezone.utc)
+        self.finished_at: Optional[datetime] = None
+        self.done = asyncio.Event()
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (JobStatus.COMPLETED, JobStatus.FAILED)
+
+    def complete(self, result: RecipeCreate):
+        self.status = JobStatus.COMPLETED
+        self.result = result
+        self._finish()
+
+    def fail(self, error: str, code: Optional[str] = None):
+        self.status = JobStatus.FAILED
+        self.error = error
+        self.error_code = code
+        self._finish()
+
+    def _finish(self):
+        self.finished_at = datetime.now(timezone.utc)
+        self.done.set()
+
+    def to_response(self) -> ExtractionJobResponse:
+        return ExtractionJobResponse(
+            job_id=self.id,
+            status=self.status.value,
+            video_url=self.video_url,
+            result=self.result,
+            error=self.error,
+            error_code=self.error_code,
+            created_at=self.created_at,
+            finished_at=self.finished_at,
+        )
+
+
+class JobStore(ABC):
+    """
+    Where job state lives, so that polls can be answered by any process.
+    """
+
+    name: str
+
+    @abstractmethod
+    async def save(self, job: ExtractionJob):
+        """Insert or update the job's state."""
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[ExtractionJob]:
+        pass
+
+    @abstractmethod
+    async def prune(self, finished_before: datetime, created_before: datetime):
+        """
+        Drop jobs finished before `finished_before`, and unfinished jobs created
+        before `created_before` (their process went away without finishing them).
+        """
+
+
+class PostgresJobStore(JobStore):
+    """
+    The extraction_jobs table, shared by every replica. Each call uses a short
+    session of its own.
+    """
+
+    name = "postgres"
+
+    def __init__(self, session_factory: Callable = AsyncSessionLocal):
+        self.session_factory = session_factory
+
+    async def save(self, job: ExtractionJob):
+        values = {
+            "id": job.id,
+            "video_id": job.video_id,
+            "video_url": job.video_url,
+            "status": job.status.value,
+            "result": job.result.model_dump(mode="json") if job.result else None,
+            "error": job.error,
+            "error_code": job.error_code,
+            "created_at": job.created_at,
+            "finished_at": job.finished_at,
+        }
+        stmt = insert(ExtractionJobRecord).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ExtractionJobRecord.id],
+            set_={
+                key: stmt.excluded[key]
+                for key in ("status", "result", "error", "error_code", "finished_at")
+            },
+        )
+        async with self.session_factory() as db:
+            await db.execute(stmt)
+            await db.commit()
+
+    async def get(self, job_id: str) -> Optional[ExtractionJob]:
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(ExtractionJobRecord).where(ExtractionJobRecord.id == job_id)
+            )
+            row = result.scalar_one_or_none()
+        return self._job(row) if row is not None else None
+
+    @staticmethod
+    def _job(row: ExtractionJobRecord) -> ExtractionJob:
+        job = ExtractionJob(row.video_id, row.video_url)
+        job.id = row.id
+        job.status = JobStatus(row.status)
+        job.result = RecipeCreate.model_validate(row.result) if row.result else None
+        job.error = row.error
+        job.error_code = row.error_code
+        job.created_at = row.created_at
+        job.finished_at = row.finished_at
+        if job.is_finished:
+            job.done.set()
+        return job
+
+    async def prune(self, finished_before: datetime, created_before: datetime):
+        async with self.session_factory() as db:
+            await db.execute(
+                delete(ExtractionJobRecord).where(
+                    or_(
+                        ExtractionJobRecord.finished_at < finished_before,
+                        ExtractionJobRecord.created_at < created_before,
+                    )
+                )
+            )
+            await db.commit()
+
+
+class MemoryJobStore(JobStore):
+    """
+    Process-local job state, for development and tests. Only valid with a
+    single backend process: a poll routed to another process gets a 404.
+    """
+
+    name = "memory"
+
+    def __init__(self):
+        self._jobs: Dict[str, ExtractionJob] = {}
+
+    def clear(self):
+        self._jobs.clear()
+
+    async def save(self, job: ExtractionJob):
+        self._jobs[job.id] = job
+
+    async def get(self, job_id: str) -> Optional[ExtractionJob]:
+        return self._jobs.get(job_id)
+
+    async def prune(self, finished_before: datetime, created_before: datetime):
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if (job.finished_at is not None and job.finished_at < finished_before)
+            or job.created_at < created_before
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+def get_job_store() -> JobStore:
+    """
+    The store selected by EXTRACTION_JOB_STORE (postgres or memory).
+    """
+    if settings.EXTRACTION_JOB_STORE == "memory":
+        return MemoryJobStore()
+    return PostgresJobStore()
+
+
+class ExtractionJobQueue:
+    """
+    Extraction job queue.
+    The API enqueues jobs and returns immediately; a bounded pool of workers in
+    this process runs the transcript -> Gemini -> cache pipeline. Job state is
+    written to `store`, so clients can poll any replica for the result; a
+    long-poll for a job running elsewhere re-reads the store every
+    `poll_seconds`.
+
+    Jobs queued or running when the process stops are marked failed
+    (INTERRUPTED) so their clients can resubmit; if the process dies instead,
+    they stay pending until pruned, `UNFINISHED_TTL` after creation.
+    """
+
+    UNFINISHED_TTL = timedelta(days=1)
+    # Pruning hits the store: at most this often
+    PRUNE_INTERVAL_SECONDS = 60
+
+    def __init__(
+        self,
+        max_depth: int,
+        concurrency: int,
+        result_ttl_seconds: int,
+        store: JobStore,
+        poll_seconds: float,
+        session_factory: Callable = AsyncSessionLocal,
+    ):
+        self.max_depth = max_depth
+        self.concurrency = concurrency
+        self.result_ttl_seconds = result_ttl_seconds
+        self.store = store
+        self.poll_seconds = poll_seconds
+        self.session_factory = session_factory
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._workers: List[asyncio.Task] = []
+        # Jobs queued or running in this process
+        self._local: Dict[str, ExtractionJob] = {}
+        self._last_prune: Optional[float] = None
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        if self._workers and self._loop is loop:
+            return
+        # Workers are bound to the loop they were started on
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_depth)
+        self._workers = [
+            asyncio.create_task(
+                self._worker(self._queue), name=f"extraction-worker-{i}"
+            )
+            for i in range(self.concurrency)
+        ]
+        logger.info(f"Started {self.concurrency} extraction workers")
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        self._loop = None
+        # Nobody will run these now: tell their clients rather than leave them
+        # polling a pending job
+        for job in list(self._local.values()):
+            job.fail("The server restarted; please resubmit.", code="INTERRUPTED")
+            await self._save(job)
+        self._local.clear()
+
+    async def submit(self, video_id: str, video_url: str) -> ExtractionJob:
+        """
+        Enqueue an extraction job. Raises ExtractionQueueFullError when at capacity.
+        """
+        self.start()
+        await self._prune()
+
+        if self._queue.full():
+            raise ExtractionQueueFullError(self.max_depth)
+        job = ExtractionJob(video_id, video_url)
+        # Stored before it is queued, so a worker's update can't be overwritten
+        await self.store.save(job)
+        self._local[job.id] = job
+        self._queue.put_nowait(job)
+        return job
+
+    async def add_completed(
+        self, video_id: str, video_url: str, result: RecipeCreate
+    ) -> ExtractionJob:
+        """
+        Register a job that was answered without queueing (existing recipe/cache hit).
+        """
+        await self._prune()
+        job = ExtractionJob(video_id, video_url)
+        job.complete(result)
+        await self.store.save(job)
+        return job
+
+    async def get(self, job_id: str) -> Optional[ExtractionJob]:
+        job = self._local.get(job_id)
+        if job is not None:
+            return job
+        return await self.store.get(job_id)
+
+    async def wait(self, job: ExtractionJob, timeout: float) -> ExtractionJob:
+        """
+        Long-poll: wait up to `timeout` seconds for the job to finish.
+        """
+        if timeout <= 0 or job.is_finished:
+            return job
+        local = self._local.get(job.id)
+        if local is not None:
+            try:
+                await asyncio.wait_for(local.done.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            return local
+
+        # Running in another process: watch the store
+        deadline = time.monotonic() + timeout
+        while not job.is_finished and time.monotonic() < deadline:
+            await asyncio.sleep(min(self.poll_seconds, deadline - time.monotonic()))
+            job = await self.store.get(job.id) or job
+        return job
+
+    async def _prune(self):
+        now = time.monotonic()
+        if (
+            self._last_prune is not None
+            and now - self._last_prune < self.PRUNE_INTERVAL_SECONDS
+        ):
+            return
+        self._last_prune = now
+        current = datetime.now(timezone.utc)
+        try:
+            await self.store.prune(
+                finished_before=current - timedelta(seconds=self.result_ttl_seconds),
+                created_before=current - self.UNFINISHED_TTL,
+            )
+        except Exception as e:
+            logger.warning(f"Pruning extraction jobs failed: {e}")
+
+    async def _save(self, job: ExtractionJob):
+        # A lost state update must not take the worker down with it
+        try:
+            await self.store.save(job)
+        except Exception as e:
+            logger.error(f"Saving extraction job {job.id} failed: {e}")
+            metrics.incr("extraction.jobs.save_failed")
+
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            job: ExtractionJob = await queue.get()
+            try:
+                await self._run(job)
+                self._local.pop(job.id, None)
+            finally:
+                queue.task_done()
+
+    async def _run(self, job: ExtractionJob):
+        job.status = JobStatus.RUNNING
+        await self._save(job)
+        try:
+            with timing(StageTimings(), route="extraction job", video_id=job.video_id):
+                async with self.session_factory() as db:
+                    recipe_data = await ExtractionService(
+                        db, self.session_factory
+                    ).extract(job.video_id)
+            job.complete(
+                build_recipe_response(recipe_data, job.video_url, job.video_id)
+            )
+        except NoTranscriptError as e:
+            job.fail(e.message, code="NO_TRANSCRIPT")
+        except TranscriptFetchBusyError as e:
+            job.fail(e.message, code="TRANSCRIPT_BUSY")
+        except LLMOverloadedError as e:
+            job.fail(e.message, code="LLM_BUSY")
+        except Exception as e:
+            logger.error(f"Extraction job {job.id} failed: {e}")
+            job.fail(str(e))
+        await self._save(job)
+
+
+extraction_jobs = ExtractionJobQueue(
+    max_depth=settings.EXTRACTION_QUEUE_MAX_DEPTH,
+    concurrency=settings.EXTRACTION_WORKER_CONCURRENCY,
+    result_ttl_seconds=settings.EXTRACTION_JOB_TTL_SECONDS,
+    store=get_job_store(),
+    poll_seconds=settings.EXTRACTION_JOB_POLL_SECONDS,
+)
@@ -0,0 +1,144 @@
+import asyncio
+import hashlib
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Optional, TypeVar
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.metrics import metrics
+
+T = TypeVar("T")
+
+
+def lease_key(*parts: str) -> int:
+    """
+    Map a cache key to the signed 64-bit integer Postgres advisory locks use.
+    """
+    digest = hashlib.blake2b("|".join(parts).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+class ExtractionLease:
+    """
+    Cross-replica lease on an extraction cache key, backed by Postgres
+    transaction-level advisory locks (pg_try_advisory_xact_lock).
+
+    The holder keeps a transaction open for the duration of the work and
+    `idle_in_transaction_session_timeout` bounds it: if the holder stalls or dies,
+    Postgres ends its session and the lock is released, so leases never stick.
+    If the database is unreachable, or no lease connection frees up within the
+    pool timeout, the lease fails open and work proceeds.
+
+    Holders use their own engine, so a connection held for a whole extraction
+    never comes out of the pool that serves requests.
+    """
+
+    def __init__(
+        self,
+        db_engine: AsyncEngine,
+        ttl_seconds: float,
+        wait_seconds: float,
+        poll_seconds: float,
+    ):
+        self.engine = db_engine
+        self.ttl_seconds = ttl_seconds
+        self.wait_seconds = wait_seconds
+        self.poll_seconds = poll_seconds
+
+    @asynccontextmanager
+    async def hold(self, key: int) -> AsyncIterator[bool]:
+        """
+        Try to take the lease; yields whether it was acquired.
+        """
+        conn = None
+        try:
+            conn = await self.engine.connect()
+            trans = await conn.begin()
+            ttl_ms = int(self.ttl_seconds * 1000)
+            await conn.execute(
+                text(f"SET LOCAL idle_in_transaction_session_timeout = {ttl_ms}")
+            )
+            result = await conn.execute(
+                text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": key}
+            )
+            acquired = bool(result.scalar())
+        except Exception as e:
+            logger.warning(f"Extraction lease unavailable, continuing without: {e}")
+            metrics.incr("extraction.lease.unavailable")
+            conn = await self._close(conn)
+
+        if conn is None:
+            yield True
+            return
+
+        try:
+            yield acquired
+        finally:
+            try:
+                # Ending the transaction releases the advisory lock
+                await trans.commit()
+            except Exception as e:
+                # The session was terminated by the timeout: the lock is gone too
+                logger.warning(f"Extraction lease ended abnormally: {e}")
+            await self._close(conn)
+
+    async def _close(self, conn) -> None:
+        if conn is not None:
+            try:
+                await conn.close()
+            except Exception:
+                pass
+        return None
+
+    async def run(
+        self,
+        key: int,
+        work: Callable[[], Awaitable[T]],
+        check: Callable[[], Awaitable[Optional[T]]],
+    ) -> T:
+        """
+        Run `work` under the lease. Replicas that lose the race poll `check`
+        (the shared cache) until the winner's result shows up. After
+        `wait_seconds` without a result they stop waiting and run `work` anyway.
+        """
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            async with self.hold(key) as acquired:
+                if acquired:
+                    # Another replica may have finished just before we got here
+                    result = await check()
+                    if result is not None:
+                        metrics.incr("extraction.lease.cache_after_wait")
+                        return result
+                    metrics.incr("extraction.lease.acquired")
+                    return await work()
+
+            metrics.incr("extraction.lease.waits")
+            await asyncio.sleep(self.poll_seconds)
+
+            result = await check()
+            if result is not None:
+                metrics.incr("extraction.lease.cache_after_wait")
+                return result
+
+            if time.monotonic() >= deadline:
+                logger.warning(f"Gave up waiting for extraction lease {key}")
+                metrics.incr("extraction.lease.wait_timeouts")
+                return await work()
+
+
+extraction_lease = ExtractionLease(
+    create_async_engine(
+        settings.DATABASE_URL,
+        pool_size=settings.EXTRACTION_LEASE_POOL_SIZE,
+        max_overflow=0,
+        pool_timeout=settings.EXTRACTION_LEASE_POOL_TIMEOUT_SECONDS,
+    ),
+    ttl_seconds=settings.EXTRACTION_LEASE_TTL_SECONDS,
+    wait_seconds=settings.EXTRACTION_LEASE_WAIT_SECONDS,
+    poll_seconds=settings.EXTRACTION_LEASE_POLL_SECONDS,
+)
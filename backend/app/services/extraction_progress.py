@@ -0,0 +1,299 @@
+import asyncio
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Union
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.exceptions import (
+    DeadlineExceededError,
+    LLMOverloadedError,
+    NoTranscriptError,
+    TranscriptFetchBusyError,
+)
+from app.core.logger import logger
+from app.core.metrics import metrics
+from app.services.deadlines import deadline_after
+
+
+class ExtractionProgress:
+    """
+    Events of one extraction, in order, for a streaming client:
+    - `stage`: {"stage", "status": started|done|failed|cancelled, "elapsed_ms", ...}
+    - `partial`: the recipe fields generated so far
+    - `result` / `error`: the final outcome, after which the stream ends
+    """
+
+    wants_partials = True
+
+    def __init__(self):
+        self._events: asyncio.Queue = asyncio.Queue()
+        self._last_partial: Optional[dict] = None
+
+    def emit(self, event: str, data: dict):
+        self._events.put_nowait((event, data))
+
+    def partial(self, recipe: dict):
+        # Chunks that don't change the parsed fields aren't worth a round trip
+        if recipe != self._last_partial:
+            self._last_partial = recipe
+            self.emit("partial", recipe)
+
+    def close(self):
+        self._events.put_nowait(None)
+
+    async def events(self) -> AsyncIterator[str]:
+        """
+        Server-Sent Events encoding of the events until close().
+        """
+        while (item := await self._events.get()) is not None:
+            event, data = item
+            yield f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class ProgressFanout:
+    """
+    Progress of an extraction shared by several callers (a coalesced
+    generate), forwarded to the ExtractionProgress of each subscribed caller.
+    A caller subscribing late is first sent the stage events so far and the
+    latest partial, so it sees which stages are done and which are running.
+    """
+
+    def __init__(self):
+        self._subscribers: List[ExtractionProgress] = []
+        self._stages: List[dict] = []
+        self._last_partial: Optional[dict] = None
+
+    @property
+    def wants_partials(self) -> bool:
+        # Only stream the model's answer while someone is watching
+        return bool(self._subscribers)
+
+    def emit(self, event: str, data: dict):
+        if event == "stage":
+            self._stages.append(data)
+        for progress in self._subscribers:
+            progress.emit(event, data)
+
+    def partial(self, recipe: dict):
+        if recipe != self._last_partial:
+            self._last_partial = recipe
+            for progress in self._subscribers:
+                progress.partial(recipe)
+
+    @contextmanager
+    def subscribed(self) -> Iterator[None]:
+        """
+        Forward the events to the caller's progress, if it is tracked, while in
+        this context.
+        """
+        progress = _progress.get()
+        if progress is None or progress is self:
+            yield
+            return
+        for data in self._stages:
+            progress.emit("stage", data)
+        if self._last_partial is not None:
+            progress.partial(self._last_partial)
+        self._subscribers.append(progress)
+        try:
+            yield
+        finally:
+            self._subscribers.remove(progress)
+
+
+class StageTimings:
+    """
+    Wall-clock durations (ms) of the pipeline stages run for one request, in
+    the order they ran; a stage that runs more than once is summed. The total
+    also covers time outside of stages (e.g. waiting on a coalesced
+    extraction).
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.stages: Dict[str, float] = {}
+
+    def record(self, name: str, elapsed_ms: float):
+        self.stages[name] = round(self.stages.get(name, 0.0) + elapsed_ms, 1)
+
+    @property
+    def total_ms(self) -> float:
+        return round((time.monotonic() - self.started) * 1000, 1)
+
+    def server_timing(self) -> str:
+        """
+        Server-Timing header value: `existing_recipe;dur=1.2, ..., total;dur=9.8`
+        """
+        entries = [f"{name};dur={ms}" for name, ms in self.stages.items()]
+        entries.append(f"total;dur={self.total_ms}")
+        return ", ".join(entries)
+
+    def log_props(self) -> Dict[str, float]:
+        # Flat fields, one per stage, so per-stage percentiles are easy to query
+        props = {f"{name}_ms": ms for name, ms in self.stages.items()}
+        props["total_ms"] = self.total_ms
+        return props
+
+
+_progress: ContextVar[Optional[Union[ExtractionProgress, ProgressFanout]]] = ContextVar(
+    "extraction_progress", default=None
+)
+_timings: ContextVar[Optional[StageTimings]] = ContextVar(
+    "extraction_timings", default=None
+)
+_partials: ContextVar[bool] = ContextVar("extraction_partials", default=True)
+
+
+@contextmanager
+def tracking(
+    progress: Union[ExtractionProgress, ProgressFanout]
+) -> Iterator[Union[ExtractionProgress, ProgressFanout]]:
+    """
+    Report the stages of the extraction run in this context to `progress`.
+    """
+    token = _progress.set(progress)
+    try:
+        yield progress
+    finally:
+        _progress.reset(token)
+
+
+@contextmanager
+def timing(timings: StageTimings, **props) -> Iterator[StageTimings]:
+    """
+    Record the stages run in this context into `timings`, then log them as
+    structured fields (`<stage>_ms`, `total_ms`) with `props` and the outcome
+    ("ok" or the exception's class name).
+    """
+    token = _timings.set(timings)
+    outcome = "ok"
+    try:
+        yield timings
+    except BaseException as e:
+        outcome = type(e).__name__
+        raise
+    finally:
+        _timings.reset(token)
+        logger.info(
+            "Extraction stage timings",
+            extra={"props": {**props, "outcome": outcome, **timings.log_props()}},
+        )
+
+
+@contextmanager
+def stage(name: str) -> Iterator[Dict[str, object]]:
+    """
+    Report a pipeline stage as started, then done (or failed / cancelled) with
+    its duration. Keys added to the yielded dict are sent with the final event.
+    The duration is also recorded into the current timing(), if any.
+    Cancellations and deadline expiries are counted per stage
+    (`extraction.cancelled.<stage>`, `extraction.deadline_exceeded.<stage>`)
+    whether or not the stage is tracked.
+    """
+    progress = _progress.get()
+    info: Dict[str, object] = {}
+    if progress is not None:
+        progress.emit("stage", {"stage": name, "status": "started"})
+    started = time.monotonic()
+    status = "failed"
+    try:
+        yield info
+        status = "done"
+    except asyncio.CancelledError:
+        status = "cancelled"
+        metrics.incr(f"extraction.cancelled.{name}")
+        raise
+    except DeadlineExceededError:
+        metrics.incr(f"extraction.deadline_exceeded.{name}")
+        raise
+    finally:
+        elapsed_ms = round((time.monotonic() - started) * 1000, 1)
+        timings = _timings.get()
+        if timings is not None:
+            timings.record(name, elapsed_ms)
+        if progress is not None:
+            progress.emit(
+                "stage",
+                {"stage": name, "status": status, "elapsed_ms": elapsed_ms, **info},
+            )
+
+
+@contextmanager
+def without_partials():
+    """
+    Calls in this context don't stream partial recipes (e.g. parallel chunk
+    extractions, whose partial outputs would interleave).
+    """
+    token = _partials.set(False)
+    try:
+        yield
+    finally:
+        _partials.reset(token)
+
+
+def wants_partials() -> bool:
+    progress = _progress.get()
+    return progress is not None and progress.wants_partials and _partials.get()
+
+
+def report_partial(recipe: Optional[dict]):
+    progress = _progress.get()
+    if progress is not None and recipe:
+        progress.partial(recipe)
+
+
+async def stream_extraction(
+    video_url: str, session_factory: Callable = AsyncSessionLocal
+) -> AsyncIterator[str]:
+    """
+    Run the extraction pipeline for a URL and yield its progress as SSE.
+    The pipeline runs in its own task and session (the stream outlives the
+    request's dependencies), under the EXTRACTION_DEADLINE_SECONDS deadline,
+    and is cancelled if the client goes away.
+    """
+    # Local import: the extraction pipeline reports through this module
+    from app.services.extraction import ExtractionService
+
+    progress = ExtractionProgress()
+    deadline = deadline_after(settings.EXTRACTION_DEADLINE_SECONDS)
+
+    async def run():
+        with tracking(progress):
+            try:
+                with timing(
+                    StageTimings(), route="GET /extract/stream", video_url=video_url
+                ):
+                    async with session_factory() as db:
+                        result = await ExtractionService(db, session_factory).run(
+                            video_url, deadline=deadline
+                        )
+                progress.emit("result", result.model_dump(mode="json"))
+            except ValueError as e:
+                progress.emit("error", {"detail": str(e), "code": "INVALID_REQUEST"})
+            except NoTranscriptError as e:
+                progress.emit("error", {"detail": e.message, "code": "NO_TRANSCRIPT"})
+            except TranscriptFetchBusyError as e:
+                progress.emit("error", {"detail": e.message, "code": "TRANSCRIPT_BUSY"})
+            except LLMOverloadedError as e:
+                progress.emit("error", {"detail": e.message, "code": "LLM_BUSY"})
+            except DeadlineExceededError as e:
+                progress.emit(
+                    "error", {"detail": e.message, "code": "DEADLINE_EXCEEDED"}
+                )
+            except Exception as e:
+                logger.error(f"Streamed extraction failed for {video_url}: {e}")
+                progress.emit("error", {"detail": str(e), "code": None})
+            finally:
+                progress.close()
+
+    metrics.incr("extraction.stream.started")
+    task = asyncio.create_task(run())
+    try:
+        async for event in progress.events():
+            yield event
+    finally:
+        # Client went away: stop the work nobody will read
+        task.cancel()
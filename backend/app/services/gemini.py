@@ -1,31 +1,268 @@
-import json
-
-from google import genai  # type: ignore
+import asyncio
+import re
+from collections import Counter
+from typing import List, Optional
 
 from app.core.config import settings
 from app.core.logger import logger
+from app.core.metrics import metrics
 from app.models.recipe import Ingredient, InstructionStep, RecipeData
+from app.services.deadlines import wait_until
+from app.services.extraction_progress import without_partials
+from app.services.llm_providers import (  # noqa: F401 (re-exported)
+    GEMINI_MODEL,
+    GENERATION_CONFIG,
+    GeminiProvider,
+    LLMProvider,
+    get_client,
+    get_openai_provider,
+)
+from app.services.llm_router import llm_router
+from app.services.recipe_json import parse_recipe
+from app.services.transcript_compressor import transcript_compressor
+
+# Bump when what the model is sent changes (_build_prompt, the chunked prompts,
+# transcript preprocessing): cached extractions and the LLM ledger are keyed on it.
+# v2: long transcripts are chunked and transcripts are compressed first;
+# "-raw" marks answers to uncompressed transcripts (compression disabled)
+PROMPT_VERSION = "v2" if settings.TRANSCRIPT_COMPRESSION_ENABLED else "v2-raw"
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_transcript(transcript: str, chunk_size: int) -> List[str]:
+    """
+    Split a transcript into chunks of at most `chunk_size` characters, cutting at
+    sentence boundaries where possible, then at whitespace, then anywhere.
+    """
+    pieces: List[str] = []
+    for sentence in _SENTENCE_END_RE.split(transcript):
+        while len(sentence) > chunk_size:
+            # Auto-captions often have no punctuation: fall back to a word break
+            cut = sentence.rfind(" ", 0, chunk_size + 1)
+            if cut <= 0:
+                cut = chunk_size
+            pieces.append(sentence[:cut])
+            sentence = sentence[cut:].lstrip()
+        if sentence:
+            pieces.append(sentence)
+
+    chunks: List[str] = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + 1 + len(piece) > chunk_size:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current} {piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def merge_partial_recipes(partials: List[RecipeData]) -> RecipeData:
+    """
+    Reduce step: combine per-chunk extractions into one recipe.
+    Scalars come from the first chunk that has them, ingredients are de-duplicated
+    by name (filling in missing quantities), steps keep chunk order and are
+    renumbered, dietary tags are unioned.
+    """
+    ingredients: dict[str, Ingredient] = {}
+    instructions: List[InstructionStep] = []
+    seen_steps = set()
+    dietary_tags: List[str] = []
+
+    for partial in partials:
+        for ingredient in partial.ingredients:
+            key = _normalize(ingredient.item)
+            if key not in ingredients:
+                ingredients[key] = ingredient.model_copy()
+                continue
+            merged = ingredients[key]
+            merged.quantity = merged.quantity or ingredient.quantity
+            merged.unit = merged.unit or ingredient.unit
+            merged.notes = merged.notes or ingredient.notes
+
+        for step in partial.instructions:
+            key = _normalize(step.instruction)
+            if key in seen_steps:
+                continue
+            seen_steps.add(key)
+            instructions.append(
+                InstructionStep(
+                    step_number=len(instructions) + 1,
+                    instruction=step.instruction,
+                    duration_seconds=step.duration_seconds,
+                )
+            )
+
+        for tag in partial.dietary_tags:
+            if tag not in dietary_tags:
+                dietary_tags.append(tag)
+
+    def first(field: str, skip=(None, "", "Unknown Recipe", "No description")):
+        return next(
+            (getattr(p, field) for p in partials if getattr(p, field) not in skip),
+            None,
+        )
+
+    return RecipeData(
+        title=first("title") or "Unknown Recipe",
+        description=first("description") or "No description",
+        servings=first("servings"),
+        prep_time_minutes=first("prep_time_minutes"),
+        cook_time_minutes=first("cook_time_minutes"),
+        ingredients=list(ingredients.values()),
+        instructions=instructions,
+        dietary_tags=dietary_tags,
+    )
 
 
 class GeminiService:
+    """
+    Recipe extraction with an LLM. Gemini is the default backend; when an OpenAI
+    (-compatible) backend is configured too, llm_router picks between them per call.
+    """
+
     def __init__(self):
         if settings.GEMINI_API_KEY:
-            self.client = genai.Client(api_key=settings.GEMINI_API_KEY)
+            self.client = get_client(settings.GEMINI_API_KEY)
         else:
             self.client = None
-        self.model_name = "gemini-flash-latest"
+        self.model_name = GEMINI_MODEL
+        # Model version of the provider(s) that answered the last extraction
+        self._answers: Counter = Counter()
+
+    @property
+    def answered_by(self) -> Optional[str]:
+        """
+        Model version that answered the last extraction (for chunked extractions,
+        the one that answered most chunks).
+        """
+        if not self._answers:
+            return None
+        return self._answers.most_common(1)[0][0]
 
-    async def extract_recipe(self, transcript: str, video_id: str) -> RecipeData:
+    def _providers(self) -> List[LLMProvider]:
+        providers: List[LLMProvider] = []
+        if self.client:
+            providers.append(GeminiProvider(self.client, self.model_name))
+        if settings.OPENAI_API_KEY:
+            providers.append(
+                get_openai_provider(
+                    settings.OPENAI_API_KEY,
+                    settings.OPENAI_BASE_URL,
+                    settings.OPENAI_MODEL,
+                )
+            )
+        return providers
+
+    async def extract_recipe(
+        self, transcript: str, video_id: str, deadline: Optional[float] = None
+    ) -> RecipeData:
+        """
+        `deadline` (time.monotonic()) bounds the whole extraction, chunks and
+        retries included; past it the calls are cancelled.
+        """
+        self._answers.clear()
         try:
-            if not self.client:
-                logger.warning("No GEMINI_API_KEY found.")
-                raise ValueError("Gemini API key is not configured.")
+            if not self._providers():
+                logger.warning("No GEMINI_API_KEY or OPENAI_API_KEY found.")
+                raise ValueError("No LLM API key is configured.")
 
-            prompt = f"""
-            You are a professional chef. Extract a structured recipe from the following YouTube video transcript.
+            compressed = transcript_compressor.compress(transcript)
+            if compressed.tokens_saved:
+                logger.info(
+                    f"Compressed transcript for {video_id}",
+                    extra={
+                        "props": {
+                            "video_id": video_id,
+                            "tokens_in": compressed.original_tokens,
+                            "tokens_out": compressed.compressed_tokens,
+                            "tokens_saved": compressed.tokens_saved,
+                        }
+                    },
+                )
+            transcript = compressed.text
 
+            if len(transcript) <= settings.GEMINI_CHUNK_THRESHOLD_CHARS:
+                extraction = self._extract(
+                    self._build_prompt(transcript), video_id, deadline
+                )
+            else:
+                extraction = self._extract_chunked(transcript, video_id, deadline)
+            return await wait_until(extraction, deadline, "llm")
+
+        except Exception as e:
+            logger.error(f"Gemini Extraction Error: {e}")
+            raise e
+
+    async def _extract_chunked(
+        self, transcript: str, video_id: str, deadline: Optional[float] = None
+    ) -> RecipeData:
+        """
+        Map-reduce for long transcripts: extract partial recipes from sentence-aligned
+        chunks in parallel (bounded), then merge them locally. A chunk that still
+        fails after the limiter's retries fails the whole extraction (and cancels
+        the other chunks): a recipe missing part of its steps must not be cached.
+        """
+        chunks = split_transcript(transcript, settings.GEMINI_CHUNK_SIZE_CHARS)
+        semaphore = asyncio.Semaphore(settings.GEMINI_CHUNK_CONCURRENCY)
+        logger.info(f"Extracting {video_id} in {len(chunks)} chunks")
+        metrics.incr("gemini.chunked_extractions")
+        metrics.incr("gemini.chunks", len(chunks))
+
+        async def extract_chunk(index: int, chunk: str) -> RecipeData:
+            async with semaphore:
+                return await self._extract(
+                    self._build_prompt(chunk, part=(index + 1, len(chunks))),
+                    video_id,
+                    deadline,
+                )
+
+        # Partial outputs of parallel chunks would interleave
+        with without_partials():
+            tasks = [
+                asyncio.ensure_future(extract_chunk(i, chunk))
+                for i, chunk in enumerate(chunks)
+            ]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        for index, task in enumerate(tasks):
+            if not task.cancelled() and task.exception() is not None:
+                logger.warning(
+                    f"Chunk {index + 1}/{len(chunks)} of {video_id} failed: "
+                    f"{task.exception()}"
+                )
+                metrics.incr("gemini.chunk_failures")
+                raise task.exception()
+
+        partials = [task.result() for task in tasks]
+        return merge_partial_recipes(partials)
+
+    def _build_prompt(self, transcript: str, part: tuple[int, int] = None) -> str:
+        scope = ""
+        if part:
+            scope = f"""
+            This is part {part[0]} of {part[1]} of a longer transcript. Extract only the
+            ingredients and steps mentioned in this part, in order. Fill in title,
+            description, servings and times only if this part mentions them.
+            """
+
+        return f"""
+            You are a professional chef. Extract a structured recipe from the following YouTube video transcript.
+            {scope}
             Transcript:
-            {transcript[:30000]}
+            {transcript}
 
             Return ONLY valid JSON matching this schema:
             {{
@@ -44,34 +281,17 @@ class GeminiService:
             }}
             """
 
-            # Use the async client
-            response = await self.client.aio.models.generate_content(
-                model=self.model_name, contents=prompt
-            )
-
-            # Parse JSON
-            text = response.text
-            try:
-                data = json.loads(text)
-            except json.JSONDecodeError:
-                # Cleanup if markdown code blocks exist
-                clean_text = text.replace("```json", "").replace("```", "").strip()
-                data = json.loads(clean_text)
-
-            # Map to Pydantic
-            return RecipeData(
-                title=data.get("title", "Unknown Recipe"),
-                description=data.get("description", "No description"),
-                servings=data.get("servings"),
-                prep_time_minutes=data.get("prep_time_minutes"),
-                cook_time_minutes=data.get("cook_time_minutes"),
-                ingredients=[Ingredient(**i) for i in data.get("ingredients", [])],
-                instructions=[
-                    InstructionStep(**i) for i in data.get("instructions", [])
-                ],
-                dietary_tags=data.get("dietary_tags", []),
-            )
-
-        except Exception as e:
-            logger.error(f"Gemini Extraction Error: {e}")
-            raise e
+    async def _extract(
+        self, prompt: str, video_id: str, deadline: Optional[float] = None
+    ) -> RecipeData:
+        # Routed to the fastest healthy provider, behind its rate limiter
+        recipe_data, provider = await llm_router.generate(
+            self._providers(),
+            prompt,
+            parse_recipe,
+            deadline,
+            video_id=video_id,
+            prompt_version=PROMPT_VERSION,
+        )
+        self._answers[provider.model_version] += 1
+        return recipe_data
@@ -0,0 +1,233 @@
+import asyncio
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import Date, cast, desc, func, insert, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.logger import logger
+from app.core.metrics import metrics
+from app.models.db import LLMCall
+
+
+@dataclass
+class LedgerEntry:
+    provider: str
+    model: str
+    prompt_version: str
+    outcome: str  # ok, invalid (unparseable answer), error, rejected, cancelled
+    latency_ms: float  # The provider call alone
+    wait_ms: float = 0.0  # Limiter queueing, retry backoff and overloaded attempts
+    video_id: Optional[str] = None
+    prompt_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    cost_usd: Optional[float] = None
+    # When the call was made; entries are written up to a flush interval later
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+def call_cost(
+    model: str,
+    prompt_tokens: Optional[int],
+    output_tokens: Optional[int],
+    prices: Dict[str, Tuple[float, float]],
+) -> Optional[float]:
+    """
+    USD cost of a call from per-million-token prices; None for unknown models
+    or missing token counts.
+    """
+    price = prices.get(model)
+    if price is None or prompt_tokens is None or output_tokens is None:
+        return None
+    prompt_price, output_price = price
+    return (prompt_tokens * prompt_price + output_tokens * output_price) / 1_000_000
+
+
+class LLMLedger:
+    """
+    Buffers ledger entries in memory and appends them to llm_calls in
+    multi-row INSERTs from a background task, every `flush_interval_seconds`
+    or as soon as `batch_size` entries are waiting. record() never blocks or
+    touches the database, so it is safe on the request path. A batch that
+    fails to write is put back and retried on the next flush; while the
+    database stays down, at most `max_pending` entries are kept and the rest
+    are dropped (counted in llm.ledger.dropped).
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        batch_size: int,
+        flush_interval_seconds: float,
+        max_pending: int,
+        prices: Dict[str, Tuple[float, float]],
+        session_factory: Callable = AsyncSessionLocal,
+    ):
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_pending = max_pending
+        self.prices = prices
+        self.session_factory = session_factory
+        self._pending: List[LedgerEntry] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def clear(self):
+        self._pending.clear()
+
+    def start(self):
+        if not self.enabled:
+            return
+        loop = asyncio.get_running_loop()
+        if self._task is not None and self._loop is loop:
+            return
+        # The task and event are bound to the loop they were created on
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="llm-ledger")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            self._loop = None
+        # Don't lose what was recorded before shutdown
+        await self.flush()
+        if self._pending:
+            logger.warning(f"LLM ledger lost {len(self._pending)} entries on shutdown")
+            metrics.incr("llm.ledger.dropped", len(self._pending))
+            self._pending.clear()
+
+    def record(self, entry: LedgerEntry):
+        if not self.enabled:
+            return
+        if len(self._pending) >= self.max_pending:
+            metrics.incr("llm.ledger.dropped")
+            return
+        if entry.cost_usd is None:
+            entry.cost_usd = call_cost(
+                entry.model, entry.prompt_tokens, entry.output_tokens, self.prices
+            )
+        self._pending.append(entry)
+        if len(self._pending) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def flush(self) -> int:
+        """
+        Write pending entries until done or a write fails; returns how many
+        were written.
+        """
+        written = 0
+        while self._pending:
+            batch = self._pending[: self.batch_size]
+            del self._pending[: self.batch_size]
+            try:
+                async with self.session_factory() as db:
+                    await db.execute(insert(LLMCall), [asdict(e) for e in batch])
+                    await db.commit()
+            except Exception as e:
+                # Accounting must never take the service down: keep the batch
+                # for the next flush and stop hammering the database for now
+                logger.warning(f"LLM ledger write of {len(batch)} entries failed: {e}")
+                metrics.incr("llm.ledger.failed", len(batch))
+                self._requeue(batch)
+                break
+            written += len(batch)
+        metrics.incr("llm.ledger.written", written)
+        return written
+
+    def _requeue(self, batch: List[LedgerEntry]):
+        # Back in front, in call order. Entries recorded during the write
+        # may have filled the buffer: like record(), keep the oldest
+        self._pending[:0] = batch
+        overflow = len(self._pending) - self.max_pending
+        if overflow > 0:
+            del self._pending[-overflow:]
+            metrics.incr("llm.ledger.dropped", overflow)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=self.flush_interval_seconds
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+
+def _since(days: int) -> datetime:
+    return datetime.now(timezone.utc) - timedelta(days=days)
+
+
+async def llm_spend_by_day(db: AsyncSession, days: int) -> List[dict]:
+    """
+    Calls, failures, tokens, cost and latency of successful calls (avg, p95)
+    per UTC day, model and prompt version over the last `days` days.
+    """
+    # Literal 'UTC' so GROUP BY matches the selected expression exactly
+    day = cast(func.timezone(literal_column("'UTC'"), LLMCall.created_at), Date)
+    ok = LLMCall.outcome == "ok"
+    result = await db.execute(
+        select(
+            day.label("day"),
+            LLMCall.model,
+            LLMCall.prompt_version,
+            func.count().label("calls"),
+            func.count().filter(~ok).label("failed"),
+            func.coalesce(func.sum(LLMCall.prompt_tokens), 0).label("prompt_tokens"),
+            func.coalesce(func.sum(LLMCall.output_tokens), 0).label("output_tokens"),
+            func.coalesce(func.sum(LLMCall.cost_usd), 0.0).label("cost_usd"),
+            func.avg(LLMCall.latency_ms).filter(ok).label("avg_latency_ms"),
+            func.percentile_cont(0.95)
+            .within_group(LLMCall.latency_ms)
+            .filter(ok)
+            .label("p95_latency_ms"),
+        )
+        .where(LLMCall.created_at >= _since(days))
+        .group_by(day, LLMCall.model, LLMCall.prompt_version)
+        .order_by(desc(day), LLMCall.model, LLMCall.prompt_version)
+    )
+    return [dict(row._mapping) for row in result.all()]
+
+
+async def llm_spend_by_video(db: AsyncSession, days: int, limit: int) -> List[dict]:
+    """
+    The `limit` videos with the highest LLM cost over the last `days` days.
+    """
+    cost = func.coalesce(func.sum(LLMCall.cost_usd), 0.0)
+    result = await db.execute(
+        select(
+            LLMCall.video_id,
+            func.count().label("calls"),
+            func.coalesce(func.sum(LLMCall.prompt_tokens), 0).label("prompt_tokens"),
+            func.coalesce(func.sum(LLMCall.output_tokens), 0).label("output_tokens"),
+            cost.label("cost_usd"),
+            func.max(LLMCall.created_at).label("last_call_at"),
+        )
+        .where(LLMCall.created_at >= _since(days), LLMCall.video_id.is_not(None))
+        .group_by(LLMCall.video_id)
+        .order_by(desc(cost))
+        .limit(limit)
+    )
+    return [dict(row._mapping) for row in result.all()]
+
+
+llm_ledger = LLMLedger(
+    enabled=settings.LLM_LEDGER_ENABLED,
+    batch_size=settings.LLM_LEDGER_BATCH_SIZE,
+    flush_interval_seconds=settings.LLM_LEDGER_FLUSH_INTERVAL_SECONDS,
+    max_pending=settings.LLM_LEDGER_MAX_PENDING,
+    prices=settings.LLM_PRICES_PER_MILLION_TOKENS,
+)
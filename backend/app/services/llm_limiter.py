@@ -0,0 +1,228 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Optional, TypeVar
+
+from app.core.config import settings
+from app.core.exceptions import LLMOverloadedError
+from app.core.logger import logger
+from app.core.metrics import metrics
+
+T = TypeVar("T")
+
+
+def is_overload_error(exc: BaseException) -> bool:
+    """
+    429 and 5xx responses mean the provider is overloaded (or failing) and the
+    call is worth retrying. Works for the genai and OpenAI SDK error types.
+    """
+    code = getattr(exc, "code", None) or getattr(exc, "status_code", None)
+    return isinstance(code, int) and (code == 429 or code >= 500)
+
+
+class LLMLimiter:
+    """
+    Client-side admission control for LLM calls:
+    - a token bucket caps the request rate (with `burst` capacity),
+    - an AIMD concurrency limit grows by ~1 per window of successes and is cut
+      by `decrease_factor` on 429/5xx; the bucket rate scales with it,
+    - overload errors are retried with full-jitter exponential backoff.
+    Callers queue for a slot until their deadline; past it they get
+    LLMOverloadedError instead of piling more load on the provider.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate_per_second: float,
+        burst: int,
+        min_concurrency: int,
+        max_concurrency: int,
+        decrease_factor: float,
+        max_retries: int,
+        backoff_base_seconds: float,
+        backoff_max_seconds: float,
+        queue_timeout_seconds: float,
+    ):
+        self.name = name
+        self.max_rate = rate_per_second
+        self.burst = burst
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.decrease_factor = decrease_factor
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.reset()
+
+    def reset(self):
+        self.in_flight = 0
+        self._set_limit(float(self.max_concurrency))
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._update_gauges()
+
+    @property
+    def busy(self) -> bool:
+        """
+        True while callers are queued or every slot is taken.
+        """
+        return bool(self._waiters) or self.in_flight >= int(self.concurrency_limit)
+
+    async def call(
+        self, fn: Callable[[], Awaitable[T]], deadline: Optional[float] = None
+    ) -> T:
+        """
+        Run `fn` under the limiter. `deadline` is a time.monotonic() timestamp;
+        queueing never waits past it (nor past `queue_timeout_seconds`).
+        """
+        queue_deadline = time.monotonic() + self.queue_timeout_seconds
+        if deadline is not None:
+            queue_deadline = min(queue_deadline, deadline)
+
+        attempt = 0
+        while True:
+            await self._acquire(queue_deadline)
+            try:
+                result = await fn()
+            except Exception as e:
+                if not is_overload_error(e):
+                    raise
+                self._on_overload(e)
+                backoff = random.uniform(
+                    0,
+                    min(
+                        self.backoff_max_seconds, self.backoff_base_seconds * 2**attempt
+                    ),
+                )
+                if attempt >= self.max_retries or (
+                    deadline is not None and time.monotonic() + backoff >= deadline
+                ):
+                    raise
+            else:
+                self._on_success()
+                return result
+            finally:
+                self._release()
+
+            attempt += 1
+            metrics.incr(f"llm.{self.name}.retries")
+            await asyncio.sleep(backoff)
+
+    async def _acquire(self, deadline: float):
+        started = time.monotonic()
+        metrics.add_gauge(f"llm.{self.name}.queued", 1)
+        try:
+            await self._acquire_slot(deadline)
+            try:
+                await self._acquire_token(deadline)
+            except BaseException:
+                self._release()
+                raise
+        except LLMOverloadedError:
+            metrics.incr(f"llm.{self.name}.queue_timeouts")
+            raise
+        finally:
+            metrics.add_gauge(f"llm.{self.name}.queued", -1)
+            metrics.observe(
+                f"llm.{self.name}.queue_wait_ms", (time.monotonic() - started) * 1000
+            )
+
+    async def _acquire_slot(self, deadline: float):
+        if self.in_flight < int(self.concurrency_limit) and not self._waiters:
+            self.in_flight += 1
+            self._update_gauges()
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # A releasing call hands its slot over by resolving the future
+            await asyncio.wait_for(waiter, max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            raise LLMOverloadedError(f"{self.name} concurrency limit reached")
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                self._release()  # The slot was handed over just as we gave up
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    async def _acquire_token(self, deadline: float):
+        while True:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._refilled_at) * self.rate
+            )
+            self._refilled_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+
+            wait = (1 - self._tokens) / self.rate
+            if now + wait > deadline:
+                raise LLMOverloadedError(f"{self.name} rate limit reached")
+            await asyncio.sleep(wait)
+
+    def _release(self):
+        self.in_flight -= 1
+        self._wake_waiters()
+
+    def _wake_waiters(self):
+        while self._waiters and self.in_flight < int(self.concurrency_limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+        self._update_gauges()
+
+    def _set_limit(self, concurrency_limit: float):
+        self.concurrency_limit = min(
+            self.max_concurrency, max(self.min_concurrency, concurrency_limit)
+        )
+        # The request rate scales with the concurrency limit
+        self.rate = self.max_rate * self.concurrency_limit / self.max_concurrency
+
+    def _on_success(self):
+        # Additive increase: about +1 slot per `limit` successful calls
+        self._set_limit(self.concurrency_limit + 1 / self.concurrency_limit)
+        self._wake_waiters()
+
+    def _on_overload(self, exc: Exception):
+        # Multiplicative decrease
+        self._set_limit(self.concurrency_limit * self.decrease_factor)
+        metrics.incr(f"llm.{self.name}.throttled")
+        logger.warning(
+            f"{self.name} overloaded, limits cut to {self.concurrency_limit:.1f} "
+            f"concurrent / {self.rate:.2f} rps: {exc}"
+        )
+        self._update_gauges()
+
+    def _update_gauges(self):
+        metrics.set_gauge(f"llm.{self.name}.concurrency_limit", self.concurrency_limit)
+        metrics.set_gauge(f"llm.{self.name}.rate_limit", self.rate)
+        metrics.set_gauge(f"llm.{self.name}.in_flight", self.in_flight)
+
+
+def _limiter(name: str) -> LLMLimiter:
+    return LLMLimiter(
+        name,
+        rate_per_second=settings.LLM_RATE_LIMIT_PER_SECOND,
+        burst=settings.LLM_RATE_LIMIT_BURST,
+        min_concurrency=settings.LLM_MIN_CONCURRENCY,
+        max_concurrency=settings.LLM_MAX_CONCURRENCY,
+        decrease_factor=settings.LLM_DECREASE_FACTOR,
+        max_retries=settings.LLM_MAX_RETRIES,
+        backoff_base_seconds=settings.LLM_BACKOFF_BASE_SECONDS,
+        backoff_max_seconds=settings.LLM_BACKOFF_MAX_SECONDS,
+        queue_timeout_seconds=settings.LLM_QUEUE_TIMEOUT_SECONDS,
+    )
+
+
+# One limiter per provider: each has its own quota
+gemini_limiter = _limiter("gemini")
+openai_limiter = _limiter("openai")
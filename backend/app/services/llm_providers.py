@@ -0,0 +1,218 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from google import genai  # type: ignore
+from google.genai import types  # type: ignore
+
+from app.core.config import settings
+from app.services.extraction_progress import report_partial, wants_partials
+from app.services.llm_limiter import LLMLimiter, gemini_limiter, openai_limiter
+from app.services.recipe_json import RECIPE_RESPONSE_SCHEMA, IncrementalJSONParser
+
+GEMINI_MODEL = "gemini-flash-latest"
+
+
+@lru_cache(maxsize=None)
+def get_client(api_key: str) -> genai.Client:
+    """
+    One genai client per API key for the whole process, instead of one per request.
+    """
+    return genai.Client(api_key=api_key)
+
+
+# JSON mode constrained to the RecipeData schema
+GENERATION_CONFIG = types.GenerateContentConfig(
+    response_mime_type="application/json",
+    response_schema=RECIPE_RESPONSE_SCHEMA,
+)
+
+
+class ProviderHTTPError(Exception):
+    """Non-2xx response from an HTTP LLM backend."""
+
+    def __init__(self, provider: str, status_code: int, detail: str):
+        self.status_code = status_code
+        super().__init__(f"{provider} returned {status_code}: {detail}")
+
+
+@dataclass
+class LLMUsage:
+    """Token counts of one call, as reported by the provider (None if not)."""
+
+    prompt_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+
+
+def _token_count(value: Any) -> Optional[int]:
+    return value if isinstance(value, int) else None
+
+
+class LLMProvider(ABC):
+    """
+    A backend that turns a recipe extraction prompt into raw JSON text.
+    `model_version` is what the extraction cache records for its answers.
+    """
+
+    name: str
+    model: str
+    limiter: LLMLimiter
+
+    @property
+    def model_version(self) -> str:
+        return self.model
+
+    @abstractmethod
+    async def generate(self, prompt: str) -> str:
+        pass
+
+    async def generate_with_usage(self, prompt: str) -> Tuple[str, LLMUsage]:
+        """
+        The answer and the tokens it cost; backends that report usage override this.
+        """
+        return await self.generate(prompt), LLMUsage()
+
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+
+    def __init__(self, client: genai.Client, model: str = GEMINI_MODEL):
+        self.client = client
+        self.model = model
+        self.limiter = gemini_limiter
+
+    async def generate(self, prompt: str) -> str:
+        text, _ = await self.generate_with_usage(prompt)
+        return text
+
+    async def generate_with_usage(self, prompt: str) -> Tuple[str, LLMUsage]:
+        if wants_partials():
+            return await self._generate_streamed(prompt)
+        response = await self.client.aio.models.generate_content(
+            model=self.model, contents=prompt, config=GENERATION_CONFIG
+        )
+        return response.text, self._usage(getattr(response, "usage_metadata", None))
+
+    async def _generate_streamed(self, prompt: str) -> Tuple[str, LLMUsage]:
+        """
+        Same answer, streamed: the recipe parsed so far is reported after
+        every chunk, so a progress stream shows fields as they are generated.
+        """
+        stream = await self.client.aio.models.generate_content_stream(
+            model=self.model, contents=prompt, config=GENERATION_CONFIG
+        )
+        parser = IncrementalJSONParser()
+        parts = []
+        usage = LLMUsage()
+        async for chunk in stream:
+            text = chunk.text or ""
+            parts.append(text)
+            parser.feed(text)
+            report_partial(parser.partial())
+            # Usage is cumulative; the last chunk carries the totals
+            chunk_usage = self._usage(getattr(chunk, "usage_metadata", None))
+            if chunk_usage.output_tokens is not None:
+                usage = chunk_usage
+        return "".join(parts), usage
+
+    @staticmethod
+    def _usage(metadata: Any) -> LLMUsage:
+        if metadata is None:
+            return LLMUsage()
+        output = _token_count(getattr(metadata, "candidates_token_count", None))
+        thoughts = _token_count(getattr(metadata, "thoughts_token_count", None))
+        if output is not None and thoughts:
+            # Thinking tokens are billed as output
+            output += thoughts
+        return LLMUsage(
+            prompt_tokens=_token_count(getattr(metadata, "prompt_token_count", None)),
+            output_tokens=output,
+        )
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """
+    Any backend speaking the OpenAI chat completions API (OpenAI, vLLM, Ollama,
+    OpenRouter, ...). Uses JSON mode; the expected shape is spelled out in the prompt.
+    """
+
+    name = "openai"
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str,
+        model: str,
+        timeout_seconds: float,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.model = model
+        self.limiter = openai_limiter
+        # Pooled keep-alive connections, shared by every request in the process
+        self.http = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            headers={"Authorization": f"Bearer {api_key}"},
+            timeout=timeout_seconds,
+            transport=transport,
+        )
+
+    async def generate(self, prompt: str) -> str:
+        text, _ = await self.generate_with_usage(prompt)
+        return text
+
+    async def generate_with_usage(self, prompt: str) -> Tuple[str, LLMUsage]:
+        response = await self.http.post(
+            "/chat/completions",
+            json={
+                "model": self.model,
+                "messages": [{"role": "user", "content": prompt}],
+                "response_format": {"type": "json_object"},
+            },
+        )
+        if response.status_code >= 400:
+            raise ProviderHTTPError(
+                self.name, response.status_code, response.text[:200]
+            )
+        body = response.json()
+        usage = body.get("usage") or {}
+        return body["choices"][0]["message"]["content"], LLMUsage(
+            prompt_tokens=_token_count(usage.get("prompt_tokens")),
+            output_tokens=_token_count(usage.get("completion_tokens")),
+        )
+
+    async def aclose(self):
+        await self.http.aclose()
+
+
+_openai_providers: Dict[Tuple[str, str, str], OpenAICompatibleProvider] = {}
+
+
+def get_openai_provider(
+    api_key: str, base_url: str, model: str
+) -> OpenAICompatibleProvider:
+    key = (api_key, base_url, model)
+    provider = _openai_providers.get(key)
+    if provider is None:
+        provider = _openai_providers[key] = OpenAICompatibleProvider(
+            api_key, base_url, model, timeout_seconds=settings.OPENAI_TIMEOUT_SECONDS
+        )
+    return provider
+
+
+async def close_providers():
+    for provider in _openai_providers.values():
+        await provider.aclose()
+    _openai_providers.clear()
+
+
+def model_versions() -> List[str]:
+    """
+    Model versions of every configured provider; extraction cache entries
+    written by any of them are valid answers.
+    """
+    versions = [GEMINI_MODEL]
+    if settings.OPENAI_API_KEY:
+        versions.append(settings.OPENAI_MODEL)
+    return versions
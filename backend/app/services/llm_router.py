@@ -0,0 +1,231 @@
+import asyncio
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+from app.core.config import settings
+from app.core.exceptions import LLMOverloadedError
+from app.core.logger import logger
+from app.core.metrics import metrics, percentile
+from app.services.llm_ledger import LedgerEntry, llm_ledger
+from app.services.llm_providers import LLMProvider
+
+T = TypeVar("T")
+
+
+class ProviderStats:
+    """
+    Rolling outcomes of one provider's calls over the last `window_seconds`.
+    """
+
+    def __init__(self, window_seconds: float, max_samples: int = 1000):
+        self.window_seconds = window_seconds
+        # (finished_at monotonic, latency ms, ok)
+        self._samples: Deque[Tuple[float, float, bool]] = deque(maxlen=max_samples)
+
+    def record(self, latency_ms: float, ok: bool):
+        self._samples.append((time.monotonic(), latency_ms, ok))
+
+    def _recent(self) -> List[Tuple[float, float, bool]]:
+        cutoff = time.monotonic() - self.window_seconds
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+        return list(self._samples)
+
+    def summary(self) -> dict:
+        samples = self._recent()
+        latencies = [latency for _, latency, ok in samples if ok]
+        errors = sum(1 for _, _, ok in samples if not ok)
+        return {
+            "samples": len(samples),
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "error_rate": errors / len(samples) if samples else 0.0,
+        }
+
+
+class LLMRouter:
+    """
+    Routes each LLM call to the fastest healthy provider (lowest rolling p50 of
+    successful calls; providers without samples are tried first so they get
+    measured). A provider is unhealthy once its error rate over the window
+    exceeds `max_error_rate` with at least `min_samples` calls; it is only used
+    as a last resort until its errors age out.
+
+    If the first provider has not answered after `hedge_delay_seconds`, the same
+    request is also sent to the next one and the first good answer wins. A
+    failed call fails over to the next provider straight away.
+    """
+
+    def __init__(
+        self,
+        hedge_delay_seconds: float,
+        window_seconds: float,
+        max_error_rate: float,
+        min_samples: int,
+    ):
+        self.hedge_delay_seconds = hedge_delay_seconds
+        self.window_seconds = window_seconds
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        self._stats: Dict[str, ProviderStats] = {}
+
+    def stats(self, name: str) -> ProviderStats:
+        if name not in self._stats:
+            self._stats[name] = ProviderStats(self.window_seconds)
+        return self._stats[name]
+
+    def reset(self):
+        self._stats.clear()
+
+    def _healthy(self, summary: dict) -> bool:
+        return (
+            summary["samples"] < self.min_samples
+            or summary["error_rate"] <= self.max_error_rate
+        )
+
+    def rank(self, providers: List[LLMProvider]) -> List[LLMProvider]:
+        def key(item: Tuple[int, LLMProvider]):
+            index, provider = item
+            summary = self.stats(provider.name).summary()
+            return (not self._healthy(summary), summary["p50_ms"], index)
+
+        return [provider for _, provider in sorted(enumerate(providers), key=key)]
+
+    def snapshot(self) -> dict:
+        return {
+            name: {**stats.summary(), "healthy": self._healthy(stats.summary())}
+            for name, stats in self._stats.items()
+        }
+
+    async def _attempt(
+        self,
+        provider: LLMProvider,
+        prompt: str,
+        parse: Callable[[str], T],
+        deadline: Optional[float] = None,
+        video_id: Optional[str] = None,
+        prompt_version: str = "",
+    ) -> T:
+        # Every attempt goes to the ledger, whatever its outcome
+        entry = LedgerEntry(
+            provider=provider.name,
+            model=provider.model_version,
+            prompt_version=prompt_version,
+            outcome="error",
+            latency_ms=0.0,
+            video_id=video_id,
+        )
+        started = time.monotonic()
+
+        async def call_provider():
+            # Timed inside the limiter, so queueing and backoff are left out
+            call_started = time.monotonic()
+            try:
+                return await provider.generate_with_usage(prompt)
+            finally:
+                entry.latency_ms = round((time.monotonic() - call_started) * 1000, 1)
+
+        try:
+            text, usage = await provider.limiter.call(call_provider, deadline=deadline)
+            entry.prompt_tokens = usage.prompt_tokens
+            entry.output_tokens = usage.output_tokens
+            entry.outcome = "invalid"
+            # A response that can't be parsed counts as a failed call
+            result = parse(text)
+            entry.outcome = "ok"
+        except asyncio.CancelledError:
+            # e.g. the losing side of a hedge, or an abandoned request
+            entry.outcome = "cancelled"
+            raise
+        except Exception as e:
+            if isinstance(e, LLMOverloadedError):
+                entry.outcome = "rejected"
+            latency_ms = (time.monotonic() - started) * 1000
+            self.stats(provider.name).record(latency_ms, ok=False)
+            metrics.incr(f"llm.{provider.name}.errors")
+            logger.warning(f"LLM provider {provider.name} failed: {e}")
+            raise
+        finally:
+            total_ms = (time.monotonic() - started) * 1000
+            entry.wait_ms = round(max(total_ms - entry.latency_ms, 0.0), 1)
+            llm_ledger.record(entry)
+        latency_ms = (time.monotonic() - started) * 1000
+        self.stats(provider.name).record(latency_ms, ok=True)
+        metrics.observe(f"llm.{provider.name}.latency_ms", latency_ms)
+        return result
+
+    async def generate(
+        self,
+        providers: List[LLMProvider],
+        prompt: str,
+        parse: Callable[[str], T],
+        deadline: Optional[float] = None,
+        video_id: Optional[str] = None,
+        prompt_version: str = "",
+    ) -> Tuple[T, LLMProvider]:
+        """
+        Returns the parsed answer and the provider that gave it. `deadline`
+        (time.monotonic()) bounds queueing and retries in the providers' limiters.
+        `video_id` and `prompt_version` label the calls in the LLM ledger.
+        """
+        if not providers:
+            raise ValueError("No LLM provider is configured.")
+
+        candidates = self.rank(providers)
+        pending: Dict[asyncio.Task, LLMProvider] = {}
+        errors: List[Exception] = []
+        hedged = False
+
+        def launch():
+            provider = candidates[len(pending) + len(errors)]
+            task = asyncio.create_task(
+                self._attempt(
+                    provider, prompt, parse, deadline, video_id, prompt_version
+                )
+            )
+            pending[task] = provider
+
+        launch()
+        try:
+            while pending:
+                can_hedge = (
+                    not hedged
+                    and self.hedge_delay_seconds > 0
+                    and len(pending) + len(errors) < len(candidates)
+                )
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=self.hedge_delay_seconds if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    hedged = True
+                    metrics.incr("llm.router.hedges")
+                    launch()
+                    continue
+
+                for task in done:
+                    provider = pending.pop(task)
+                    if task.exception() is None:
+                        if hedged and provider is not candidates[0]:
+                            metrics.incr("llm.router.hedge_wins")
+                        return task.result(), provider
+                    errors.append(task.exception())
+
+                if not pending and len(errors) < len(candidates):
+                    metrics.incr("llm.router.failovers")
+                    launch()
+            raise errors[0]
+        finally:
+            # The losing side of a hedge is no longer needed
+            for task in pending:
+                task.cancel()
+
+
+llm_router = LLMRouter(
+    hedge_delay_seconds=settings.LLM_HEDGE_DELAY_SECONDS,
+    window_seconds=settings.LLM_ROUTER_WINDOW_SECONDS,
+    max_error_rate=settings.LLM_ROUTER_MAX_ERROR_RATE,
+    min_samples=settings.LLM_ROUTER_MIN_SAMPLES,
+)
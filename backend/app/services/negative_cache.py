@@ -0,0 +1,74 @@
+import time
+from collections import OrderedDict
+from typing import Tuple
+
+from app.core.config import settings
+from app.core.exceptions import NoTranscriptError
+from app.core.metrics import metrics
+
+
+class NegativeCache:
+    """
+    In-process memory of videos whose transcript fetch failed.
+    Each repeat failure doubles the block time (exponential back-off per video),
+    starting from `ttl_seconds` for "no transcript" outcomes and the much shorter
+    `transient_ttl_seconds` for upstream failures, capped at `max_ttl_seconds`.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        transient_ttl_seconds: float,
+        max_ttl_seconds: float,
+        max_entries: int,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.transient_ttl_seconds = transient_ttl_seconds
+        self.max_ttl_seconds = max_ttl_seconds
+        self.max_entries = max_entries
+        # video_id -> (blocked_until monotonic, consecutive failures)
+        self._entries: OrderedDict[str, Tuple[float, int]] = OrderedDict()
+
+    def check(self, video_id: str):
+        """
+        Raise NoTranscriptError if the video is currently negatively cached.
+        """
+        entry = self._entries.get(video_id)
+        if entry and time.monotonic() < entry[0]:
+            metrics.incr("transcript.negative_cache.hit")
+            raise NoTranscriptError(video_id)
+
+    def record(self, video_id: str, transient: bool = False) -> float:
+        """
+        Remember a failed fetch; returns the block time in seconds.
+        """
+        _, failures = self._entries.pop(video_id, (0.0, 0))
+        failures += 1
+        base = self.transient_ttl_seconds if transient else self.ttl_seconds
+        ttl = min(base * 2 ** (failures - 1), self.max_ttl_seconds)
+
+        # Entries are kept after expiry so the back-off keeps growing
+        self._entries[video_id] = (time.monotonic() + ttl, failures)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+        metrics.incr(
+            "transcript.negative_cache.transient"
+            if transient
+            else "transcript.negative_cache.no_transcript"
+        )
+        return ttl
+
+    def forget(self, video_id: str):
+        self._entries.pop(video_id, None)
+
+    def clear(self):
+        self._entries.clear()
+
+
+negative_cache = NegativeCache(
+    ttl_seconds=settings.NEGATIVE_CACHE_TTL_SECONDS,
+    transient_ttl_seconds=settings.NEGATIVE_CACHE_TRANSIENT_TTL_SECONDS,
+    max_ttl_seconds=settings.NEGATIVE_CACHE_MAX_TTL_SECONDS,
+    max_entries=settings.NEGATIVE_CACHE_MAX_ENTRIES,
+)
@@ -0,0 +1,147 @@
+import json
+import re
+from typing import Any, List, Optional
+
+from pydantic import ValidationError
+
+from app.core.metrics import metrics
+from app.models.recipe import RecipeData
+
+_FENCE_RE = re.compile(r"^```[a-zA-Z]*\s*|\s*```$")
+
+
+def _to_gemini_schema(node: Any) -> Any:
+    """
+    Rewrite pydantic's JSON schema into the subset the Gemini API accepts:
+    no defaults, and Optional[X] (anyOf X|null) becomes X with nullable=true.
+    """
+    if isinstance(node, list):
+        return [_to_gemini_schema(item) for item in node]
+    if not isinstance(node, dict):
+        return node
+
+    variants = node.get("anyOf")
+    if variants and {"type": "null"} in variants:
+        (variant,) = [v for v in variants if v != {"type": "null"}]
+        rest = {k: v for k, v in node.items() if k != "anyOf"}
+        return _to_gemini_schema({**rest, **variant, "nullable": True})
+
+    return {k: _to_gemini_schema(v) for k, v in node.items() if k != "default"}
+
+
+# Response schema for JSON mode, generated from the model we validate against
+RECIPE_RESPONSE_SCHEMA = _to_gemini_schema(RecipeData.model_json_schema())
+
+
+def _drop_trailing_comma(out: List[str]):
+    while out and out[-1].isspace():
+        out.pop()
+    if out and out[-1] == ",":
+        out.pop()
+
+
+class IncrementalJSONParser:
+    """
+    Consumes a JSON object chunk by chunk as the model streams it. Each chunk
+    is scanned once; snapshot() closes whatever is open (strings, brackets,
+    a dangling key) so the text so far parses as JSON. Leading prose or a
+    markdown fence before the first "{" and anything after the top-level
+    object are ignored; trailing commas and raw newlines in strings are fixed.
+    """
+
+    def __init__(self):
+        self._out: List[str] = []
+        self._closers: List[str] = []
+        self._in_string = self._escaped = False
+        self._started = False
+        self.done = False
+
+    def feed(self, chunk: str):
+        out = self._out
+        for char in chunk:
+            if self.done:
+                return
+            if not self._started:
+                if char != "{":
+                    continue
+                self._started = True
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                elif char == "\n":
+                    char = "\\n"
+                out.append(char)
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._closers.append("}" if char == "{" else "]")
+            elif char in "}]":
+                if not self._closers or char != self._closers[-1]:
+                    continue
+                _drop_trailing_comma(out)
+                self._closers.pop()
+                out.append(char)
+                if not self._closers:
+                    self.done = True  # Anything after the top-level value is prose
+                continue
+            out.append(char)
+
+    def snapshot(self) -> str:
+        out = list(self._out)
+        if self._in_string:
+            out.append('"')
+        _drop_trailing_comma(out)
+        if out and out[-1] == ":":
+            out.append("null")
+        out.extend(reversed(self._closers))
+        return "".join(out)
+
+    def partial(self) -> Optional[dict]:
+        """
+        The object parsed so far, or None while the cut is not parseable
+        (e.g. in the middle of a key or a literal).
+        """
+        try:
+            data = json.loads(self.snapshot())
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+
+
+def repair_json(text: str) -> str:
+    """
+    Best-effort fix of near-valid JSON from the model, in one pass: strips
+    markdown fences and surrounding prose, trailing commas, raw newlines inside
+    strings, and closes strings/brackets left open by a truncated response.
+    """
+    text = _FENCE_RE.sub("", text.strip())
+    if "{" not in text:
+        return text
+    parser = IncrementalJSONParser()
+    parser.feed(text)
+    return parser.snapshot()
+
+
+def parse_recipe(text: str) -> RecipeData:
+    """
+    Validate the model's response into RecipeData. Schema-constrained output
+    takes the single model_validate_json fast path; anything else is repaired
+    locally rather than paying for another model call.
+    """
+    try:
+        return RecipeData.model_validate_json(text)
+    except ValidationError:
+        pass
+
+    metrics.incr("gemini.json_repairs")
+    data = json.loads(repair_json(text))
+    return RecipeData.model_validate(
+        {"title": "Unknown Recipe", "description": "No description", **data}
+    )
@@ -0,0 +1,67 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+from app.core.metrics import metrics
+
+T = TypeVar("T")
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    In-process request coalescing.
+    The first caller for a key starts the work; concurrent callers with the same
+    key await the same result instead of repeating it.
+
+    The work runs in a task owned by the flight, not by any one caller: a
+    caller that is cancelled (client gone) just stops waiting, and the work is
+    only cancelled once the last waiter has left.
+
+    Metrics: `<name>.leader` counts calls that did the work (upstream calls),
+    `<name>.coalesced` counts callers that were served by someone else's call.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, _Flight] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    def _start(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> _Flight:
+        flight = _Flight(asyncio.ensure_future(fn()))
+
+        def finished(task: asyncio.Task):
+            if self._calls.get(key) is flight:
+                del self._calls[key]
+            # Avoid "exception was never retrieved" when nobody is waiting
+            task.cancelled() or task.exception()
+
+        flight.task.add_done_callback(finished)
+        self._calls[key] = flight
+        return flight
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        flight = self._calls.get(key)
+        if flight is None:
+            flight = self._start(key, fn)
+            metrics.incr(f"{self.name}.leader")
+        else:
+            metrics.incr(f"{self.name}.coalesced")
+
+        flight.waiters += 1
+        try:
+            # Shield so a caller leaving doesn't cancel the shared work
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody is waiting any more; later callers start afresh
+                if self._calls.get(key) is flight:
+                    del self._calls[key]
+                flight.task.cancel()
@@ -0,0 +1,188 @@
+import math
+import re
+from typing import List
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+_TOKEN_RE = re.compile(r"\d+(?:[./]\d+)?|[½¼¾⅓⅔⅛]|[a-z]+")
+
+# Feature columns of the per-segment count matrix
+QUANTITY, UNIT, VERB, INGREDIENT, CONTEXT, FILLER = range(6)
+# Relevance weight per feature column (filler counts against a segment)
+FEATURE_WEIGHTS = np.array([1.0, 1.5, 1.0, 1.5, 1.0, -2.0])
+# Floor for the length normalisation so two-word fragments can't score high
+MIN_SEGMENT_TOKENS = 6
+
+_NUMBER_WORDS = """
+    one two three four five six seven eight nine ten eleven twelve fifteen twenty
+    thirty forty fifty hundred half halves quarter third dozen couple few
+""".split()
+_UNITS = """
+    g gram grams kg kilo kilos kilogram kilograms mg ml milliliter milliliters l
+    liter liters litre litres oz ounce ounces lb lbs pound pounds cup cups tbsp
+    tablespoon tablespoons tsp teaspoon teaspoons pinch pinches dash splash clove
+    cloves slice slices stick sticks can cans bunch handful sprig sprigs inch
+    inches cm degrees celsius fahrenheit quart quarts pint pints
+""".split()
+_COOKING_VERBS = """
+    add bake baking baked beat blend blanch boil boiling braise bring brown chop
+    chopped coat combine cook cooking cooked cool cover cream crush cut dice diced
+    drain drizzle dust fold fry frying fried garnish grate grated grill heat
+    knead layer marinate mash melt mince minced mix mixing peel pour preheat
+    reduce rest roast roasted roll rub saute sauteed season serve shred sift
+    simmer slice sliced soak spread sprinkle steam stir strain stuff sear taste
+    toast toss whisk whip
+""".split()
+_INGREDIENTS = """
+    salt pepper sugar flour butter oil egg eggs milk cream cheese garlic onion
+    onions shallot shallots tomato tomatoes potato potatoes carrot carrots celery
+    chicken beef pork lamb bacon fish salmon tuna shrimp rice pasta noodles bread
+    water stock broth wine vinegar lemon lime juice zest honey yeast baking soda
+    powder vanilla chocolate cocoa nuts almonds walnuts beans lentils chickpeas
+    spinach kale lettuce cabbage mushroom mushrooms pepper peppers chili chilli
+    paprika cumin cinnamon nutmeg oregano basil thyme rosemary parsley cilantro
+    coriander ginger spaghetti penne macaroni lasagna soy sauce mustard mayonnaise yogurt yoghurt apple apples
+    banana bananas berries strawberries avocado corn peas cucumber zucchini
+    eggplant tofu sesame coconut maple olive olives parmesan mozzarella cheddar
+""".split()
+_CONTEXT = """
+    recipe recipes dish making make ingredients ingredient serves servings
+    portions oven pan pot skillet bowl tray sheet dough batter sauce crispy
+    golden tender until minute minutes mins hour hours seconds
+""".split()
+_FILLER = """
+    subscribe subscribed subscribers sponsor sponsored sponsors patreon merch
+    channel notification notifications bell comment comments instagram tiktok
+    twitter facebook discount promo coupon giveaway affiliate newsletter
+""".split()
+
+# word -> feature column; later groups win on overlap (e.g. "pepper")
+_LEXICON = {
+    word: feature
+    for feature, words in (
+        (CONTEXT, _CONTEXT),
+        (QUANTITY, _NUMBER_WORDS),
+        (UNIT, _UNITS),
+        (VERB, _COOKING_VERBS),
+        (INGREDIENT, _INGREDIENTS),
+        (FILLER, _FILLER),
+    )
+    for word in words
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough prompt token count (Gemini averages ~4 characters per token).
+    """
+    return math.ceil(len(text) / 4)
+
+
+def split_segments(transcript: str, max_words: int) -> List[str]:
+    """
+    Split into sentences; unpunctuated runs (auto-captions) are cut every
+    `max_words` words so filler can still be dropped at a useful granularity.
+    """
+    segments = []
+    for sentence in _SENTENCE_END_RE.split(transcript):
+        words = sentence.split()
+        for start in range(0, len(words), max_words):
+            segments.append(" ".join(words[start : start + max_words]))
+    return segments
+
+
+def _feature(token: str) -> int:
+    if token[0].isdigit() or token[0] in "½¼¾⅓⅔⅛":
+        return QUANTITY
+    return _LEXICON.get(token, -1)
+
+
+def score_segments(segments: List[str]) -> np.ndarray:
+    """
+    Relevance score per segment: weighted feature counts normalised by
+    sqrt(segment length). All segments are scored in one vectorised pass over
+    the flattened token stream.
+    """
+    tokens: List[str] = []
+    owners: List[int] = []
+    for index, segment in enumerate(segments):
+        segment_tokens = _TOKEN_RE.findall(segment.lower())
+        tokens.extend(segment_tokens)
+        owners.extend([index] * len(segment_tokens))
+
+    owner = np.array(owners, dtype=np.intp)
+    feature = np.fromiter(map(_feature, tokens), dtype=np.intp, count=len(tokens))
+    matched = feature >= 0
+
+    counts = np.zeros((len(segments), len(FEATURE_WEIGHTS)))
+    np.add.at(counts, (owner[matched], feature[matched]), 1)
+    lengths = np.bincount(owner, minlength=len(segments))
+    return counts @ FEATURE_WEIGHTS / np.sqrt(np.maximum(lengths, MIN_SEGMENT_TOKENS))
+
+
+class CompressionResult:
+    def __init__(self, text: str, original_tokens: int, compressed_tokens: int):
+        self.text = text
+        self.original_tokens = original_tokens
+        self.compressed_tokens = compressed_tokens
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.original_tokens - self.compressed_tokens
+
+
+class TranscriptCompressor:
+    """
+    CPU-only pre-processing before the Gemini prompt: scores transcript segments
+    for recipe relevance (quantities, units, cooking verbs, ingredients) and drops
+    filler such as chit-chat and sponsor reads. At least `min_keep_ratio` of the
+    segments (the best scoring ones) always survive, in their original order.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        min_chars: int,
+        min_score: float,
+        min_keep_ratio: float,
+        segment_words: int,
+    ):
+        self.enabled = enabled
+        self.min_chars = min_chars
+        self.min_score = min_score
+        self.min_keep_ratio = min_keep_ratio
+        self.segment_words = segment_words
+
+    def compress(self, transcript: str) -> CompressionResult:
+        original_tokens = estimate_tokens(transcript)
+        if not self.enabled or len(transcript) < self.min_chars:
+            return CompressionResult(transcript, original_tokens, original_tokens)
+
+        segments = split_segments(transcript, self.segment_words)
+        scores = score_segments(segments)
+
+        keep = scores >= self.min_score
+        min_keep = math.ceil(len(segments) * self.min_keep_ratio)
+        if keep.sum() < min_keep:
+            keep[np.argsort(-scores, kind="stable")[:min_keep]] = True
+
+        text = " ".join(segment for segment, kept in zip(segments, keep) if kept)
+        result = CompressionResult(text, original_tokens, estimate_tokens(text))
+
+        metrics.incr("transcript.compression.tokens_in", result.original_tokens)
+        metrics.incr("transcript.compression.tokens_saved", result.tokens_saved)
+        metrics.observe("transcript.compression.tokens_saved", result.tokens_saved)
+        return result
+
+
+transcript_compressor = TranscriptCompressor(
+    enabled=settings.TRANSCRIPT_COMPRESSION_ENABLED,
+    min_chars=settings.TRANSCRIPT_COMPRESSION_MIN_CHARS,
+    min_score=settings.TRANSCRIPT_COMPRESSION_MIN_SCORE,
+    min_keep_ratio=settings.TRANSCRIPT_COMPRESSION_MIN_KEEP_RATIO,
+    segment_words=settings.TRANSCRIPT_COMPRESSION_SEGMENT_WORDS,
+)
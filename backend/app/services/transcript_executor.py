@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from app.core.config import settings
+from app.core.exceptions import DeadlineExceededError, TranscriptFetchBusyError
+from app.core.metrics import metrics
+from app.services.deadlines import remaining, wait_until
+from app.services.transcript_workers import TranscriptWorkerPool, transcript_workers
+from app.services.youtube import YouTubeService
+
+
+class TranscriptExecutor:
+    """
+    Runs the blocking YouTubeService.get_transcript on a dedicated, size-limited
+    thread pool so a slow YouTube response never stalls the event loop.
+
+    Fetches beyond `max_workers` wait in the pool's queue; at most `max_queued`
+    may wait, each for at most `queue_timeout` seconds before it is rejected.
+    A caller that gives up (cancelled, or past its deadline) takes its fetch out
+    of the queue if it has not started; a running yt-dlp call can't be
+    interrupted, but its socket timeout is bounded by the deadline.
+
+    Once `workers` is started, each thread hands its fetch to a warm worker
+    process instead of running yt-dlp itself (and a fetch past its deadline is
+    killed with its process).
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_queued: int,
+        queue_timeout: float,
+        workers: Optional[TranscriptWorkerPool] = None,
+    ):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="transcript"
+        )
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.queued = 0
+
+    def _update_gauges(self):
+        metrics.set_gauge("transcript.fetch.in_flight", self.in_flight)
+        metrics.set_gauge("transcript.fetch.queued", self.queued)
+
+    def _dequeue(self, future) -> bool:
+        # Only a fetch that is still queued can be abandoned
+        if not future.cancel():
+            return False
+        with self._lock:
+            self.queued -= 1
+            self._update_gauges()
+        return True
+
+    async def fetch(self, video_id: str, deadline: Optional[float] = None) -> str:
+        loop = asyncio.get_running_loop()
+        started = asyncio.Event()
+
+        with self._lock:
+            if self.queued >= self.max_queued:
+                metrics.incr("transcript.fetch.rejected")
+                raise TranscriptFetchBusyError("transcript fetch queue is full")
+            self.queued += 1
+            self._update_gauges()
+
+        enqueued_at = time.monotonic()
+
+        def run() -> str:
+            with self._lock:
+                self.queued -= 1
+                self.in_flight += 1
+                self._update_gauges()
+            loop.call_soon_threadsafe(started.set)
+            metrics.observe(
+                "transcript.fetch.queue_wait_ms",
+                (time.monotonic() - enqueued_at) * 1000,
+            )
+            try:
+                if self.workers is not None and self.workers.running:
+                    return self.workers.fetch(video_id, deadline)
+                return YouTubeService().get_transcript(video_id, deadline)
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+                    self._update_gauges()
+
+        future = self._executor.submit(run)
+        queue_timeout = self.queue_timeout
+        left = remaining(deadline)
+        if left is not None:
+            queue_timeout = min(queue_timeout, left)
+        try:
+            await asyncio.wait_for(started.wait(), timeout=queue_timeout)
+        except asyncio.TimeoutError:
+            if self._dequeue(future):
+                metrics.incr("transcript.fetch.timeouts")
+                if queue_timeout < self.queue_timeout:
+                    raise DeadlineExceededError("transcript")
+                raise TranscriptFetchBusyError(
+                    f"timed out after {self.queue_timeout}s waiting for a fetch slot"
+                )
+        except asyncio.CancelledError:
+            if self._dequeue(future):
+                metrics.incr("transcript.fetch.cancelled")
+            raise
+
+        try:
+            transcript = await wait_until(
+                asyncio.wrap_future(future), deadline, "transcript"
+            )
+        except DeadlineExceededError:
+            raise
+        except Exception:
+            metrics.incr("transcript.fetch.failed")
+            raise
+        metrics.incr("transcript.fetch.completed")
+        return transcript
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+transcript_executor = TranscriptExecutor(
+    max_workers=settings.TRANSCRIPT_FETCH_CONCURRENCY,
+    max_queued=settings.TRANSCRIPT_FETCH_MAX_QUEUED,
+    queue_timeout=settings.TRANSCRIPT_QUEUE_TIMEOUT_SECONDS,
+    workers=transcript_workers,
+)
@@ -0,0 +1,55 @@
+import zlib
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.logger import logger
+from app.core.metrics import metrics
+from app.models.db import Transcript
+
+
+class TranscriptStore:
+    """
+    Persists cleaned transcripts (the output of YouTubeService.get_transcript)
+    so a PROMPT_VERSION/model bump only re-runs the LLM, not yt-dlp.
+    """
+
+    # get_transcript requests English subtitles (en, en-US, ...)
+    DEFAULT_LANGUAGE = "en"
+    COMPRESSION_LEVEL = 6
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get(
+        self, video_id: str, language: str = DEFAULT_LANGUAGE
+    ) -> Optional[str]:
+        result = await self.db.execute(
+            select(Transcript.content).where(
+                Transcript.video_id == video_id, Transcript.language == language
+            )
+        )
+        content = result.scalar_one_or_none()
+        if content is None:
+            metrics.incr("transcript.store.miss")
+            return None
+
+        try:
+            transcript = zlib.decompress(content).decode("utf-8")
+        except (zlib.error, UnicodeDecodeError) as e:
+            logger.error(f"Corrupt stored transcript for {video_id}: {e}")
+            metrics.incr("transcript.store.miss")
+            return None
+
+        metrics.incr("transcript.store.hit")
+        return transcript
+
+    async def save(
+        self, video_id: str, transcript: str, language: str = DEFAULT_LANGUAGE
+    ):
+        content = zlib.compress(transcript.encode("utf-8"), self.COMPRESSION_LEVEL)
+        await self.db.merge(
+            Transcript(video_id=video_id, language=language, content=content)
+        )
+        await self.db.commit()
@@ -0,0 +1,257 @@
+import multiprocessing
+import resource
+import threading
+from multiprocessing.connection import Connection
+from typing import Callable, List, Optional
+
+from app.core.config import settings
+from app.core.exceptions import DeadlineExceededError, NoTranscriptError
+from app.core.logger import logger
+from app.core.metrics import metrics
+from app.services.deadlines import deadline_after, remaining
+
+
+def _peak_rss_bytes() -> int:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def serve(conn: Connection, max_jobs: int, max_memory_growth: int):
+    """
+    Worker process main loop: one YoutubeDL, initialized once, serves the
+    (video_id, timeout_seconds) jobs received on `conn` until the parent closes
+    it or the worker retires. The timeout is what the caller has left; it
+    bounds the fetch's sockets. Each reply is (status, value, retire): ("ok", transcript) or
+    ("no_transcript", transient). `retire` is set on the last reply, after
+    `max_jobs` fetches or once peak RSS grew `max_memory_growth` bytes past
+    its level after initialization.
+    """
+    import yt_dlp
+
+    from app.services.youtube import YDL_OPTS, YouTubeService
+
+    service = YouTubeService()
+    with yt_dlp.YoutubeDL(YDL_OPTS) as ydl:
+        # Load the YouTube extractor now rather than on the first job
+        ydl.get_info_extractor("Youtube")
+        baseline = _peak_rss_bytes()
+        jobs = 0
+        while True:
+            try:
+                job = conn.recv()
+            except EOFError:
+                return
+            if job is None:
+                return
+
+            video_id, timeout = job
+            try:
+                transcript = service.get_transcript(
+                    video_id, deadline_after(timeout), ydl=ydl
+                )
+                reply = ("ok", transcript)
+            except NoTranscriptError as e:
+                reply = ("no_transcript", e.transient)
+            except DeadlineExceededError:
+                # The parent has stopped waiting (and is killing us) by now
+                reply = ("no_transcript", True)
+            jobs += 1
+            retire = (
+                jobs >= max_jobs or _peak_rss_bytes() - baseline > max_memory_growth
+            )
+            conn.send((*reply, retire))
+            if retire:
+                return
+
+
+class _Worker:
+    def __init__(self, ctx, target: Callable, args: tuple):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=target,
+            args=(child_conn, *args),
+            name="transcript-worker",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+    def stop(self, kill: bool = False):
+        if kill:
+            self.process.kill()
+        else:
+            try:
+                self.conn.send(None)
+            except (OSError, ValueError):
+                pass
+        self.conn.close()
+        self.process.join(timeout=5)
+
+
+class TranscriptWorkerPool:
+    """
+    Long-lived processes that each keep a pre-initialized YoutubeDL, so a
+    transcript fetch costs only its network round trips instead of yt-dlp's
+    import, option parsing and extractor setup.
+
+    fetch() is blocking and meant to run on the TranscriptExecutor's threads
+    (one per worker): it hands the video id to an idle worker over a pipe and
+    waits for the transcript. Workers retire after `max_jobs` fetches or once
+    their memory grew by `max_memory_growth_mb`, and are replaced on demand.
+    Unlike a thread, a worker can be stopped mid-fetch: one that has not
+    answered by the deadline (or within `timeout_seconds`) is killed.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        size: int,
+        max_jobs: int,
+        max_memory_growth_mb: int,
+        timeout_seconds: float,
+        target: Callable = serve,
+    ):
+        self.enabled = enabled
+        self.size = size
+        self.max_jobs = max_jobs
+        self.max_memory_growth = max_memory_growth_mb * 1024 * 1024
+        self.timeout_seconds = timeout_seconds
+        self.target = target
+        # Forking a process with an event loop and threads running isn't safe
+        self._ctx = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._idle: List[_Worker] = []
+        self._alive = 0
+        self.running = False
+
+    def _spawn(self, count: int = 1) -> List[_Worker]:
+        """
+        Start `count` worker processes. Process start-up takes a while: call this
+        without holding the lock, after counting the workers in `_alive`.
+        """
+        workers: List[_Worker] = []
+        try:
+            for _ in range(count):
+                workers.append(
+                    _Worker(
+                        self._ctx, self.target, (self.max_jobs, self.max_memory_growth)
+                    )
+                )
+                metrics.incr("transcript.workers.spawned")
+        finally:
+            if len(workers) < count:
+                with self._lock:
+                    self._alive -= count - len(workers)
+                    self._update_gauges()
+        return workers
+
+    def _update_gauges(self):
+        metrics.set_gauge("transcript.workers.alive", self._alive)
+        metrics.set_gauge("transcript.workers.idle", len(self._idle))
+
+    def start(self):
+        """
+        Spawn the workers; until this is called fetches run in-thread.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if self.running:
+                return
+            self.running = True
+            self._alive += self.size
+        workers = self._spawn(self.size)
+        self._checkin(*workers)
+
+    def shutdown(self):
+        with self._lock:
+            self.running = False
+            workers, self._idle = self._idle, []
+            self._alive -= len(workers)
+            self._update_gauges()
+        for worker in workers:
+            worker.stop()
+
+    def _checkout(self) -> _Worker:
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.process.is_alive():
+                    self._update_gauges()
+                    return worker
+                self._alive -= 1
+                metrics.incr("transcript.workers.died")
+            # Replaces a retired worker (or serves a caller beyond `size`),
+            # started outside the lock so other callers aren't held up
+            self._alive += 1
+            self._update_gauges()
+        (worker,) = self._spawn()
+        return worker
+
+    def _checkin(self, *workers: _Worker):
+        with self._lock:
+            if self.running:
+                self._idle.extend(workers)
+                self._update_gauges()
+                return
+        for worker in workers:
+            self._retire(worker)
+
+    def _retire(self, worker: _Worker, kill: bool = False):
+        worker.stop(kill=kill)
+        with self._lock:
+            self._alive -= 1
+            self._update_gauges()
+
+    def fetch(self, video_id: str, deadline: Optional[float] = None) -> str:
+        """
+        Fetch a transcript on a worker (blocking). Raises NoTranscriptError like
+        YouTubeService.get_transcript, and DeadlineExceededError if `deadline`
+        passes first.
+        """
+        timeout = self.timeout_seconds
+        left = remaining(deadline)
+        if left is not None:
+            if left <= 0:
+                raise DeadlineExceededError("transcript")
+            timeout = min(timeout, left)
+
+        worker = self._checkout()
+        try:
+            worker.conn.send((video_id, timeout))
+            answered = worker.conn.poll(timeout)
+            if answered:
+                status, value, retire = worker.conn.recv()
+        except (EOFError, OSError) as e:
+            logger.warning(f"Transcript worker died fetching {video_id}: {e}")
+            metrics.incr("transcript.workers.died")
+            self._retire(worker, kill=True)
+            raise NoTranscriptError(video_id, transient=True)
+
+        if not answered:
+            # Stuck, or nobody is waiting any more: stop the fetch for real
+            metrics.incr("transcript.workers.killed")
+            self._retire(worker, kill=True)
+            if timeout < self.timeout_seconds:
+                raise DeadlineExceededError("transcript")
+            logger.warning(f"Transcript worker timed out fetching {video_id}")
+            raise NoTranscriptError(video_id, transient=True)
+
+        if retire:
+            metrics.incr("transcript.workers.recycled")
+            self._retire(worker)
+        else:
+            self._checkin(worker)
+
+        if status == "no_transcript":
+            raise NoTranscriptError(video_id, transient=value)
+        return value
+
+
+transcript_workers = TranscriptWorkerPool(
+    enabled=settings.TRANSCRIPT_WORKERS_ENABLED,
+    size=settings.TRANSCRIPT_FETCH_CONCURRENCY,
+    max_jobs=settings.TRANSCRIPT_WORKER_MAX_JOBS,
+    max_memory_growth_mb=settings.TRANSCRIPT_WORKER_MAX_MEMORY_GROWTH_MB,
+    timeout_seconds=settings.TRANSCRIPT_WORKER_TIMEOUT_SECONDS,
+)
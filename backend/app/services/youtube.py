@@ -1,9 +1,125 @@
+import html
+import io
 import re
+from typing import Iterable, Iterator, List, Optional
 
-import webvtt
-
-from app.core.exceptions import NoTranscriptError
+from app.core.exceptions import DeadlineExceededError, NoTranscriptError
 from app.core.logger import logger
+from app.services.deadlines import remaining
+
+# Configure yt-dlp to resolve subtitles only
+YDL_OPTS = {
+    "skip_download": True,
+    "writesubtitles": True,
+    "writeautomaticsub": True,  # Fallback to auto-captions
+    "subtitleslangs": ["en.*", "en"],  # varied english codes
+    "subtitlesformat": "vtt",
+    "quiet": True,
+    "no_warnings": True,
+}
+
+
+def set_socket_timeout(ydl, seconds: float):
+    """
+    Apply a socket timeout to a live YoutubeDL. Its request handlers copy
+    socket_timeout when they are built (on first use), so those are updated too.
+    """
+    ydl.params["socket_timeout"] = seconds
+    if "_request_director" in vars(ydl):
+        for handler in ydl._request_director.handlers.values():
+            handler.timeout = seconds
+
+
+# Inline cue markup: <00:00:01.234>, <c>, </c>, <c.colorE5E5E5>, <v Speaker> ...
+_VTT_TAG_RE = re.compile(r"<[^>]*>")
+
+
+def iter_vtt_cues(lines: Iterable[str]) -> Iterator[str]:
+    """
+    Streaming WebVTT parser: yields the plain text of each cue as it is read.
+    Skips the header, NOTE/STYLE/REGION blocks, cue identifiers and timings,
+    and strips inline tags. Keeps no state beyond the current cue.
+    """
+    in_header = True
+    skipping_block = False
+    in_payload = False
+    payload: List[str] = []
+
+    for raw_line in lines:
+        if not raw_line.rstrip("\r\n"):
+            # Empty line ends the header, a skipped block or a cue
+            if payload:
+                yield " ".join(payload)
+                payload = []
+            in_header = skipping_block = in_payload = False
+            continue
+
+        # Whitespace-only lines (YouTube's " " first line) are not terminators
+        line = raw_line.strip()
+        if not line:
+            continue
+
+        if in_header or skipping_block:
+            continue
+
+        if in_payload:
+            text = html.unescape(_VTT_TAG_RE.sub("", line)).strip()
+            if text:
+                payload.append(text)
+        elif "-->" in line:
+            in_payload = True
+        elif line.startswith(("NOTE", "STYLE", "REGION")):
+            skipping_block = True
+        # Otherwise: a cue identifier line, ignored
+
+    if payload:
+        yield " ".join(payload)
+
+
+def _overlap(tail: List[str], words: List[str]) -> int:
+    """
+    Length of the longest prefix of `words` that is a suffix of `tail`.
+    Prefix function (KMP) over words + sentinel + tail: O(len(words) + len(tail)).
+    """
+    sequence: List[Optional[str]] = [*words, None, *tail]
+    prefix = [0] * len(sequence)
+    for i in range(1, len(sequence)):
+        k = prefix[i - 1]
+        while k and sequence[i] != sequence[k]:
+            k = prefix[k - 1]
+        if sequence[i] == sequence[k]:
+            k += 1
+        prefix[i] = k
+    return prefix[-1]
+
+
+def merge_caption_words(cues: Iterable[str]) -> str:
+    """
+    Merge overlapping (rolling) auto-caption cues into one transcript.
+
+    YouTube auto-captions repeat the previous line(s) and append new words:
+        "hey everybody" -> "hey everybody it's" -> "everybody it's time"
+    For each cue we drop the longest word-level prefix that overlaps the tail of
+    the output so far. Only the last len(cue) words are compared, so the total
+    work is linear in the transcript length.
+    """
+    words: List[str] = []
+    previous: List[str] = []
+
+    for cue in cues:
+        cue_words = cue.split()
+        if not cue_words:
+            continue
+
+        # Cue is a repeat of the beginning of the previous cue: nothing new
+        if cue_words == previous[: len(cue_words)]:
+            continue
+
+        tail = words[-len(cue_words) :] if words else []
+        words.extend(cue_words[_overlap(tail, cue_words) :])
+        previous = cue_words
+
+    return " ".join(words)
 
 
 class YouTubeService:
@@ -17,95 +133,76 @@ class YouTubeService:
             return match.group(1)
         raise ValueError("Invalid YouTube URL")
 
-    def get_transcript(self, video_id: str) -> str:
+    @staticmethod
+    def parse_vtt(data: bytes) -> str:
         """
-        Fetches transcript using yt-dlp which is more robust than youtube_transcript_api.
-        Downloads the lowest quality audio (skip download) but grabs subtitles.
+        Parse WebVTT subtitle bytes into a clean, de-duplicated transcript.
         """
-        import glob
-        import os
-        import uuid
+        lines = io.StringIO(data.decode("utf-8", errors="replace"))
+        transcript = merge_caption_words(iter_vtt_cues(lines))
+        # Final cleanup of whitespace
+        return " ".join(transcript.split())
 
+    @staticmethod
+    def _select_subtitles(info: dict) -> Optional[dict]:
+        """
+        Pick the subtitle track yt-dlp selected (manual subs first, then auto).
+        """
+        requested = info.get("requested_subtitles") or {}
+        for track in requested.values():
+            if track and track.get("url") and track.get("ext") == "vtt":
+                return track
+        return None
+
+    def _read_transcript(self, ydl, video_id: str) -> str:
+        info = ydl.extract_info(
+            f"https://www.youtube.com/watch?v={video_id}", download=False
+        )
+        track = self._select_subtitles(info or {})
+        if track is None:
+            raise NoTranscriptError(video_id)
+
+        # Subtitle bytes straight from yt-dlp's HTTP stack, no temp files
+        with ydl.urlopen(track["url"]) as response:
+            data = response.read()
+
+        transcript = self.parse_vtt(data)
+        if not transcript:
+            raise NoTranscriptError(video_id)
+        return transcript
+
+    def get_transcript(
+        self, video_id: str, deadline: Optional[float] = None, ydl=None
+    ) -> str:
+        """
+        Fetches transcript using yt-dlp which is more robust than youtube_transcript_api.
+        Nothing is written to disk: yt-dlp resolves the subtitle track, its bytes are
+        read into memory and parsed with a streaming VTT parser.
+        `deadline` (time.monotonic()) caps yt-dlp's socket timeout, so a fetch
+        nobody waits for any more does not hold its thread for long.
+        Pass `ydl` to reuse a long-lived YoutubeDL (built with YDL_OPTS) instead
+        of initializing one for this call, as the transcript workers do; the
+        deadline's socket timeout is applied to it for this call.
+        """
         import yt_dlp
 
-        # Create a unique temp filename to avoid collisions
-        temp_id = str(uuid.uuid4())
-        output_template = f"/tmp/{temp_id}"
-
-        # Configure yt-dlp to download subtitles only
-        ydl_opts = {
-            "skip_download": True,
-            "writesubtitles": True,
-            "writeautomaticsub": True,  # Fallback to auto-captions
-            "subtitleslangs": ["en.*", "en"],  # varied english codes
-            "outtmpl": output_template,
-            "quiet": True,
-            "no_warnings": True,
-        }
+        ydl_opts = dict(YDL_OPTS)
+        left = remaining(deadline)
+        if left is not None:
+            if left <= 0:
+                raise DeadlineExceededError("transcript")
+            ydl_opts["socket_timeout"] = max(1.0, left)
 
         try:
+            if ydl is not None:
+                if left is not None:
+                    set_socket_timeout(ydl, ydl_opts["socket_timeout"])
+                return self._read_transcript(ydl, video_id)
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                # This writes file like /tmp/{uuid}.en.vtt
-                ydl.download([f"https://www.youtube.com/watch?v={video_id}"])
-
-            # Find the downloaded vtt file
-            # it might happen that it downloads .en.vtt or .en-US.vtt etc
-            possible_files = glob.glob(f"{output_template}*.vtt")
-
-            if not possible_files:
-                raise NoTranscriptError(video_id)
-
-            # Pick the first one (usually best match)
-            vtt_path = possible_files[0]
-
-            # Parse VTT to plain text using webvtt-py
-            captions = webvtt.read(vtt_path)
-
-            # YouTube auto-captions are often overlapping and repeating.
-            # Example:
-            # 1: "hey"
-            # 2: "hey everybody"
-            # 3: "hey everybody it's"
-            # We want to keep only unique content.
-
-            text_lines: list[str] = []
-            last_text = ""
-
-            for caption in captions:
-                text = caption.text.strip()
-                if not text:
-                    continue
-
-                # If the current text starts with the last text, it's likely an extension
-                if text.startswith(last_text) and last_text:
-                    # Replace the last line with the current one as it's more complete
-                    if text_lines:
-                        text_lines[-1] = text
-                    else:
-                        text_lines.append(text)
-                elif last_text.startswith(text) and text:
-                    # Current text is already contained in last text, skip
-                    continue
-                else:
-                    text_lines.append(text)
-
-                last_text = text
-
-            transcript = " ".join(text_lines)
-
-            # Final cleanup of whitespace
-            return " ".join(transcript.split())
+                return self._read_transcript(ydl, video_id)
 
         except Exception as e:
             logger.error(f"Error fetching transcript with yt-dlp: {e}")
-            if isinstance(e, NoTranscriptError):
+            if isinstance(e, (NoTranscriptError, DeadlineExceededError)):
                 raise e
-            raise NoTranscriptError(video_id)  # Wrap others
-
-        finally:
-            # Cleanup
-            try:
-                for f in glob.glob(f"{output_template}*"):
-                    os.remove(f)
-            except Exception:
-                pass
+            raise NoTranscriptError(video_id, transient=True)  # Wrap others
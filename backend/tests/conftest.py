@@ -0,0 +1,52 @@
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.cache import extraction_l1
+from app.services.cache_backends import (
+    memory_cache_backend,
+    memory_content_cache_backend,
+)
+from app.services.cache_refresh import cache_refresher
+from app.services.gemini import get_client
+from app.services.llm_ledger import llm_ledger
+from app.services.llm_limiter import gemini_limiter, openai_limiter
+from app.services.llm_router import llm_router
+from app.services.negative_cache import negative_cache
+
+
+@pytest.fixture(autouse=True)
+def reset_process_state(monkeypatch):
+    """
+    Reset in-process state (metrics, caches, shared clients, limiters) so tests stay independent.
+    """
+    # The lease connects to DATABASE_URL: never take locks on a local database
+    monkeypatch.setattr(settings, "EXTRACTION_LEASE_ENABLED", False)
+    metrics.reset()
+    extraction_l1.clear()
+    memory_cache_backend.clear()
+    memory_content_cache_backend.clear()
+    cache_refresher.clear()
+    negative_cache.clear()
+    get_client.cache_clear()
+    gemini_limiter.reset()
+    openai_limiter.reset()
+    llm_router.reset()
+    llm_ledger.clear()
+    yield
+
+
+@pytest.fixture
+def mock_session_factory():
+    """
+    Session factory for services that open their own sessions; each is an AsyncMock.
+    """
+
+    @asynccontextmanager
+    async def session_factory():
+        yield AsyncMock()
+
+    return session_factory
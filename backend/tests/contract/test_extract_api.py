@@ -1,11 +1,20 @@
+import json
+from contextlib import asynccontextmanager
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi.testclient import TestClient
 
-from app.core.database import get_db
+from app.core.database import get_db, get_session_factory
+from app.core.exceptions import (
+    DeadlineExceededError,
+    LLMOverloadedError,
+    NoTranscriptError,
+)
 from app.main import app
 from app.models.recipe import Ingredient, InstructionStep, RecipeData
+from app.services.extraction_jobs import MemoryJobStore, extraction_jobs
+from app.services.extraction_progress import stream_extraction
 
 client = TestClient(app)
 
@@ -13,7 +22,13 @@ client = TestClient(app)
 @pytest.fixture
 def api_overrides():
     mock_session = AsyncMock()
+
+    @asynccontextmanager
+    async def session_factory():
+        yield mock_session
+
     app.dependency_overrides[get_db] = lambda: mock_session
+    app.dependency_overrides[get_session_factory] = lambda: session_factory
     # Mock existing recipe check (return None)
     mock_result = MagicMock()
     mock_result.scalar_one_or_none.return_value = None
@@ -22,6 +37,12 @@ def api_overrides():
     app.dependency_overrides.clear()
 
 
+@pytest.fixture
+def job_store():
+    with patch.object(extraction_jobs, "store", MemoryJobStore()) as store:
+        yield store
+
+
 def test_extract_api_contract(api_overrides):
     # Because this is a contract test, we might want to mock the heavy services
     # But ensure the input/output schema matches
@@ -57,3 +78,219 @@ def test_extract_api_contract(api_overrides):
         data = response.json()
         assert "title" in data
         assert "ingredients" in data
+
+
+def test_extract_reports_stage_timings(api_overrides):
+    with patch("app.services.youtube.YouTubeService.get_transcript") as mock_yt, patch(
+        "app.services.gemini.GeminiService.extract_recipe"
+    ) as mock_gemini, patch(
+        "app.services.cache.CacheService.get_cached_extraction"
+    ) as mock_cache_get, patch(
+        "app.services.cache.CacheService.get_cached_by_content"
+    ) as mock_content_get, patch(
+        "app.services.cache.CacheService.save_extraction"
+    ):
+        mock_yt.return_value = "Mock Transcript"
+        mock_cache_get.return_value = None
+        mock_content_get.return_value = None
+        mock_gemini.return_value = RecipeData(
+            title="Mock Recipe",
+            description="Mock Desc",
+            ingredients=[],
+            instructions=[],
+        )
+
+        response = client.post(
+            "/api/v1/extract",
+            json={"video_url": "https://www.youtube.com/watch?v=12345678901"},
+        )
+
+    assert response.status_code == 200
+    names = [
+        entry.split(";")[0] for entry in response.headers["Server-Timing"].split(", ")
+    ]
+    assert names == [
+        "existing_recipe",
+        "cache_check",
+        "transcript",
+        "content_check",
+        "llm",
+        "save",
+        "total",
+    ]
+
+
+def test_extract_error_reports_stage_timings(api_overrides):
+    with patch(
+        "app.services.cache.CacheService.get_cached_extraction"
+    ) as mock_cache_get:
+        mock_cache_get.side_effect = LLMOverloadedError("gemini rate limit reached")
+
+        response = client.post(
+            "/api/v1/extract",
+            json={"video_url": "https://www.youtube.com/watch?v=12345678901"},
+        )
+
+    assert response.status_code == 503
+    assert response.headers["Server-Timing"].startswith("existing_recipe;dur=")
+
+
+def test_extract_job_cache_hit_contract(api_overrides, job_store):
+    with patch(
+        "app.services.cache.CacheService.get_cached_extraction"
+    ) as mock_cache_get:
+        mock_cache_get.return_value = RecipeData(
+            title="Cached Recipe",
+            description="Mock Desc",
+            ingredients=[Ingredient(item="Mock Item")],
+            instructions=[InstructionStep(step_number=1, instruction="Do it")],
+            dietary_tags=[],
+        )
+
+        response = client.post(
+            "/api/v1/extract/jobs",
+            json={"video_url": "https://www.youtube.com/watch?v=12345678901"},
+        )
+
+        assert response.status_code == 202
+        job = response.json()
+        assert job["status"] == "completed"
+        assert job["result"]["title"] == "Cached Recipe"
+
+        response = client.get(f"/api/v1/extract/jobs/{job['job_id']}")
+        assert response.status_code == 200
+        assert response.json()["job_id"] == job["job_id"]
+
+
+def test_extract_job_not_found(job_store):
+    response = client.get("/api/v1/extract/jobs/missing")
+    assert response.status_code == 404
+
+
+def test_extract_no_transcript_is_negatively_cached(api_overrides):
+    with patch("app.services.youtube.YouTubeService.get_transcript") as mock_yt, patch(
+        "app.services.cache.CacheService.get_cached_extraction"
+    ) as mock_cache_get:
+        mock_yt.side_effect = NoTranscriptError("12345678901")
+        mock_cache_get.return_value = None
+
+        for _ in range(2):
+            response = client.post(
+                "/api/v1/extract",
+                json={"video_url": "https://www.youtube.com/watch?v=12345678901"},
+            )
+            assert response.status_code == 422
+            assert response.json()["code"] == "NO_TRANSCRIPT"
+
+        # The second request never reached YouTube
+        mock_yt.assert_called_once()
+
+
+def test_extract_llm_overload_returns_503(api_overrides):
+    with patch("app.services.youtube.YouTubeService.get_transcript") as mock_yt, patch(
+        "app.services.gemini.GeminiService.extract_recipe"
+    ) as mock_gemini, patch(
+        "app.services.cache.CacheService.get_cached_extraction"
+    ) as mock_cache_get:
+        mock_yt.return_value = "Mock Transcript"
+        mock_cache_get.return_value = None
+        mock_gemini.side_effect = LLMOverloadedError("gemini rate limit reached")
+
+        response = client.post(
+            "/api/v1/extract",
+            json={"video_url": "https://www.youtube.com/watch?v=12345678901"},
+        )
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "5"
+
+
+def test_extract_deadline_returns_504(api_overrides):
+    with patch("app.services.youtube.YouTubeService.get_transcript") as mock_yt, patch(
+        "app.services.gemini.GeminiService.extract_recipe"
+    ) as mock_gemini, patch(
+        "app.services.cache.CacheService.get_cached_extraction"
+    ) as mock_cache_get:
+        mock_yt.return_value = "Mock Transcript"
+        mock_cache_get.return_value = None
+        mock_gemini.side_effect = DeadlineExceededError("llm")
+
+        response = client.post(
+            "/api/v1/extract",
+            json={"video_url": "https://www.youtube.com/watch?v=12345678901"},
+        )
+
+        assert response.status_code == 504
+        assert "llm" in response.json()["detail"]
+
+
+def test_extract_batch_ndjson_contract():
+    with patch(
+        "app.services.cache.CacheService.get_cached_extractions"
+    ) as mock_cache_get:
+        mock_cache_get.return_value = {
+            "12345678901": RecipeData(
+                title="Cached Recipe",
+                description="Mock Desc",
+                ingredients=[],
+                instructions=[],
+            )
+        }
+
+        response = client.post(
+            "/api/v1/extract/batch",
+            json={
+                "video_urls": [
+                    "https://www.youtube.com/watch?v=12345678901",
+                    "https://google.com",
+                ]
+            },
+        )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["status"] for line in lines] == ["error", "ok"]
+    assert lines[1]["recipe"]["title"] == "Cached Recipe"
+
+
+def test_extract_batch_rejects_oversized_batch():
+    response = client.post(
+        "/api/v1/extract/batch",
+        json={"video_urls": ["https://youtu.be/12345678901"] * 301},
+    )
+    assert response.status_code == 400
+
+
+def test_extract_stream_contract(api_overrides):
+    recipe = RecipeData(
+        title="Streamed Recipe",
+        description="Mock Desc",
+        ingredients=[Ingredient(item="Mock Item")],
+        instructions=[InstructionStep(step_number=1, instruction="Do it")],
+        dietary_tags=[],
+    )
+
+    @asynccontextmanager
+    async def session_factory():
+        yield api_overrides
+
+    with patch(
+        "app.api.endpoints.extract.stream_extraction",
+        lambda video_url: stream_extraction(video_url, session_factory),
+    ), patch("app.services.cache.CacheService.get_cached_extraction") as mock_cache_get:
+        mock_cache_get.return_value = recipe
+
+        response = client.get(
+            "/api/v1/extract/stream",
+            params={"video_url": "https://www.youtube.com/watch?v=12345678901"},
+        )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [block.split("\n") for block in response.text.strip().split("\n\n")]
+    names = [lines[0].removeprefix("event: ") for lines in events]
+    assert names[-1] == "result"
+    assert "stage" in names
+    result = json.loads(events[-1][1].removeprefix("data: "))
+    assert result["title"] == "Streamed Recipe"
@@ -0,0 +1,64 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select, text
+
+from app.models.db import ExtractionCache
+from app.services.cache_backends import CacheEntry, PostgresCacheBackend
+from app.services.cache_partitions import add_months, create_partition_sql, month_start
+
+NOW = datetime.now(timezone.utc)
+
+
+def entry(title, expires_in):
+    return CacheEntry(
+        video_id="vid1",
+        prompt_version="v1",
+        model="gemini",
+        raw_result={"title": title},
+        expires_at=NOW + expires_in,
+    )
+
+
+@pytest.fixture
+async def session_factory(pg_session_factory):
+    async with pg_session_factory() as db:
+        conn = await db.connection()
+        await conn.run_sync(ExtractionCache.__table__.create)
+        # Writes below land in this month's and the next two months' partitions
+        for months in range(3):
+            await db.execute(
+                text(create_partition_sql(add_months(month_start(NOW), months)))
+            )
+        await db.commit()
+    return pg_session_factory
+
+
+async def count_rows(session_factory):
+    async with session_factory() as db:
+        return (
+            await db.execute(select(func.count()).select_from(ExtractionCache))
+        ).scalar()
+
+
+@pytest.mark.asyncio
+async def test_saving_a_key_twice_keeps_one_row(session_factory):
+    async with session_factory() as db:
+        backend = PostgresCacheBackend(db)
+        await backend.save(entry("First", timedelta(days=1)))
+        # Different expires_at, possibly another partition
+        await backend.save(entry("Second", timedelta(days=40)))
+
+    assert await count_rows(session_factory) == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_saves_of_a_key_keep_one_row(session_factory):
+    async def save(title, expires_in):
+        async with session_factory() as db:
+            await PostgresCacheBackend(db).save(entry(title, expires_in))
+
+    await asyncio.gather(*(save(f"Racer {i}", timedelta(days=1 + i)) for i in range(8)))
+
+    assert await count_rows(session_factory) == 1
@@ -3,7 +3,9 @@ from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from app.services.gemini import GeminiService
+from app.core.config import settings
+from app.services.gemini import GeminiService, get_client
+from app.services.transcript_compressor import TranscriptCompressor
 
 
 # This test simulates checking quality against golden samples
@@ -25,6 +27,8 @@ async def test_regression_quality_golden_samples(golden_data_dir):
     for sample in samples:
         video_id = sample["video_id"]
         transcript = sample["transcript_snippet"]
+        # The genai client is shared per process: drop it so each sample gets a fresh mock
+        get_client.cache_clear()
 
         # We need to mock the generate_content call to return something that matches our expectations
         # strictly for the purpose of the test structure, unless we record VCR cassettes
@@ -53,6 +57,8 @@ async def test_regression_quality_golden_samples(golden_data_dir):
             # Need to patch settings too if service reads them
             with patch("app.services.gemini.settings") as mock_settings:
                 mock_settings.GEMINI_API_KEY = "dummy"
+                mock_settings.OPENAI_API_KEY = None
+                mock_settings.GEMINI_CHUNK_THRESHOLD_CHARS = 30000
 
                 # Re-init service with mocked settings/client
                 service = GeminiService()
@@ -64,3 +70,67 @@ async def test_regression_quality_golden_samples(golden_data_dir):
                 found_items = [i.item for i in result.ingredients]
                 for exp in sample["expected_ingredients"]:
                     assert exp in found_items
+
+
+def _mentions(text: str, sample: dict) -> set:
+    text = text.lower()
+    terms = sample["expected_ingredients"] + sample["expected_title"].lower().split()
+    return {term for term in terms if term.lower() in text}
+
+
+@pytest.mark.asyncio
+async def test_regression_compression_keeps_recipe_content(golden_data_dir):
+    samples_file = golden_data_dir / "golden_samples.json"
+    if not samples_file.exists():
+        pytest.skip("Golden samples not found")
+
+    with open(samples_file) as f:
+        samples = json.load(f)
+
+    # Golden samples are short: compress them regardless of length
+    compressor = TranscriptCompressor(
+        enabled=True,
+        min_chars=0,
+        min_score=settings.TRANSCRIPT_COMPRESSION_MIN_SCORE,
+        min_keep_ratio=settings.TRANSCRIPT_COMPRESSION_MIN_KEEP_RATIO,
+        segment_words=settings.TRANSCRIPT_COMPRESSION_SEGMENT_WORDS,
+    )
+
+    tokens_in = tokens_out = 0
+    for sample in samples:
+        transcript = sample["transcript_snippet"]
+        get_client.cache_clear()
+
+        with patch("google.genai.Client") as MockClient, patch(
+            "app.services.gemini.settings"
+        ) as mock_settings, patch(
+            "app.services.gemini.transcript_compressor", compressor
+        ):
+            mock_settings.GEMINI_API_KEY = "dummy"
+            mock_settings.OPENAI_API_KEY = None
+            mock_settings.GEMINI_CHUNK_THRESHOLD_CHARS = 30000
+            mock_resp_obj = MagicMock()
+            mock_resp_obj.text = json.dumps(
+                {
+                    "title": "t",
+                    "description": "d",
+                    "ingredients": [],
+                    "instructions": [],
+                }
+            )
+            generate = MockClient.return_value.aio.models.generate_content = AsyncMock(
+                return_value=mock_resp_obj
+            )
+
+            await GeminiService().extract_recipe(transcript, sample["video_id"])
+
+        prompt = generate.call_args.kwargs["contents"]
+        # Everything the model needs to get the title and ingredients right survives
+        assert _mentions(prompt, sample) == _mentions(transcript, sample)
+
+        result = compressor.compress(transcript)
+        tokens_in += result.original_tokens
+        tokens_out += result.compressed_tokens
+
+    # ...while the filler in the samples is actually dropped
+    assert tokens_out < tokens_in * 0.75
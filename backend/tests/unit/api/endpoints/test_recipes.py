@@ -155,3 +155,13 @@ async def test_read_recipe(mock_db, mock_user):
     assert result.id == str(recipe_id)
     assert result.title == "Single Recipe"
     mock_db.execute.assert_called()
+
+
+@pytest.mark.asyncio
+async def test_create_recipe_stores_video_id(mock_db, mock_user, recipe_create_data):
+    recipe_create_data.video_url = "https://www.youtube.com/watch?v=12345678901"
+
+    await create_recipe(recipe=recipe_create_data, db=mock_db, current_user=mock_user)
+
+    db_recipe = mock_db.add.call_args[0][0]
+    assert db_recipe.video_id == "12345678901"
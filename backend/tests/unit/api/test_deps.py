@@ -4,7 +4,7 @@ import pytest
 from fastapi import HTTPException, Request, status
 from jose import JWTError
 
-from app.api.deps import get_current_user, get_current_user_optional
+from app.api.deps import get_current_user, get_current_user_optional, require_admin
 
 
 @pytest.fixture
@@ -151,3 +151,19 @@ async def test_get_current_user_optional_no_sub(mock_request, mock_db):
         user = await get_current_user_optional(request=mock_request, db=mock_db)
 
     assert user is None
+
+
+@pytest.mark.asyncio
+async def test_require_admin():
+    with patch("app.api.deps.settings") as mock_settings:
+        mock_settings.ADMIN_API_KEY = "admin-key"
+        await require_admin(x_admin_key="admin-key")
+
+        with pytest.raises(HTTPException) as exc:
+            await require_admin(x_admin_key="wrong")
+        assert exc.value.status_code == status.HTTP_403_FORBIDDEN
+
+        # Admin endpoints are closed when no key is configured
+        mock_settings.ADMIN_API_KEY = None
+        with pytest.raises(HTTPException):
+            await require_admin(x_admin_key=None)
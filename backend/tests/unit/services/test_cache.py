@@ -1,10 +1,20 @@
-from unittest.mock import AsyncMock, MagicMock
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from sqlalchemy.dialects import postgresql
 
+from app.core.metrics import metrics
 from app.models.db import ExtractionCache
 from app.models.recipe import RecipeData
-from app.services.cache import CacheService
+from app.services.cache import (
+    CacheService,
+    L1Cache,
+    cache_stats,
+    content_key,
+    extraction_l1,
+)
+from app.services.cache_backends import MemoryCacheBackend, PostgresCacheBackend
 
 
 @pytest.fixture
@@ -28,6 +38,7 @@ async def test_get_cached_extraction_hit(cache_service, mock_db):
         "instructions": [],
         "dietary_tags": [],
     }
+    mock_entry.expires_at = datetime.now(timezone.utc) + timedelta(days=1)
 
     mock_execute_result = MagicMock()
     mock_execute_result.scalar_one_or_none.return_value = mock_entry
@@ -39,6 +50,43 @@ async def test_get_cached_extraction_hit(cache_service, mock_db):
     mock_db.execute.assert_called_once()
 
 
+@pytest.mark.asyncio
+async def test_stale_entry_is_served_and_refreshed(cache_service, mock_db):
+    mock_entry = MagicMock()
+    mock_entry.raw_result = {
+        "title": "Stale Recipe",
+        "description": "Desc",
+        "ingredients": [],
+        "instructions": [],
+    }
+    mock_entry.expires_at = datetime.now(timezone.utc) - timedelta(hours=1)
+    mock_execute_result = MagicMock()
+    mock_execute_result.scalar_one_or_none.return_value = mock_entry
+    mock_db.execute.return_value = mock_execute_result
+
+    with patch("app.services.cache.cache_refresher.schedule") as schedule:
+        result = await cache_service.get_cached_extraction("vid123")
+
+    assert result.title == "Stale Recipe"
+    schedule.assert_called_once_with("vid123")
+    assert metrics.counter("cache.l2.stale") == 1
+    # Stale entries never reach L1
+    assert len(extraction_l1) == 0
+
+
+@pytest.mark.asyncio
+async def test_stale_entries_excluded_when_not_allowed(cache_service, mock_db):
+    mock_execute_result = MagicMock()
+    mock_execute_result.scalar_one_or_none.return_value = None
+    mock_db.execute.return_value = mock_execute_result
+
+    await cache_service.get_cached_extraction("vid123", allow_stale=False)
+
+    query = mock_db.execute.call_args.args[0]
+    cutoff = query.compile().params["expires_at_1"]
+    assert cutoff > datetime.now(timezone.utc) - timedelta(minutes=1)
+
+
 @pytest.mark.asyncio
 async def test_get_cached_extraction_miss(cache_service, mock_db):
     mock_execute_result = MagicMock()
@@ -62,11 +110,211 @@ async def test_save_extraction(cache_service, mock_db):
 
     await cache_service.save_extraction("vid456", recipe_data)
 
-    mock_db.merge.assert_called_once()
+    # The key's lock, then a single statement replacing its rows, no SELECT first
+    assert mock_db.execute.call_count == 2
     mock_db.commit.assert_called_once()
+    mock_db.merge.assert_not_called()
+
+    lock, replace = mock_db.execute.call_args_list
+    assert "pg_advisory_xact_lock" in str(lock[0][0])
+    assert len(lock[0][1]["keys"]) == 1
+    stmt = replace[0][0]
+    assert stmt.table.name == ExtractionCache.__tablename__
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "DELETE FROM extraction_cache WHERE (extraction_cache.video_id, " in sql
+    assert "ON CONFLICT" not in sql
+    params = stmt.compile().params
+    assert params["video_id_m0"] == "vid456"
+    assert params["raw_result_m0"]["title"] == "New Recipe"
+    assert params["model_m0"] == cache_service.MODEL_VERSION
+
+
+@pytest.mark.asyncio
+async def test_save_extraction_records_answering_model(cache_service, mock_db):
+    recipe_data = RecipeData(
+        title="New Recipe",
+        description="From the fallback",
+        ingredients=[],
+        instructions=[],
+    )
+
+    await cache_service.save_extraction("vid456", recipe_data, model="gpt-4o-mini")
+
+    params = mock_db.execute.call_args[0][0].compile().params
+    assert params["model_m0"] == "gpt-4o-mini"
+
+
+@pytest.mark.asyncio
+async def test_save_many_writes_in_batches(cache_service, mock_db):
+    recipes = {
+        f"vid{i}": RecipeData(
+            title=f"Recipe {i}", description="", ingredients=[], instructions=[]
+        )
+        for i in range(5)
+    }
+    extraction_l1.set(
+        ("vid0", cache_service.PROMPT_VERSION, cache_service.MODEL_VERSION), b"{}"
+    )
+
+    with patch.object(PostgresCacheBackend, "BATCH_SIZE", 2):
+        await cache_service.save_many(recipes)
+
+    # One lock statement for every key, 5 rows in statements of at most 2,
+    # committed once
+    assert mock_db.execute.call_count == 4
+    mock_db.commit.assert_called_once()
+    lock_keys = mock_db.execute.call_args_list[0][0][1]["keys"]
+    assert lock_keys == sorted(lock_keys) and len(lock_keys) == 5
+    rows = [
+        value
+        for call in mock_db.execute.call_args_list[1:]
+        for key, value in call[0][0].compile().params.items()
+        if key.startswith("video_id")
+    ]
+    assert rows == list(recipes)
+    assert len(extraction_l1) == 0
+
+
+@pytest.mark.asyncio
+async def test_l1_serves_repeat_hits_without_db(cache_service, mock_db):
+    mock_entry = MagicMock()
+    mock_entry.raw_result = {
+        "title": "Cached Recipe",
+        "description": "Desc",
+        "ingredients": [],
+        "instructions": [],
+    }
+    mock_entry.expires_at = datetime.now(timezone.utc) + timedelta(days=1)
+    mock_execute_result = MagicMock()
+    mock_execute_result.scalar_one_or_none.return_value = mock_entry
+    mock_db.execute.return_value = mock_execute_result
+
+    first = await cache_service.get_cached_extraction("vid123")
+    second = await cache_service.get_cached_extraction("vid123")
+
+    assert first == second
+    mock_db.execute.assert_called_once()
+    assert metrics.counter("cache.l1.hit") == 1
+    assert metrics.counter("cache.l2.hit") == 1
+    assert cache_stats()["l1_hit_ratio"] == 0.5
+
+
+@pytest.mark.asyncio
+async def test_save_extraction_invalidates_l1(cache_service):
+    key = ("vid456", cache_service.PROMPT_VERSION, cache_service.MODEL_VERSION)
+    extraction_l1.set(key, b"{}")
+
+    await cache_service.save_extraction(
+        "vid456",
+        RecipeData(title="New", description="", ingredients=[], instructions=[]),
+    )
 
-    # Verify merge was called with an ExtractionCache object
-    merged_obj = mock_db.merge.call_args[0][0]
-    assert isinstance(merged_obj, ExtractionCache)
-    assert merged_obj.video_id == "vid456"
-    assert merged_obj.raw_result["title"] == "New Recipe"
+    assert extraction_l1.get(key) is None
+
+
+def test_l1_evicts_least_recently_used():
+    l1 = L1Cache(max_entries=2, max_bytes=1024, ttl_seconds=60)
+    l1.set("a", b"1")
+    l1.set("b", b"2")
+    l1.get("a")
+    l1.set("c", b"3")
+
+    assert l1.get("b") is None
+    assert l1.get("a") == b"1"
+    assert l1.get("c") == b"3"
+
+
+def test_l1_evicts_by_size():
+    l1 = L1Cache(max_entries=10, max_bytes=10, ttl_seconds=60)
+    l1.set("a", b"x" * 6)
+    l1.set("b", b"y" * 6)
+
+    assert l1.get("a") is None
+    assert l1.bytes == 6
+    l1.set("huge", b"z" * 11)
+    assert l1.get("huge") is None
+
+
+def test_l1_honors_expiry():
+    l1 = L1Cache(max_entries=10, max_bytes=1024, ttl_seconds=60)
+    l1.set("expired", b"1", ttl_seconds=-1)
+    l1.set("short", b"2", ttl_seconds=0.000001)
+
+    assert l1.get("expired") is None
+    assert l1.get("short") is None
+    assert len(l1) == 0
+
+
+@pytest.mark.asyncio
+async def test_get_cached_extractions_batches_misses(cache_service, mock_db):
+    extraction_l1.set(
+        ("vid1", cache_service.PROMPT_VERSION, cache_service.MODEL_VERSION),
+        RecipeData(title="From L1", description="", ingredients=[], instructions=[])
+        .model_dump_json()
+        .encode(),
+    )
+    mock_entry = MagicMock()
+    mock_entry.video_id = "vid2"
+    mock_entry.raw_result = {
+        "title": "From DB",
+        "description": "",
+        "ingredients": [],
+        "instructions": [],
+    }
+    mock_entry.expires_at = datetime.now(timezone.utc) + timedelta(days=1)
+    mock_execute_result = MagicMock()
+    mock_execute_result.scalars.return_value.all.return_value = [mock_entry]
+    mock_db.execute.return_value = mock_execute_result
+
+    found = await cache_service.get_cached_extractions(["vid1", "vid2", "vid3"])
+
+    assert found["vid1"].title == "From L1"
+    assert found["vid2"].title == "From DB"
+    assert "vid3" not in found
+    mock_db.execute.assert_called_once()
+    assert metrics.counter("cache.l2.miss") == 1
+
+
+def test_content_key_ignores_formatting():
+    key = content_key("Add 2 cups of flour. Then, mix!")
+
+    assert key == content_key("add 2 cups of flour\nthen mix")
+    assert key != content_key("Add 3 cups of flour. Then, mix!")
+    assert len(key) == 64
+
+
+@pytest.mark.asyncio
+async def test_content_index_reuses_identical_transcript():
+    video_index = MemoryCacheBackend(max_entries=10)
+    content_index = MemoryCacheBackend(max_entries=10)
+    cache_service = CacheService(
+        db=None, backend=video_index, content_backend=content_index
+    )
+    recipe_data = RecipeData(
+        title="Pancakes", description="", ingredients=[], instructions=[]
+    )
+
+    assert await cache_service.get_cached_by_content("Whisk the eggs.") is None
+    await cache_service.save_extraction(
+        "original123", recipe_data, transcript="Whisk the eggs."
+    )
+
+    found, model = await cache_service.get_cached_by_content("whisk the eggs")
+    assert found.title == "Pancakes"
+    assert model == cache_service.MODEL_VERSION
+    assert metrics.counter("cache.content.hit") == 1
+    assert metrics.counter("cache.content.miss") == 1
+    # Reported apart from video_id lookups
+    assert cache_stats()["content_hit_ratio"] == 0.5
+    assert cache_stats()["l2_hit_ratio"] == 0.0
+    # Kept apart from them too: the video index only ever holds video ids
+    assert len(video_index) == 1 and len(content_index) == 1
+    assert (
+        await video_index.get(
+            "original123",
+            cache_service.PROMPT_VERSION,
+            [model],
+            datetime.now(timezone.utc),
+        )
+        is not None
+    )
@@ -0,0 +1,254 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock
+
+import pytest
+import redis.asyncio as redis
+from sqlalchemy.dialects import postgresql
+
+from app.core.metrics import metrics
+from app.models import user as user_models  # noqa: F401 (maps Recipe.user)
+from app.models.recipe import RecipeData
+from app.services.cache import CacheService, extraction_l1
+from app.services.cache_backends import (
+    CacheEntry,
+    MemoryCacheBackend,
+    PostgresCacheBackend,
+    PostgresContentCacheBackend,
+    RedisCacheBackend,
+    decode_entry,
+    encode_entry,
+    save_lock_key,
+)
+from app.services.extraction_lease import lease_key
+
+NOW = datetime.now(timezone.utc).replace(microsecond=0)
+
+
+def entry(video_id, model="gemini", expires_in=timedelta(days=1), title="Recipe"):
+    return CacheEntry(video_id, "v1", model, {"title": title}, NOW + expires_in)
+
+
+class StandInRedis:
+    """
+    Minimal RESP2 server with the commands the Redis backend uses.
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.expire_at_ms = {}
+        self.commands = []
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"redis://127.0.0.1:{port}/0"
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _read_command(self, reader):
+        header = await reader.readline()
+        if not header:
+            return None
+        args = []
+        for _ in range(int(header[1:])):
+            size = int((await reader.readline())[1:])
+            args.append((await reader.readexactly(size + 2))[:-2])
+        return args
+
+    async def _handle(self, reader, writer):
+        while (args := await self._read_command(reader)) is not None:
+            self.commands.append(args)
+            writer.write(self._execute(args))
+            await writer.drain()
+        writer.close()
+
+    @staticmethod
+    def _bulk(value):
+        return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def _execute(self, args):
+        name = args[0].upper()
+        if name == b"SET":
+            self.data[args[1]] = args[2]
+            options = [arg.upper() for arg in args[3:]]
+            if b"PXAT" in options:
+                self.expire_at_ms[args[1]] = int(args[3 + options.index(b"PXAT") + 1])
+            return b"+OK\r\n"
+        if name == b"GET":
+            return self._bulk(self.data.get(args[1]))
+        if name == b"MGET":
+            values = [self._bulk(self.data.get(key)) for key in args[1:]]
+            return b"*%d\r\n" % len(values) + b"".join(values)
+        return b"+OK\r\n"  # Connection setup (CLIENT SETINFO, SELECT, ...)
+
+
+@pytest.fixture
+async def stand_in():
+    server = StandInRedis()
+    url = await server.start()
+    client = redis.from_url(url)
+    yield server, RedisCacheBackend(client, stale_grace=timedelta(days=7))
+    await client.aclose()
+    await server.stop()
+
+
+def test_entry_encoding_is_compact_and_round_trips():
+    recipe = RecipeData(
+        title="Bread",
+        description="Simple loaf",
+        ingredients=[{"item": "flour", "quantity": "500", "unit": "g"}] * 20,
+        instructions=[{"step_number": i, "instruction": "Knead"} for i in range(10)],
+    )
+    original = CacheEntry("vid", "v1", "gemini", recipe.model_dump(), NOW)
+
+    encoded = encode_entry(original)
+
+    assert len(encoded) < len(json.dumps(original.raw_result))
+    assert decode_entry("vid", "v1", "gemini", encoded) == original
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_returns_newest_valid_entry():
+    backend = MemoryCacheBackend(max_entries=2)
+    await backend.save(entry("vid1", "gemini", timedelta(days=1), "Old"))
+    await backend.save(entry("vid1", "gpt", timedelta(days=2), "New"))
+
+    found = await backend.get("vid1", "v1", ["gemini", "gpt"], valid_after=NOW)
+    assert found.raw_result["title"] == "New"
+    assert await backend.get("vid1", "v1", ["gemini"], NOW + timedelta(days=1)) is None
+
+    await backend.save(entry("vid2"))
+    assert len(backend) == 2  # The oldest write was evicted
+    assert await backend.get("vid1", "v1", ["gemini"], valid_after=NOW) is None
+
+
+@pytest.mark.asyncio
+async def test_saving_a_key_twice_keeps_one_entry():
+    memory = MemoryCacheBackend(max_entries=10)
+    db = AsyncMock()
+    postgres = PostgresCacheBackend(db)
+
+    for backend in (memory, postgres):
+        await backend.save(entry("vid1", title="First"))
+        await backend.save_many(
+            [entry("vid1", title="Second"), entry("vid1", title="Third")]
+        )
+
+    assert len(memory) == 1
+    found = await memory.get("vid1", "v1", ["gemini"], valid_after=NOW)
+    assert found.raw_result == {"title": "Third"}
+
+    # Each write locks the key, then deletes its existing rows in the statement
+    # that inserts the new one, whatever its expires_at
+    statements = [call.args[0] for call in db.execute.await_args_list]
+    assert "pg_advisory_xact_lock" in str(statements[-2])
+    compiled = statements[-1].compile(dialect=postgresql.dialect())
+    sql = str(compiled)
+    assert sql.startswith("WITH superseded AS \n(DELETE FROM extraction_cache")
+    assert "ON CONFLICT" not in sql
+    inserted = [v for k, v in compiled.params.items() if k.startswith("raw_result")]
+    assert inserted == [{"title": "Third"}]
+
+
+@pytest.mark.asyncio
+async def test_content_index_upserts_in_its_own_table():
+    db = AsyncMock()
+
+    await PostgresContentCacheBackend(db).save_many(
+        [entry("a" * 64, title="First"), entry("a" * 64, title="Second")]
+    )
+
+    compiled = db.execute.await_args.args[0].compile(dialect=postgresql.dialect())
+    sql = str(compiled)
+    assert sql.startswith("INSERT INTO extraction_content_cache")
+    assert "ON CONFLICT (content_hash, prompt_version, model) DO UPDATE" in sql
+    inserted = [v for k, v in compiled.params.items() if k.startswith("raw_result")]
+    assert inserted == [{"title": "Second"}]
+    db.commit.assert_awaited_once()
+
+
+def test_save_lock_key_differs_from_extraction_lease():
+    # A lease holder saves while holding the lease on the same key
+    assert save_lock_key("vid1", "v1", "gemini") != lease_key("vid1", "v1", "gemini")
+    assert save_lock_key("vid1", "v1", "gemini") == save_lock_key(
+        "vid1", "v1", "gemini"
+    )
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_against_stand_in_server(stand_in):
+    server, backend = stand_in
+    await backend.save(entry("vid1", "gemini", timedelta(days=1), "Old"))
+    await backend.save(entry("vid1", "gpt", timedelta(days=2), "New"))
+    await backend.save(entry("vid2", "gemini", timedelta(days=-1), "Expired"))
+
+    key = backend.key("vid1", "v1", "gemini").encode()
+    # The server drops entries once the stale grace period is over
+    expected = NOW + timedelta(days=1) + timedelta(days=7)
+    assert server.expire_at_ms[key] == int(expected.timestamp() * 1000)
+
+    found = await backend.get_many(
+        ["vid1", "vid2", "vid3"], "v1", ["gemini", "gpt"], valid_after=NOW
+    )
+
+    assert {video_id: e.raw_result["title"] for video_id, e in found.items()} == {
+        "vid1": "New"
+    }
+    assert found["vid1"].expires_at == NOW + timedelta(days=2)
+    # All six keys were fetched with a single MGET
+    mgets = [args for args in server.commands if args[0].upper() == b"MGET"]
+    assert len(mgets) == 1
+    assert len(mgets[0]) == 7
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_pipelines_large_batches(stand_in):
+    server, backend = stand_in
+    video_ids = [f"vid{i}" for i in range(backend.MGET_CHUNK + 1)]
+
+    found = await backend.get_many(video_ids, "v1", ["gemini"], valid_after=NOW)
+
+    assert found == {}
+    assert sum(1 for args in server.commands if args[0].upper() == b"MGET") == 2
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_saves_many_in_one_pipeline(stand_in):
+    server, backend = stand_in
+
+    await backend.save_many([entry(f"vid{i}") for i in range(3)])
+
+    assert [args[0].upper() for args in server.commands[-3:]] == [b"SET"] * 3
+    found = await backend.get_many(
+        ["vid0", "vid1", "vid2"], "v1", ["gemini"], valid_after=NOW
+    )
+    assert len(found) == 3
+
+
+@pytest.mark.asyncio
+async def test_redis_outage_is_a_miss():
+    # Nothing listens on the port
+    client = redis.from_url("redis://127.0.0.1:1/0")
+    backend = RedisCacheBackend(client, stale_grace=timedelta(days=7))
+
+    assert await backend.get("vid1", "v1", ["gemini"], valid_after=NOW) is None
+    await backend.save(entry("vid1"))
+
+    assert metrics.counter("cache.redis.errors") == 2
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_cache_service_reads_through_backend():
+    service = CacheService(db=None, backend=MemoryCacheBackend(max_entries=10))
+    recipe = RecipeData(title="Stored", description="", ingredients=[], instructions=[])
+
+    await service.save_extraction("vid1", recipe)
+    extraction_l1.clear()
+
+    assert (await service.get_cached_extraction("vid1")).title == "Stored"
+    assert metrics.counter("cache.l2.hit") == 1
@@ -0,0 +1,126 @@
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.core.metrics import metrics
+from app.services.cache_partitions import (
+    CachePartitionManager,
+    add_months,
+    cache_table_stats,
+    partition_month,
+    partition_name,
+)
+
+NOW = datetime(2026, 10, 5, 12, 0, tzinfo=timezone.utc)
+
+
+def test_month_arithmetic_and_names():
+    month = datetime(2026, 11, 1, tzinfo=timezone.utc)
+    assert add_months(month, 2) == datetime(2027, 1, 1, tzinfo=timezone.utc)
+    assert add_months(month, -11) == datetime(2025, 12, 1, tzinfo=timezone.utc)
+    assert partition_name(month) == "extraction_cache_y2026m11"
+    assert partition_month("extraction_cache_y2026m11") == month
+    assert partition_month("extraction_cache_default") is None
+
+
+def make_db(relkind, partitions):
+    db = AsyncMock()
+    statements = []
+
+    async def execute(statement, params=None):
+        sql = str(statement)
+        statements.append(sql)
+        result = MagicMock(rowcount=3)
+        if "relkind" in sql:
+            result.scalar_one_or_none.return_value = relkind
+        elif "pg_inherits" in sql:
+            result.scalars.return_value.all.return_value = partitions
+        return result
+
+    db.execute.side_effect = execute
+    return db, statements
+
+
+def make_manager(db):
+    @asynccontextmanager
+    async def session_factory():
+        yield db
+
+    return CachePartitionManager(
+        months_ahead=2,
+        retention=timedelta(days=7),
+        interval_seconds=3600,
+        session_factory=session_factory,
+    )
+
+
+@pytest.mark.asyncio
+async def test_maintain_creates_future_and_drops_expired_partitions():
+    db, statements = make_db(
+        "p",
+        [
+            "extraction_cache_y2026m08",  # Ended before the grace cutoff
+            "extraction_cache_y2026m09",  # Ended within the grace period
+            "extraction_cache_y2026m10",
+        ],
+    )
+
+    result = await make_manager(db).maintain(now=NOW)
+
+    assert result == {
+        "created": ["extraction_cache_y2026m11", "extraction_cache_y2026m12"],
+        "dropped": ["extraction_cache_y2026m08"],
+    }
+    assert any(
+        "PARTITION OF extraction_cache FOR VALUES FROM ('2026-12-01T00:00:00+00:00') "
+        "TO ('2027-01-01T00:00:00+00:00')" in sql
+        for sql in statements
+    )
+    assert "DROP TABLE IF EXISTS extraction_cache_y2026m08" in statements
+    # Expired content-index rows go on the same schedule
+    assert statements[-1].startswith("DELETE FROM extraction_content_cache")
+    assert metrics.counter("cache.content.pruned") == 3
+    db.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_maintain_skips_unpartitioned_table():
+    db, statements = make_db("r", [])
+
+    result = await make_manager(db).maintain(now=NOW)
+
+    assert result == {"created": [], "dropped": []}
+    assert len(statements) == 1
+    db.commit.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_cache_table_stats_reports_age_ranges():
+    db = AsyncMock()
+    counts = MagicMock()
+    counts.rows, counts.live, counts.stale, counts.expired = 10, 6, 3, 1
+    counts.oldest_created_at = NOW - timedelta(days=40)
+    counts._mapping = {"lt_1d": 2, "lt_7d": 5, "lt_30d": 9}
+    counts_result = MagicMock()
+    counts_result.one.return_value = counts
+    sizes_result = MagicMock()
+    sizes_result.all.return_value = [
+        ("extraction_cache_y2026m10", 8192, 4.0),
+        ("extraction_cache_y2026m11", 16384, -1.0),  # Never analyzed
+    ]
+    db.execute.side_effect = [counts_result, sizes_result]
+
+    stats = await cache_table_stats(db, stale_grace=timedelta(days=7))
+
+    assert stats["rows"] == 10
+    assert stats["stale"] == 3
+    assert stats["bytes"] == 24576
+    assert stats["age_distribution"] == {
+        "lt_1d": 2,
+        "lt_7d": 3,
+        "lt_30d": 4,
+        "older": 1,
+    }
+    assert stats["partitions"][1]["estimated_rows"] == 0
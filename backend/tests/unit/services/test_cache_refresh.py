@@ -0,0 +1,143 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.core.metrics import metrics
+from app.models.recipe import RecipeData
+from app.services.cache_backends import CacheEntry, MemoryCacheBackend
+from app.services.cache_refresh import CacheRefresher
+from app.services.gemini import PROMPT_VERSION
+from app.services.llm_limiter import gemini_limiter
+
+
+def make_refresher(db=None, **overrides):
+    @asynccontextmanager
+    async def session_factory():
+        yield db or AsyncMock()
+
+    options = dict(
+        enabled=True,
+        max_pending=2,
+        min_interval_seconds=0,
+        interval_seconds=3600,
+        ahead_seconds=3600,
+        hot_min_hits=2,
+        batch_size=10,
+        session_factory=session_factory,
+    )
+    options.update(overrides)
+    return CacheRefresher(**options)
+
+
+@pytest.fixture
+async def refresher():
+    refresher = make_refresher()
+    yield refresher
+    await refresher.stop()
+
+
+@pytest.fixture
+def recipe_data():
+    return RecipeData(
+        title="Refreshed", description="", ingredients=[], instructions=[]
+    )
+
+
+@pytest.mark.asyncio
+async def test_refresh_regenerates_entry(refresher, recipe_data):
+    generate = AsyncMock(return_value=recipe_data)
+    with patch("app.services.extraction.ExtractionService.generate", generate):
+        assert refresher.schedule("vid1")
+        await asyncio.wait_for(refresher._queue.join(), 1)
+
+    generate.assert_awaited_once_with("vid1", use_content_cache=False)
+    assert metrics.counter("cache.refresh.completed") == 1
+
+
+@pytest.mark.asyncio
+async def test_schedule_deduplicates_and_drops_when_full(refresher):
+    blocker = asyncio.Event()
+
+    async def generate(self, video_id, deadline=None, use_content_cache=True):
+        await blocker.wait()
+
+    with patch("app.services.extraction.ExtractionService.generate", generate):
+        assert refresher.schedule("vid1")
+        await asyncio.sleep(0.01)  # The worker takes vid1
+        assert not refresher.schedule("vid1")
+        assert refresher.schedule("vid2")
+        assert refresher.schedule("vid3")
+        assert not refresher.schedule("vid4")
+        blocker.set()
+        await asyncio.wait_for(refresher._queue.join(), 1)
+
+    assert metrics.counter("cache.refresh.scheduled") == 3
+    assert metrics.counter("cache.refresh.dropped") == 1
+
+
+@pytest.mark.asyncio
+async def test_refresh_waits_while_llm_is_busy(refresher, recipe_data):
+    generate = AsyncMock(return_value=recipe_data)
+    gemini_limiter.in_flight = int(gemini_limiter.concurrency_limit)
+    with patch("app.services.extraction.ExtractionService.generate", generate):
+        refresher.schedule("vid1")
+        for _ in range(5):
+            await asyncio.sleep(0)
+        generate.assert_not_awaited()
+
+        gemini_limiter.in_flight = 0
+        await asyncio.wait_for(refresher._queue.join(), 1)
+
+    generate.assert_awaited_once()
+    assert metrics.counter("cache.refresh.deferred") >= 1
+
+
+@pytest.mark.asyncio
+async def test_refresh_failure_is_counted(refresher):
+    generate = AsyncMock(side_effect=RuntimeError("boom"))
+    with patch("app.services.extraction.ExtractionService.generate", generate):
+        refresher.schedule("vid1")
+        await asyncio.wait_for(refresher._queue.join(), 1)
+
+    assert metrics.counter("cache.refresh.failed") == 1
+    # A failed refresh can be retried
+    assert "vid1" not in refresher._pending
+
+
+@pytest.mark.asyncio
+async def test_refresh_hot_schedules_expiring_hot_entries():
+    backend = MemoryCacheBackend(max_entries=10)
+    now = datetime.now(timezone.utc)
+    for video_id, expires_in in [
+        ("soon", timedelta(minutes=5)),
+        ("later", timedelta(days=20)),
+    ]:
+        await backend.save(
+            CacheEntry(
+                video_id, PROMPT_VERSION, "gemini-flash-latest", {}, now + expires_in
+            )
+        )
+    refresher = make_refresher()
+    for _ in range(3):
+        refresher.record_hit("soon")
+        refresher.record_hit("later")
+    refresher.record_hit("cold")
+
+    with patch(
+        "app.services.cache.get_cache_backend", return_value=backend
+    ), patch.object(refresher, "schedule", MagicMock(return_value=True)) as schedule:
+        assert await refresher.refresh_hot() == 1
+
+    schedule.assert_called_once_with("soon")
+    # Hit counts decay between scans
+    assert refresher._hits == {"soon": 1, "later": 1}
+
+
+@pytest.mark.asyncio
+async def test_disabled_refresher_does_nothing():
+    refresher = make_refresher(enabled=False)
+    assert not refresher.schedule("vid1")
+    assert refresher._tasks == []
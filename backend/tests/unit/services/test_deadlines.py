@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from app.core.exceptions import ClientDisconnectedError, DeadlineExceededError
+from app.core.metrics import metrics
+from app.services.deadlines import (
+    cancel_on_disconnect,
+    deadline_after,
+    remaining,
+    wait_until,
+)
+
+
+def test_remaining_is_none_without_deadline_and_never_negative():
+    assert remaining(None) is None
+    assert remaining(deadline_after(-5)) == 0.0
+    assert 0 < remaining(deadline_after(5)) <= 5
+
+
+@pytest.mark.asyncio
+async def test_wait_until_raises_for_the_stage_past_the_deadline():
+    with pytest.raises(DeadlineExceededError) as exc_info:
+        await wait_until(asyncio.sleep(10), deadline_after(0.01), "llm")
+    assert exc_info.value.stage == "llm"
+
+    assert await wait_until(asyncio.sleep(0, "done"), None, "llm") == "done"
+
+
+@pytest.mark.asyncio
+async def test_cancel_on_disconnect_cancels_the_work():
+    cancelled = asyncio.Event()
+    connected = True
+
+    async def work():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def is_disconnected():
+        return not connected
+
+    task = asyncio.create_task(cancel_on_disconnect(work(), is_disconnected, 0.01))
+    await asyncio.sleep(0.03)
+    assert not task.done()
+
+    connected = False
+    with pytest.raises(ClientDisconnectedError):
+        await task
+    assert cancelled.is_set()
+    assert metrics.counter("extraction.client_disconnects") == 1
+
+
+@pytest.mark.asyncio
+async def test_cancel_on_disconnect_returns_the_result():
+    async def is_disconnected():
+        return False
+
+    result = await cancel_on_disconnect(
+        asyncio.sleep(0.02, "recipe"), is_disconnected, 0.01
+    )
+    assert result == "recipe"
@@ -0,0 +1,165 @@
+import asyncio
+from contextlib import nullcontext
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.core.exceptions import DeadlineExceededError
+from app.core.metrics import metrics
+from app.models.recipe import RecipeData
+from app.services.cache import CacheService
+from app.services.cache_backends import MemoryCacheBackend
+from app.services.cache_fill import CacheFiller
+from app.services.deadlines import deadline_after
+from app.services.extraction import ExtractionService
+
+TRANSCRIPT = "Today we bake bread. Mix 500 g of flour with water."
+
+
+@pytest.fixture
+def service():
+    service = ExtractionService(AsyncMock())
+    service.cache_service = CacheService(
+        db=None,
+        backend=MemoryCacheBackend(max_entries=10),
+        content_backend=MemoryCacheBackend(max_entries=10),
+    )
+    service.get_transcript = AsyncMock(return_value=TRANSCRIPT)
+    return service
+
+
+@pytest.fixture
+def recipe_data():
+    return RecipeData(title="Bread", description="", ingredients=[], instructions=[])
+
+
+@pytest.mark.asyncio
+async def test_reupload_reuses_extraction_of_identical_transcript(service, recipe_data):
+    with patch(
+        "app.services.extraction.GeminiService.extract_recipe",
+        AsyncMock(return_value=recipe_data),
+    ) as extract:
+        await service._generate("original123")
+        mirrored = await service._generate("mirror45678")
+
+    extract.assert_awaited_once()
+    assert mirrored.title == "Bread"
+    # The mirror now has its own video_id entry
+    assert (await service.get_cached("mirror45678")).title == "Bread"
+
+
+@pytest.mark.asyncio
+async def test_refresh_skips_content_index(service, recipe_data):
+    with patch(
+        "app.services.extraction.GeminiService.extract_recipe",
+        AsyncMock(return_value=recipe_data),
+    ) as extract:
+        await service._generate("original123")
+        # Same transcript, but a refresh must ask the model again
+        await service._generate("original123", use_content_cache=False)
+
+    assert extract.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_session_is_committed_before_model_call(service, recipe_data):
+    async def extract_recipe(self, transcript, video_id, deadline=None):
+        # The request's transaction is over, so its connection is back in the pool
+        service.db.commit.assert_awaited_once()
+        return recipe_data
+
+    with patch("app.services.extraction.GeminiService.extract_recipe", extract_recipe):
+        assert (await service._generate("12345678901")).title == "Bread"
+
+
+@pytest.mark.asyncio
+async def test_abandoned_llm_call_is_finished_for_the_cache(service, recipe_data):
+    answer = asyncio.Event()
+
+    async def slow_extract(self, transcript, video_id, deadline=None):
+        await answer.wait()
+        return recipe_data
+
+    filler = CacheFiller(enabled=True, max_pending=5)
+    filler.session_factory = lambda: nullcontext(None)
+    with patch(
+        "app.services.extraction.GeminiService.extract_recipe", slow_extract
+    ), patch("app.services.extraction.cache_filler", filler), patch(
+        "app.services.cache_fill.CacheService", lambda db: service.cache_service
+    ):
+        request = asyncio.create_task(service._generate("abandoned12"))
+        await asyncio.sleep(0.01)
+        request.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await request
+
+        assert filler.pending == 1
+        answer.set()
+        await asyncio.sleep(0.01)
+
+    assert filler.pending == 0
+    assert metrics.counter("extraction.cancelled.llm") == 1
+    assert metrics.counter("extraction.handoff.saved") == 1
+    assert (await service.get_cached("abandoned12")).title == "Bread"
+
+
+@pytest.mark.asyncio
+async def test_abandoned_llm_call_is_cancelled_without_handoff(service):
+    cancelled = asyncio.Event()
+
+    async def slow_extract(self, transcript, video_id, deadline=None):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    filler = CacheFiller(enabled=False, max_pending=5)
+    with patch(
+        "app.services.extraction.GeminiService.extract_recipe", slow_extract
+    ), patch("app.services.extraction.cache_filler", filler):
+        request = asyncio.create_task(service._generate("abandoned12"))
+        await asyncio.sleep(0.01)
+        request.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await request
+
+    await asyncio.wait_for(cancelled.wait(), 1)
+    assert metrics.counter("extraction.handoff.dropped") == 1
+    assert await service.get_cached("abandoned12") is None
+
+
+@pytest.mark.asyncio
+async def test_coalesced_callers_keep_their_own_deadlines(
+    recipe_data, mock_session_factory
+):
+    answer = asyncio.Event()
+    deadlines = []
+
+    async def generate(self, video_id, deadline=None, use_content_cache=True):
+        deadlines.append(deadline)
+        await answer.wait()
+        return recipe_data
+
+    with patch("app.services.extraction.ExtractionService.generate", generate):
+        service = ExtractionService(AsyncMock(), mock_session_factory)
+        impatient = asyncio.create_task(
+            service.generate_coalesced("12345678901", deadline_after(0.01))
+        )
+        patient = asyncio.create_task(service.generate_coalesced("12345678901"))
+        strict = asyncio.create_task(
+            service.generate_coalesced("12345678901", deadline_after(0.05))
+        )
+
+        # The first caller's deadline doesn't end the shared work...
+        with pytest.raises(DeadlineExceededError):
+            await impatient
+        # ...and a later caller's deadline holds although the work goes on
+        with pytest.raises(DeadlineExceededError):
+            await strict
+        assert not patient.done()
+
+        answer.set()
+        assert (await patient).title == "Bread"
+
+    assert deadlines == [None]
@@ -0,0 +1,111 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.core.exceptions import NoTranscriptError
+from app.models.recipe import RecipeData
+from app.services.extraction_batch import BatchExtractor
+
+
+def recipe(title):
+    return RecipeData(title=title, description="", ingredients=[], instructions=[])
+
+
+@pytest.fixture
+def extractor(mock_session_factory):
+    return BatchExtractor(concurrency=2, session_factory=mock_session_factory)
+
+
+async def collect(extractor, urls):
+    return [result async for result in extractor.run(urls)]
+
+
+@pytest.mark.asyncio
+async def test_batch_streams_cache_hits_first_and_dedupes(extractor):
+    release = asyncio.Event()
+
+    async def slow_extract(video_id):
+        await release.wait()
+        return recipe(f"Fresh {video_id}")
+
+    async def results():
+        out = []
+        async for result in extractor.run(
+            [
+                "https://youtu.be/aaaaaaaaaaa",
+                "https://www.youtube.com/watch?v=aaaaaaaaaaa",  # duplicate
+                "https://youtu.be/bbbbbbbbbbb",
+                "not a url",
+            ]
+        ):
+            out.append(result)
+            if len(out) == 2:
+                release.set()
+        return out
+
+    with patch(
+        "app.services.cache.CacheService.get_cached_extractions",
+        AsyncMock(return_value={"bbbbbbbbbbb": recipe("Cached")}),
+    ), patch(
+        "app.services.extraction_batch.ExtractionService.extract",
+        AsyncMock(side_effect=slow_extract),
+    ) as mock_extract:
+        out = await results()
+
+    assert [r.status for r in out] == ["error", "ok", "ok"]
+    assert out[1].source == "cache"
+    assert out[1].recipe.title == "Cached"
+    assert out[2].source == "extracted"
+    assert out[2].video_id == "aaaaaaaaaaa"
+    mock_extract.assert_awaited_once_with("aaaaaaaaaaa")
+
+
+@pytest.mark.asyncio
+async def test_batch_reports_per_video_errors(extractor):
+    async def extract(video_id):
+        if video_id == "aaaaaaaaaaa":
+            raise NoTranscriptError(video_id)
+        return recipe("Fine")
+
+    with patch(
+        "app.services.cache.CacheService.get_cached_extractions",
+        AsyncMock(return_value={}),
+    ), patch(
+        "app.services.extraction_batch.ExtractionService.extract",
+        AsyncMock(side_effect=extract),
+    ):
+        out = await collect(
+            extractor, ["https://youtu.be/aaaaaaaaaaa", "https://youtu.be/bbbbbbbbbbb"]
+        )
+
+    by_id = {r.video_id: r for r in out}
+    assert by_id["aaaaaaaaaaa"].error_code == "NO_TRANSCRIPT"
+    assert by_id["bbbbbbbbbbb"].status == "ok"
+
+
+@pytest.mark.asyncio
+async def test_batch_respects_concurrency(extractor):
+    running = 0
+    peak = 0
+
+    async def extract(video_id):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return recipe(video_id)
+
+    urls = [f"https://youtu.be/{c * 11}" for c in "abcdef"]
+    with patch(
+        "app.services.cache.CacheService.get_cached_extractions",
+        AsyncMock(return_value={}),
+    ), patch(
+        "app.services.extraction_batch.ExtractionService.extract",
+        AsyncMock(side_effect=extract),
+    ):
+        out = await collect(extractor, urls)
+
+    assert len(out) == 6
+    assert peak == 2
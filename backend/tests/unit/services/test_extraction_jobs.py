@@ -0,0 +1,191 @@
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.core.exceptions import ExtractionQueueFullError, NoTranscriptError
+from app.models.recipe import RecipeData
+from app.services.extraction_jobs import (
+    ExtractionJob,
+    ExtractionJobQueue,
+    JobStatus,
+    MemoryJobStore,
+    PostgresJobStore,
+)
+
+
+@pytest.fixture
+def recipe_data():
+    return RecipeData(
+        title="Queued Recipe",
+        description="From a worker",
+        ingredients=[],
+        instructions=[],
+    )
+
+
+def make_queue(store, session_factory):
+    return ExtractionJobQueue(
+        max_depth=2,
+        concurrency=1,
+        result_ttl_seconds=60,
+        store=store,
+        poll_seconds=0.01,
+        session_factory=session_factory,
+    )
+
+
+@pytest.fixture
+async def job_queue(mock_session_factory):
+    queue = make_queue(MemoryJobStore(), mock_session_factory)
+    yield queue
+    await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_job_completes(job_queue, recipe_data):
+    with patch(
+        "app.services.extraction_jobs.ExtractionService.extract",
+        AsyncMock(return_value=recipe_data),
+    ):
+        job = await job_queue.submit("12345678901", "https://youtu.be/12345678901")
+        assert job.status == JobStatus.PENDING
+
+        await job_queue.wait(job, timeout=1)
+
+    assert job.status == JobStatus.COMPLETED
+    assert job.result.title == "Queued Recipe"
+    assert await job_queue.get(job.id) is job
+
+
+@pytest.mark.asyncio
+async def test_job_records_no_transcript(job_queue):
+    with patch(
+        "app.services.extraction_jobs.ExtractionService.extract",
+        AsyncMock(side_effect=NoTranscriptError("12345678901")),
+    ):
+        job = await job_queue.submit("12345678901", "https://youtu.be/12345678901")
+        await job_queue.wait(job, timeout=1)
+
+    assert job.status == JobStatus.FAILED
+    assert job.error_code == "NO_TRANSCRIPT"
+
+
+@pytest.mark.asyncio
+async def test_queue_full(job_queue):
+    blocker = asyncio.Event()
+
+    async def slow_extract(*args, **kwargs):
+        await blocker.wait()
+
+    with patch(
+        "app.services.extraction_jobs.ExtractionService.extract",
+        AsyncMock(side_effect=slow_extract),
+    ):
+        jobs = [await job_queue.submit("a" * 11, "url")]
+        await asyncio.sleep(0)  # Worker picks up the first job
+        jobs.append(await job_queue.submit("b" * 11, "url"))
+        jobs.append(await job_queue.submit("c" * 11, "url"))
+
+        with pytest.raises(ExtractionQueueFullError):
+            await job_queue.submit("d" * 11, "url")
+
+        blocker.set()
+        for job in jobs:
+            await job_queue.wait(job, timeout=1)
+            assert job.is_finished
+
+
+@pytest.mark.asyncio
+async def test_wait_times_out_for_pending_job(job_queue):
+    blocker = asyncio.Event()
+
+    async def slow_extract(*args, **kwargs):
+        await blocker.wait()
+
+    with patch(
+        "app.services.extraction_jobs.ExtractionService.extract",
+        AsyncMock(side_effect=slow_extract),
+    ):
+        job = await job_queue.submit("12345678901", "url")
+        await job_queue.wait(job, timeout=0.01)
+        assert not job.is_finished
+        blocker.set()
+
+
+@pytest.mark.asyncio
+async def test_completed_job_is_pollable(job_queue):
+    job = await job_queue.add_completed("12345678901", "url", MagicMock())
+    assert job.status == JobStatus.COMPLETED
+    assert await job_queue.get(job.id) is job
+    assert await job_queue.get("unknown") is None
+
+
+@pytest.mark.asyncio
+async def test_job_is_pollable_from_another_replica(recipe_data, mock_session_factory):
+    store = MemoryJobStore()
+    worker = make_queue(store, mock_session_factory)
+    other = make_queue(store, mock_session_factory)
+    blocker = asyncio.Event()
+
+    async def slow_extract(*args, **kwargs):
+        await blocker.wait()
+        return recipe_data
+
+    with patch(
+        "app.services.extraction_jobs.ExtractionService.extract",
+        AsyncMock(side_effect=slow_extract),
+    ):
+        job = await worker.submit("12345678901", "url")
+        polled = await other.get(job.id)
+        assert polled is not None
+
+        waiter = asyncio.create_task(other.wait(polled, timeout=1))
+        blocker.set()
+        polled = await waiter
+
+    assert polled.status == JobStatus.COMPLETED
+    assert polled.result.title == "Queued Recipe"
+    await worker.stop()
+
+
+@pytest.mark.asyncio
+async def test_stop_fails_unfinished_jobs(mock_session_factory):
+    store = MemoryJobStore()
+    queue = make_queue(store, mock_session_factory)
+    blocker = asyncio.Event()
+
+    async def slow_extract(*args, **kwargs):
+        await blocker.wait()
+
+    with patch(
+        "app.services.extraction_jobs.ExtractionService.extract",
+        AsyncMock(side_effect=slow_extract),
+    ):
+        job = await queue.submit("12345678901", "url")
+        await asyncio.sleep(0)
+        await queue.stop()
+
+    stored = await store.get(job.id)
+    assert stored.status == JobStatus.FAILED
+    assert stored.error_code == "INTERRUPTED"
+
+
+@pytest.mark.asyncio
+async def test_postgres_store_upserts_by_id():
+    db = AsyncMock()
+
+    @asynccontextmanager
+    async def session_factory():
+        yield db
+
+    job = ExtractionJob("12345678901", "url")
+    await PostgresJobStore(session_factory).save(job)
+
+    stmt = db.execute.await_args.args[0]
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "INSERT INTO extraction_jobs" in sql
+    assert "ON CONFLICT (id) DO UPDATE SET status = excluded.status" in sql
+    db.commit.assert_awaited_once()
@@ -0,0 +1,113 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.core.metrics import metrics
+from app.services.extraction_lease import ExtractionLease, lease_key
+
+
+def make_engine(acquired_results):
+    """
+    Engine whose connections answer pg_try_advisory_xact_lock with the given values.
+    Connections handed out are kept in `engine.connections`.
+    """
+    results = iter(acquired_results)
+    engine = MagicMock()
+    engine.connections = []
+
+    async def connect():
+        conn = AsyncMock()
+        conn.begin.return_value = AsyncMock()
+        lock_result = MagicMock()
+        lock_result.scalar.return_value = next(results)
+        conn.execute.side_effect = [MagicMock(), lock_result]
+        engine.connections.append(conn)
+        return conn
+
+    engine.connect = AsyncMock(side_effect=connect)
+    return engine
+
+
+def make_lease(engine, wait_seconds=1.0):
+    return ExtractionLease(
+        engine, ttl_seconds=5, wait_seconds=wait_seconds, poll_seconds=0.001
+    )
+
+
+def test_lease_key_is_stable_signed_64_bit():
+    key = lease_key("12345678901", "v1", "gemini-flash-latest")
+    assert key == lease_key("12345678901", "v1", "gemini-flash-latest")
+    assert key != lease_key("12345678901", "v2", "gemini-flash-latest")
+    assert -(2**63) <= key < 2**63
+
+
+@pytest.mark.asyncio
+async def test_hold_locks_in_a_bounded_transaction_and_releases():
+    engine = make_engine([True])
+
+    async with make_lease(engine).hold(42) as acquired:
+        assert acquired
+        (conn,) = engine.connections
+        conn.begin.return_value.commit.assert_not_awaited()
+
+    timeout, lock = [call.args for call in conn.execute.await_args_list]
+    assert str(timeout[0]) == "SET LOCAL idle_in_transaction_session_timeout = 5000"
+    assert str(lock[0]) == "SELECT pg_try_advisory_xact_lock(:key)"
+    assert lock[1] == {"key": 42}
+    # Ending the transaction releases the lock; the connection goes back
+    conn.begin.return_value.commit.assert_awaited_once()
+    conn.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_hold_reports_lock_taken_elsewhere():
+    engine = make_engine([False])
+
+    async with make_lease(engine).hold(42) as acquired:
+        assert not acquired
+
+    engine.connections[0].close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_winner_runs_work():
+    lease = make_lease(make_engine([True]))
+    work = AsyncMock(return_value="fresh")
+    check = AsyncMock(return_value=None)
+
+    assert await lease.run(1, work, check) == "fresh"
+    work.assert_awaited_once()
+    assert metrics.counter("extraction.lease.acquired") == 1
+
+
+@pytest.mark.asyncio
+async def test_loser_reads_result_from_cache():
+    lease = make_lease(make_engine([False]))
+    work = AsyncMock(return_value="fresh")
+    check = AsyncMock(return_value="cached")
+
+    assert await lease.run(1, work, check) == "cached"
+    work.assert_not_awaited()
+    assert metrics.counter("extraction.lease.waits") == 1
+
+
+@pytest.mark.asyncio
+async def test_loser_gives_up_after_wait_timeout():
+    lease = make_lease(make_engine([False] * 1000), wait_seconds=0.01)
+    work = AsyncMock(return_value="fresh")
+    check = AsyncMock(return_value=None)
+
+    assert await lease.run(1, work, check) == "fresh"
+    assert metrics.counter("extraction.lease.wait_timeouts") == 1
+
+
+@pytest.mark.asyncio
+async def test_lease_fails_open_when_database_unavailable():
+    engine = MagicMock()
+    engine.connect = AsyncMock(side_effect=OSError("connection refused"))
+    lease = make_lease(engine)
+    work = AsyncMock(return_value="fresh")
+    check = AsyncMock(return_value=None)
+
+    assert await lease.run(1, work, check) == "fresh"
+    assert metrics.counter("extraction.lease.unavailable") == 1
@@ -0,0 +1,230 @@
+import asyncio
+import json
+import logging
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.core.exceptions import NoTranscriptError
+from app.services.extraction_progress import (
+    ExtractionProgress,
+    StageTimings,
+    report_partial,
+    stage,
+    stream_extraction,
+    timing,
+    tracking,
+    without_partials,
+)
+from app.services.llm_providers import GeminiProvider
+
+
+def parse_sse(chunks):
+    events = []
+    for chunk in chunks:
+        event, data = chunk.strip().split("\n")
+        events.append((event.removeprefix("event: "), json.loads(data[6:])))
+    return events
+
+
+async def collect(video_url, session_factory):
+    return parse_sse(
+        [chunk async for chunk in stream_extraction(video_url, session_factory)]
+    )
+
+
+@pytest.mark.asyncio
+async def test_stream_reports_stages_partials_and_result(mock_session_factory):
+    async def run(self, video_url, deadline=None):
+        with stage("transcript") as info:
+            info["source"] = "store"
+        with stage("llm"):
+            report_partial({"title": "Soup"})
+            report_partial({"title": "Soup"})  # Unchanged: not sent again
+            report_partial({"title": "Soup", "ingredients": [{"item": "leek"}]})
+        result = MagicMock()
+        result.model_dump.return_value = {"title": "Soup"}
+        return result
+
+    with patch("app.services.extraction.ExtractionService.run", run):
+        events = await collect("https://youtu.be/12345678901", mock_session_factory)
+
+    assert [(name, data.get("stage"), data.get("status")) for name, data in events] == [
+        ("stage", "transcript", "started"),
+        ("stage", "transcript", "done"),
+        ("stage", "llm", "started"),
+        ("partial", None, None),
+        ("partial", None, None),
+        ("stage", "llm", "done"),
+        ("result", None, None),
+    ]
+    assert events[1][1]["source"] == "store"
+    assert "elapsed_ms" in events[1][1]
+    assert events[-1][1] == {"title": "Soup"}
+
+
+@pytest.mark.asyncio
+async def test_stream_reports_failed_stage_and_error_code(mock_session_factory):
+    async def run(self, video_url, deadline=None):
+        with stage("transcript"):
+            raise NoTranscriptError("12345678901")
+
+    with patch("app.services.extraction.ExtractionService.run", run):
+        events = await collect("https://youtu.be/12345678901", mock_session_factory)
+
+    assert events[1] == ("stage", events[1][1])
+    assert events[1][1]["status"] == "failed"
+    assert events[-1][0] == "error"
+    assert events[-1][1]["code"] == "NO_TRANSCRIPT"
+
+
+@pytest.mark.asyncio
+async def test_stream_cancels_extraction_when_client_leaves(mock_session_factory):
+    cancelled = asyncio.Event()
+
+    async def run(self, video_url, deadline=None):
+        try:
+            with stage("llm"):
+                await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with patch("app.services.extraction.ExtractionService.run", run):
+        stream = stream_extraction("https://youtu.be/12345678901", mock_session_factory)
+        await stream.__anext__()  # llm started
+        await stream.aclose()
+
+    await asyncio.wait_for(cancelled.wait(), 1)
+
+
+@pytest.mark.asyncio
+async def test_coalesced_callers_all_get_the_shared_progress(mock_session_factory):
+    from app.services import extraction
+    from app.services.extraction import ExtractionService
+
+    in_llm = asyncio.Event()
+    answer = asyncio.Event()
+    recipe = MagicMock()
+
+    async def generate(self, video_id, deadline=None, use_content_cache=True):
+        with stage("transcript"):
+            pass
+        with stage("llm"):
+            report_partial({"title": "Soup"})
+            in_llm.set()
+            await answer.wait()
+            report_partial({"title": "Soup", "ingredients": [{"item": "leek"}]})
+        return recipe
+
+    async def watch(progress):
+        with tracking(progress):
+            service = ExtractionService(AsyncMock(), mock_session_factory)
+            return await service.generate_coalesced("12345678901")
+
+    async def events(progress):
+        progress.close()
+        return parse_sse([chunk async for chunk in progress.events()])
+
+    leader_progress, follower_progress = ExtractionProgress(), ExtractionProgress()
+    with patch("app.services.extraction.ExtractionService.generate", generate):
+        leader = asyncio.create_task(watch(leader_progress))
+        await in_llm.wait()
+        # Joins the leader's extraction halfway through the model call
+        follower = asyncio.create_task(watch(follower_progress))
+        await asyncio.sleep(0)
+        answer.set()
+        assert await leader is recipe
+        assert await follower is recipe
+
+    expected = [
+        ("stage", {"stage": "transcript", "status": "started"}),
+        ("stage", "transcript", "done"),
+        ("stage", {"stage": "llm", "status": "started"}),
+        ("partial", {"title": "Soup"}),
+        ("partial", {"title": "Soup", "ingredients": [{"item": "leek"}]}),
+        ("stage", "llm", "done"),
+    ]
+    for progress in (leader_progress, follower_progress):
+        got = await events(progress)
+        assert [
+            (
+                (name, data["stage"], data["status"])
+                if "elapsed_ms" in data
+                else (name, data)
+            )
+            for name, data in got
+        ] == expected
+    assert extraction._flight_progress == {}
+
+
+class FakeChunk:
+    def __init__(self, text):
+        self.text = text
+
+
+@pytest.mark.asyncio
+async def test_gemini_provider_streams_partials_while_tracked():
+    text = json.dumps({"title": "Stew", "ingredients": [{"item": "beef"}]})
+
+    async def chunks():
+        for start in range(0, len(text), 10):
+            yield FakeChunk(text[start : start + 10])
+
+    client = MagicMock()
+    client.aio.models.generate_content_stream = AsyncMock(return_value=chunks())
+    provider = GeminiProvider(client)
+    progress = ExtractionProgress()
+
+    with tracking(progress):
+        assert await provider.generate("prompt") == text
+
+    client.aio.models.generate_content.assert_not_called()
+    progress.close()
+    events = [chunk async for chunk in progress.events()]
+    partials = [json.loads(event.split("data: ")[1]) for event in events]
+    assert len(partials) > 1
+    assert partials[-1] == json.loads(text)
+
+
+@pytest.mark.asyncio
+async def test_gemini_provider_does_not_stream_untracked_or_chunked_calls():
+    client = MagicMock()
+    client.aio.models.generate_content = AsyncMock(return_value=FakeChunk("{}"))
+    provider = GeminiProvider(client)
+
+    await provider.generate("prompt")
+    with tracking(ExtractionProgress()), without_partials():
+        await provider.generate("prompt")
+
+    assert client.aio.models.generate_content.await_count == 2
+    client.aio.models.generate_content_stream.assert_not_called()
+
+
+def test_timing_records_stages_and_logs_them(caplog):
+    timings = StageTimings()
+    with caplog.at_level(logging.INFO, logger="chefstream"):
+        with pytest.raises(NoTranscriptError):
+            with timing(timings, route="POST /extract", video_url="url"):
+                with stage("cache_check"):
+                    pass
+                with stage("transcript"):
+                    raise NoTranscriptError("12345678901")
+
+    assert list(timings.stages) == ["cache_check", "transcript"]
+    header = timings.server_timing()
+    assert header.startswith("cache_check;dur=")
+    assert ", transcript;dur=" in header
+    assert ", total;dur=" in header
+
+    (record,) = [r for r in caplog.records if r.message == "Extraction stage timings"]
+    assert record.props["route"] == "POST /extract"
+    assert record.props["outcome"] == "NoTranscriptError"
+    assert set(record.props) >= {"cache_check_ms", "transcript_ms", "total_ms"}
+
+
+def test_stages_outside_timing_are_not_recorded():
+    timings = StageTimings()
+    with stage("llm"):
+        pass
+    assert timings.stages == {}
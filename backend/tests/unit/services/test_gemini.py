@@ -1,8 +1,18 @@
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from app.services.gemini import GeminiService
+from app.core.metrics import metrics
+from app.models.recipe import Ingredient, InstructionStep, RecipeData
+from app.services.gemini import (
+    GENERATION_CONFIG,
+    PROMPT_VERSION,
+    GeminiService,
+    merge_partial_recipes,
+    split_transcript,
+)
+from app.services.llm_ledger import llm_ledger
 
 
 @pytest.fixture
@@ -15,6 +25,8 @@ def gemini_service():
 @pytest.mark.asyncio
 async def test_generate_recipe_success(mock_client_cls, mock_settings):
     mock_settings.GEMINI_API_KEY = "mock_key"
+    mock_settings.OPENAI_API_KEY = None
+    mock_settings.GEMINI_CHUNK_THRESHOLD_CHARS = 30000
     service = GeminiService()
 
     mock_client = mock_client_cls.return_value
@@ -35,6 +47,53 @@ async def test_generate_recipe_success(mock_client_cls, mock_settings):
     assert result.title == "Test Recipe"
     assert result.ingredients[0].item == "Egg"
     assert result.instructions[0].duration_seconds == 60
+    # JSON mode with the RecipeData schema
+    call = mock_client.aio.models.generate_content.call_args
+    assert call.kwargs["config"] is GENERATION_CONFIG
+    assert GENERATION_CONFIG.response_mime_type == "application/json"
+    assert service.answered_by == "gemini-flash-latest"
+
+
+@patch("app.services.gemini.settings")
+@patch("google.genai.Client")
+@pytest.mark.asyncio
+async def test_extraction_tokens_recorded_in_ledger(mock_client_cls, mock_settings):
+    mock_settings.GEMINI_API_KEY = "mock_key"
+    mock_settings.OPENAI_API_KEY = None
+    mock_settings.GEMINI_CHUNK_THRESHOLD_CHARS = 30000
+    service = GeminiService()
+
+    mock_client = mock_client_cls.return_value
+    mock_client.aio.models.generate_content = AsyncMock(
+        return_value=SimpleNamespace(
+            text='{"title": "Soup", "ingredients": [], "instructions": []}',
+            usage_metadata=SimpleNamespace(
+                prompt_token_count=900,
+                candidates_token_count=150,
+                thoughts_token_count=50,
+            ),
+        )
+    )
+
+    await service.extract_recipe("Transcript", "12345678901")
+
+    [entry] = llm_ledger._pending
+    assert (entry.provider, entry.model) == ("gemini", "gemini-flash-latest")
+    assert (entry.video_id, entry.prompt_version) == ("12345678901", PROMPT_VERSION)
+    assert (entry.outcome, entry.prompt_tokens, entry.output_tokens) == ("ok", 900, 200)
+    assert entry.cost_usd is not None
+
+
+@patch("app.services.gemini.settings")
+@patch("google.genai.Client")
+def test_client_shared_across_instances(mock_client_cls, mock_settings):
+    mock_settings.GEMINI_API_KEY = "mock_key"
+    mock_settings.OPENAI_API_KEY = None
+
+    first, second = GeminiService(), GeminiService()
+
+    assert first.client is second.client
+    mock_client_cls.assert_called_once_with(api_key="mock_key")
 
 
 @patch("app.services.gemini.settings")
@@ -42,6 +101,8 @@ async def test_generate_recipe_success(mock_client_cls, mock_settings):
 @pytest.mark.asyncio
 async def test_extract_recipe_error_handling(mock_client_cls, mock_settings):
     mock_settings.GEMINI_API_KEY = "mock_key"
+    mock_settings.OPENAI_API_KEY = None
+    mock_settings.GEMINI_CHUNK_THRESHOLD_CHARS = 30000
     service = GeminiService()
 
     mock_client = mock_client_cls.return_value
@@ -53,18 +114,95 @@ async def test_extract_recipe_error_handling(mock_client_cls, mock_settings):
 
 @pytest.mark.asyncio
 async def test_chunking_limit(gemini_service):
-    # Verify it limits transcript length to avoid context issues
-    # GeminiService uses transcript[:30000]
+    # Long transcripts are split into chunks instead of being truncated
     with patch.object(gemini_service, "client") as mock_client:
         mock_response = MagicMock()
         mock_response.text = '{"title": "test", "ingredients": [], "instructions": []}'
         mock_client.aio.models.generate_content = AsyncMock(return_value=mock_response)
 
-        long_transcript = "A" * 50000
+        sentences = [f"Step {i} add {i} grams of salt." for i in range(3000)]
+        long_transcript = " ".join(sentences)
+        assert len(long_transcript) > 30000
+
         await gemini_service.extract_recipe(long_transcript, "vid")
 
-        # Check the call args of generate_content
-        call_args = mock_client.aio.models.generate_content.call_args.kwargs["contents"]
-        assert len(long_transcript) > 30000
-        assert "A" * 30000 in call_args
-        assert "A" * 30001 not in call_args
+        calls = mock_client.aio.models.generate_content.call_args_list
+        assert len(calls) > 1
+        prompts = "".join(call.kwargs["contents"] for call in calls)
+        # Nothing is dropped and no sentence is cut in half
+        assert all(sentence in prompts for sentence in sentences)
+
+
+@pytest.mark.asyncio
+async def test_failed_chunk_fails_extraction(gemini_service):
+    # A recipe missing a chunk's ingredients and steps must not look like a success
+    async def generate_content(model, contents, config):
+        if "This is part 2 of" in contents:
+            raise RuntimeError("chunk failed")
+        response = MagicMock()
+        response.text = '{"title": "test", "ingredients": [], "instructions": []}'
+        return response
+
+    with patch.object(gemini_service, "client") as mock_client:
+        mock_client.aio.models.generate_content = generate_content
+        sentences = [f"Step {i} add {i} grams of salt." for i in range(3000)]
+
+        with pytest.raises(RuntimeError, match="chunk failed"):
+            await gemini_service.extract_recipe(" ".join(sentences), "vid")
+
+    assert metrics.counter("gemini.chunk_failures") == 1
+
+
+def test_split_transcript_sentence_boundaries():
+    text = "Chop the onion. Fry it gently! Is it golden? Add the garlic."
+    chunks = split_transcript(text, 32)
+
+    assert chunks == ["Chop the onion. Fry it gently!", "Is it golden? Add the garlic."]
+
+
+def test_split_transcript_without_punctuation():
+    text = " ".join(["word"] * 100)
+    chunks = split_transcript(text, 50)
+
+    assert all(len(chunk) <= 50 for chunk in chunks)
+    assert " ".join(chunks) == text
+
+
+def test_merge_partial_recipes():
+    first = RecipeData(
+        title="Pancakes",
+        description="Fluffy pancakes",
+        servings=4,
+        ingredients=[Ingredient(item="Flour", quantity="200", unit="g")],
+        instructions=[InstructionStep(step_number=1, instruction="Mix flour")],
+        dietary_tags=["Vegetarian"],
+    )
+    second = RecipeData(
+        title="Unknown Recipe",
+        description="No description",
+        cook_time_minutes=10,
+        ingredients=[
+            Ingredient(item="flour", notes="sifted"),
+            Ingredient(item="Milk", quantity="300", unit="ml"),
+        ],
+        instructions=[
+            InstructionStep(step_number=1, instruction="Mix flour"),
+            InstructionStep(step_number=2, instruction="Fry"),
+        ],
+        dietary_tags=["Vegetarian", "Quick"],
+    )
+
+    recipe = merge_partial_recipes([first, second])
+
+    assert recipe.title == "Pancakes"
+    assert recipe.servings == 4
+    assert recipe.cook_time_minutes == 10
+    assert [(i.item, i.quantity, i.notes) for i in recipe.ingredients] == [
+        ("Flour", "200", "sifted"),
+        ("Milk", "300", None),
+    ]
+    assert [(s.step_number, s.instruction) for s in recipe.instructions] == [
+        (1, "Mix flour"),
+        (2, "Fry"),
+    ]
+    assert recipe.dietary_tags == ["Vegetarian", "Quick"]
@@ -0,0 +1,158 @@
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.core.metrics import metrics
+from app.models import user as user_models  # noqa: F401 (maps Recipe.user)
+from app.services.llm_ledger import LedgerEntry, LLMLedger, call_cost, llm_spend_by_day
+
+PRICES = {"model-a": (1.0, 4.0)}
+
+
+def make_entry(**overrides):
+    options = dict(
+        provider="gemini",
+        model="model-a",
+        prompt_version="v1",
+        outcome="ok",
+        latency_ms=120.0,
+        video_id="12345678901",
+        prompt_tokens=1000,
+        output_tokens=500,
+    )
+    options.update(overrides)
+    return LedgerEntry(**options)
+
+
+def make_ledger(db, **overrides):
+    @asynccontextmanager
+    async def session_factory():
+        yield db
+
+    options = dict(
+        enabled=True,
+        batch_size=2,
+        flush_interval_seconds=60.0,
+        max_pending=3,
+        prices=PRICES,
+        session_factory=session_factory,
+    )
+    options.update(overrides)
+    return LLMLedger(**options)
+
+
+def test_call_cost():
+    assert call_cost("model-a", 1_000_000, 500_000, PRICES) == 3.0
+    assert call_cost("unknown", 1000, 500, PRICES) is None
+    assert call_cost("model-a", None, None, PRICES) is None
+
+
+@pytest.mark.asyncio
+async def test_record_prices_and_flushes_in_batches():
+    db = AsyncMock()
+    ledger = make_ledger(db)
+
+    for _ in range(3):
+        ledger.record(make_entry())
+
+    assert ledger.pending == 3
+    assert await ledger.flush() == 3
+    assert ledger.pending == 0
+    # Two multi-row INSERTs: a full batch, then the rest
+    batches = [call.args[1] for call in db.execute.await_args_list]
+    assert [len(batch) for batch in batches] == [2, 1]
+    assert batches[0][0]["cost_usd"] == pytest.approx(0.003)
+    # Rows carry the time of the call, not of the flush
+    assert batches[0][0]["created_at"] <= batches[1][0]["created_at"]
+    assert db.commit.await_count == 2
+    assert metrics.counter("llm.ledger.written") == 3
+
+
+@pytest.mark.asyncio
+async def test_record_drops_past_max_pending():
+    ledger = make_ledger(AsyncMock())
+
+    for _ in range(4):
+        ledger.record(make_entry())
+
+    assert ledger.pending == 3
+    assert metrics.counter("llm.ledger.dropped") == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_write_is_kept_for_retry_not_raised():
+    db = AsyncMock()
+    db.execute.side_effect = ConnectionError("database is down")
+    ledger = make_ledger(db)
+    ledger.record(make_entry())
+
+    assert await ledger.flush() == 0
+    assert ledger.pending == 1
+    assert metrics.counter("llm.ledger.failed") == 1
+    assert metrics.counter("llm.ledger.dropped") == 0
+
+    db.execute.side_effect = None
+    assert await ledger.flush() == 1
+    assert ledger.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_outage_keeps_entries_up_to_max_pending():
+    db = AsyncMock()
+    ledger = make_ledger(db)
+
+    async def failing_write(*args):
+        # Calls keep being recorded while the first write hangs, then fails
+        if db.execute.await_count == 1:
+            for video_id in "cde":
+                ledger.record(make_entry(video_id=video_id))
+        raise ConnectionError("database is down")
+
+    db.execute.side_effect = failing_write
+    ledger.record(make_entry(video_id="a"))
+    ledger.record(make_entry(video_id="b"))
+
+    assert await ledger.flush() == 0
+    # The failed batch goes back in front; the newest entry doesn't fit
+    assert [entry.video_id for entry in ledger._pending] == ["a", "b", "c"]
+    assert metrics.counter("llm.ledger.dropped") == 2
+
+    # Still down at shutdown: what's left is lost, and counted
+    await ledger.stop()
+    assert ledger.pending == 0
+    assert metrics.counter("llm.ledger.dropped") == 5
+
+
+@pytest.mark.asyncio
+async def test_writer_flushes_full_batch_and_on_stop():
+    db = AsyncMock()
+    ledger = make_ledger(db)
+    ledger.start()
+
+    ledger.record(make_entry())
+    ledger.record(make_entry(outcome="cancelled", prompt_tokens=None))
+    for _ in range(10):
+        await asyncio.sleep(0)
+    assert db.execute.await_count == 1
+
+    ledger.record(make_entry())
+    await ledger.stop()
+
+    assert db.execute.await_count == 2
+    assert ledger.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_spend_by_day_query():
+    db = AsyncMock()
+    db.execute.return_value = MagicMock(all=MagicMock(return_value=[]))
+
+    assert await llm_spend_by_day(db, days=7) == []
+
+    sql = str(db.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "percentile_cont" in sql
+    assert "WITHIN GROUP (ORDER BY llm_calls.latency_ms)" in sql
+    assert "GROUP BY" in sql and "llm_calls.prompt_version" in sql
@@ -0,0 +1,164 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.exceptions import LLMOverloadedError
+from app.core.metrics import metrics
+from app.services.llm_limiter import LLMLimiter, is_overload_error
+
+
+class FakeAPIError(Exception):
+    def __init__(self, code):
+        self.code = code
+        super().__init__(f"{code} error")
+
+
+def make_limiter(**overrides):
+    options = dict(
+        rate_per_second=1000.0,
+        burst=100,
+        min_concurrency=1,
+        max_concurrency=4,
+        decrease_factor=0.5,
+        max_retries=3,
+        backoff_base_seconds=0.001,
+        backoff_max_seconds=0.01,
+        queue_timeout_seconds=1.0,
+    )
+    options.update(overrides)
+    return LLMLimiter("test", **options)
+
+
+def test_is_overload_error():
+    assert is_overload_error(FakeAPIError(429))
+    assert is_overload_error(FakeAPIError(503))
+    assert not is_overload_error(FakeAPIError(400))
+    assert not is_overload_error(ValueError("bad json"))
+
+
+@pytest.mark.asyncio
+async def test_retries_overload_and_adapts_limits():
+    limiter = make_limiter()
+    responses = [FakeAPIError(429), FakeAPIError(503), "ok"]
+
+    async def flaky():
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    assert await limiter.call(flaky) == "ok"
+
+    # Two multiplicative cuts (4 -> 2 -> 1), then one additive step back up
+    assert limiter.concurrency_limit == pytest.approx(2.0)
+    assert limiter.rate == pytest.approx(500.0)
+    assert metrics.counter("llm.test.throttled") == 2
+    assert metrics.counter("llm.test.retries") == 2
+    assert metrics.gauge("llm.test.concurrency_limit") == pytest.approx(2.0)
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_non_overload_errors_are_not_retried():
+    limiter = make_limiter()
+    calls = 0
+
+    async def broken():
+        nonlocal calls
+        calls += 1
+        raise ValueError("bad response")
+
+    with pytest.raises(ValueError):
+        await limiter.call(broken)
+
+    assert calls == 1
+    assert limiter.concurrency_limit == 4
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_retries():
+    limiter = make_limiter(max_retries=2)
+
+    async def throttled():
+        raise FakeAPIError(429)
+
+    with pytest.raises(FakeAPIError):
+        await limiter.call(throttled)
+
+    assert metrics.counter("llm.test.throttled") == 3
+    assert limiter.concurrency_limit == 1
+
+
+@pytest.mark.asyncio
+async def test_no_retry_past_deadline(monkeypatch):
+    limiter = make_limiter(backoff_base_seconds=10, backoff_max_seconds=10)
+    # Full jitter: take the top of the range so the backoff overshoots the deadline
+    monkeypatch.setattr("app.services.llm_limiter.random.uniform", lambda a, b: b)
+    calls = 0
+
+    async def throttled():
+        nonlocal calls
+        calls += 1
+        raise FakeAPIError(429)
+
+    with pytest.raises(FakeAPIError):
+        await limiter.call(throttled, deadline=time.monotonic() + 0.05)
+
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit():
+    limiter = make_limiter(max_concurrency=2)
+    running = peak = 0
+
+    async def work():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return "ok"
+
+    results = await asyncio.gather(*(limiter.call(work) for _ in range(6)))
+
+    assert results == ["ok"] * 6
+    assert peak == 2
+    assert metrics.snapshot()["timings"]["llm.test.queue_wait_ms"]["count"] == 6
+
+
+@pytest.mark.asyncio
+async def test_queue_timeout():
+    limiter = make_limiter(max_concurrency=1, queue_timeout_seconds=0.02)
+    release = asyncio.Event()
+
+    async def blocked():
+        await release.wait()
+
+    holder = asyncio.create_task(limiter.call(blocked))
+    await asyncio.sleep(0)
+
+    with pytest.raises(LLMOverloadedError):
+        await limiter.call(blocked)
+
+    release.set()
+    await holder
+    assert metrics.counter("llm.test.queue_timeouts") == 1
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_paces_requests():
+    limiter = make_limiter(rate_per_second=50.0, burst=1, max_concurrency=1)
+
+    async def work():
+        return "ok"
+
+    started = time.monotonic()
+    for _ in range(3):
+        await limiter.call(work)
+
+    # One token up front, then one every 20ms
+    assert time.monotonic() - started >= 0.035
@@ -0,0 +1,265 @@
+import asyncio
+import json
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from app.core.metrics import metrics
+from app.services.llm_ledger import LLMLedger
+from app.services.llm_limiter import LLMLimiter, is_overload_error
+from app.services.llm_providers import (
+    LLMProvider,
+    OpenAICompatibleProvider,
+    ProviderHTTPError,
+)
+from app.services.llm_router import LLMRouter
+
+
+def make_limiter(name):
+    return LLMLimiter(
+        name,
+        rate_per_second=1000.0,
+        burst=100,
+        min_concurrency=1,
+        max_concurrency=4,
+        decrease_factor=0.5,
+        max_retries=0,
+        backoff_base_seconds=0.001,
+        backoff_max_seconds=0.001,
+        queue_timeout_seconds=1.0,
+    )
+
+
+class FakeProvider(LLMProvider):
+    def __init__(self, name, delay=0.0, error=None, answer=None):
+        self.name = name
+        self.model = f"{name}-model"
+        self.limiter = make_limiter(name)
+        self.delay = delay
+        self.error = error
+        self.answer = answer or f'"{name}"'
+        self.calls = 0
+        self.cancelled = False
+
+    async def generate(self, prompt):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error:
+            raise self.error
+        return self.answer
+
+
+def make_router(**overrides):
+    options = dict(
+        hedge_delay_seconds=0.0,
+        window_seconds=60.0,
+        max_error_rate=0.5,
+        min_samples=2,
+    )
+    options.update(overrides)
+    return LLMRouter(**options)
+
+
+@pytest.mark.asyncio
+async def test_routes_to_fastest_provider():
+    router = make_router()
+    slow, fast = FakeProvider("slow"), FakeProvider("fast")
+    router.stats("slow").record(900, ok=True)
+    router.stats("fast").record(100, ok=True)
+
+    answer, provider = await router.generate([slow, fast], "prompt", json.loads)
+
+    assert (answer, provider) == ("fast", fast)
+    assert slow.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_unhealthy_provider_is_last_resort():
+    router = make_router()
+    flaky, steady = FakeProvider("flaky"), FakeProvider("steady")
+    for _ in range(3):
+        router.stats("flaky").record(10, ok=False)
+    router.stats("steady").record(500, ok=True)
+
+    assert router.rank([flaky, steady]) == [steady, flaky]
+    assert router.snapshot()["flaky"]["healthy"] is False
+
+
+@pytest.mark.asyncio
+async def test_fails_over_on_error():
+    router = make_router()
+    broken = FakeProvider("broken", error=ValueError("boom"))
+    backup = FakeProvider("backup")
+
+    answer, provider = await router.generate([broken, backup], "prompt", json.loads)
+
+    assert provider is backup
+    assert metrics.counter("llm.router.failovers") == 1
+    assert router.stats("broken").summary()["error_rate"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_unparseable_answer_fails_over():
+    router = make_router()
+    garbled = FakeProvider("garbled", answer="not json")
+    backup = FakeProvider("backup")
+
+    answer, provider = await router.generate([garbled, backup], "prompt", json.loads)
+
+    assert provider is backup
+    assert metrics.counter("llm.garbled.errors") == 1
+
+
+@pytest.mark.asyncio
+async def test_all_providers_failing_raises_first_error():
+    router = make_router()
+    first = FakeProvider("first", error=ValueError("first"))
+    second = FakeProvider("second", error=ValueError("second"))
+
+    with pytest.raises(ValueError, match="first"):
+        await router.generate([first, second], "prompt", json.loads)
+
+
+@pytest.mark.asyncio
+async def test_hedges_slow_request():
+    router = make_router(hedge_delay_seconds=0.02)
+    stuck = FakeProvider("stuck", delay=5)
+    quick = FakeProvider("quick")
+
+    answer, provider = await router.generate([stuck, quick], "prompt", json.loads)
+    await asyncio.sleep(0)
+
+    assert provider is quick
+    assert stuck.cancelled
+    assert metrics.counter("llm.router.hedges") == 1
+    assert metrics.counter("llm.router.hedge_wins") == 1
+    # The cancelled loser is not counted as an error
+    assert router.stats("stuck").summary()["samples"] == 0
+
+
+@pytest.mark.asyncio
+async def test_every_attempt_is_recorded_in_ledger():
+    ledger = LLMLedger(
+        enabled=True,
+        batch_size=100,
+        flush_interval_seconds=60.0,
+        max_pending=100,
+        prices={},
+    )
+    router = make_router(hedge_delay_seconds=0.02)
+    garbled = FakeProvider("garbled", answer="not json")
+    stuck = FakeProvider("stuck", delay=5)
+    quick = FakeProvider("quick")
+    router.stats("garbled").record(1, ok=True)
+    router.stats("stuck").record(2, ok=True)
+    router.stats("quick").record(3, ok=True)
+
+    with patch("app.services.llm_router.llm_ledger", ledger):
+        await router.generate(
+            [garbled, stuck, quick],
+            "prompt",
+            json.loads,
+            video_id="12345678901",
+            prompt_version="v1",
+        )
+        await asyncio.sleep(0)
+
+    outcomes = {entry.provider: entry.outcome for entry in ledger._pending}
+    assert outcomes == {"garbled": "invalid", "stuck": "cancelled", "quick": "ok"}
+    assert all(entry.video_id == "12345678901" for entry in ledger._pending)
+    assert all(entry.prompt_version == "v1" for entry in ledger._pending)
+    assert ledger._pending[0].model == "garbled-model"
+
+
+@pytest.mark.asyncio
+async def test_ledger_latency_excludes_limiter_queueing():
+    ledger = LLMLedger(
+        enabled=True,
+        batch_size=100,
+        flush_interval_seconds=60.0,
+        max_pending=100,
+        prices={},
+    )
+    router = make_router()
+    slow = FakeProvider("slow", delay=0.05)
+    slow.limiter = LLMLimiter(
+        "slow",
+        rate_per_second=1000.0,
+        burst=100,
+        min_concurrency=1,
+        max_concurrency=1,
+        decrease_factor=0.5,
+        max_retries=0,
+        backoff_base_seconds=0.001,
+        backoff_max_seconds=0.001,
+        queue_timeout_seconds=1.0,
+    )
+
+    with patch("app.services.llm_router.llm_ledger", ledger):
+        # One slot: the second call queues behind the first
+        await asyncio.gather(
+            router.generate([slow], "prompt", json.loads),
+            router.generate([slow], "prompt", json.loads),
+        )
+
+    first, second = sorted(ledger._pending, key=lambda entry: entry.wait_ms)
+    assert 40 <= first.latency_ms < 100 and first.wait_ms < 40
+    assert 40 <= second.latency_ms < 100 and second.wait_ms >= 40
+    assert first.created_at <= second.created_at
+
+
+@pytest.mark.asyncio
+async def test_no_hedge_when_fast_enough():
+    router = make_router(hedge_delay_seconds=0.5)
+    primary, secondary = FakeProvider("primary"), FakeProvider("secondary")
+
+    _, provider = await router.generate([primary, secondary], "prompt", json.loads)
+
+    assert provider is primary
+    assert secondary.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_openai_compatible_provider():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if len(requests) == 2:
+            return httpx.Response(429, text="slow down")
+        content = '{"title": "Soup"}'
+        return httpx.Response(
+            200,
+            json={
+                "choices": [{"message": {"content": content}}],
+                "usage": {"prompt_tokens": 120, "completion_tokens": 30},
+            },
+        )
+
+    provider = OpenAICompatibleProvider(
+        "sk-test",
+        "http://llm.local/v1/",
+        "local-model",
+        timeout_seconds=5,
+        transport=httpx.MockTransport(handler),
+    )
+
+    text, usage = await provider.generate_with_usage("Extract")
+    assert text == '{"title": "Soup"}'
+    assert (usage.prompt_tokens, usage.output_tokens) == (120, 30)
+    with pytest.raises(ProviderHTTPError) as exc_info:
+        await provider.generate("Extract")
+    assert await provider.generate("Extract") == '{"title": "Soup"}'
+    await provider.aclose()
+
+    assert str(requests[0].url) == "http://llm.local/v1/chat/completions"
+    assert requests[0].headers["Authorization"] == "Bearer sk-test"
+    body = json.loads(requests[0].content)
+    assert body["model"] == "local-model"
+    assert body["response_format"] == {"type": "json_object"}
+    assert is_overload_error(exc_info.value)
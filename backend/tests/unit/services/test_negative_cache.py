@@ -0,0 +1,62 @@
+from unittest.mock import patch
+
+import pytest
+
+from app.core.exceptions import NoTranscriptError
+from app.core.metrics import metrics
+from app.services.negative_cache import NegativeCache
+
+
+@pytest.fixture
+def negative_cache():
+    return NegativeCache(
+        ttl_seconds=60, transient_ttl_seconds=5, max_ttl_seconds=200, max_entries=2
+    )
+
+
+def test_unknown_video_passes(negative_cache):
+    negative_cache.check("12345678901")
+
+
+def test_recorded_video_is_rejected(negative_cache):
+    negative_cache.record("12345678901")
+
+    with pytest.raises(NoTranscriptError):
+        negative_cache.check("12345678901")
+    assert metrics.counter("transcript.negative_cache.hit") == 1
+
+
+def test_ttl_backs_off_exponentially(negative_cache):
+    assert negative_cache.record("12345678901") == 60
+    assert negative_cache.record("12345678901") == 120
+    assert negative_cache.record("12345678901") == 200  # Capped
+
+
+def test_transient_failures_use_short_ttl(negative_cache):
+    assert negative_cache.record("12345678901", transient=True) == 5
+    assert negative_cache.record("12345678901", transient=True) == 10
+
+
+def test_entry_expires(negative_cache):
+    with patch("app.services.negative_cache.time.monotonic", return_value=1000.0):
+        negative_cache.record("12345678901", transient=True)
+    with patch("app.services.negative_cache.time.monotonic", return_value=1006.0):
+        negative_cache.check("12345678901")
+
+
+def test_forget_resets_backoff(negative_cache):
+    negative_cache.record("12345678901")
+    negative_cache.forget("12345678901")
+
+    negative_cache.check("12345678901")
+    assert negative_cache.record("12345678901") == 60
+
+
+def test_bounded_size(negative_cache):
+    negative_cache.record("a" * 11)
+    negative_cache.record("b" * 11)
+    negative_cache.record("c" * 11)
+
+    negative_cache.check("a" * 11)  # Evicted
+    with pytest.raises(NoTranscriptError):
+        negative_cache.check("c" * 11)
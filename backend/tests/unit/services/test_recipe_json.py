@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+from app.core.metrics import metrics
+from app.services.recipe_json import (
+    RECIPE_RESPONSE_SCHEMA,
+    IncrementalJSONParser,
+    parse_recipe,
+    repair_json,
+)
+
+VALID = {
+    "title": "Pancakes",
+    "description": "Fluffy",
+    "servings": 2,
+    "ingredients": [{"item": "Flour", "quantity": "200", "unit": "g"}],
+    "instructions": [{"step_number": 1, "instruction": "Mix"}],
+    "dietary_tags": ["Vegetarian"],
+}
+
+
+def test_response_schema_is_gemini_compatible():
+    schema = json.dumps(RECIPE_RESPONSE_SCHEMA)
+
+    assert '"default"' not in schema
+    assert '"anyOf"' not in schema
+    assert RECIPE_RESPONSE_SCHEMA["properties"]["servings"] == {
+        "type": "integer",
+        "title": "Servings",
+        "nullable": True,
+    }
+
+
+def test_parse_recipe_fast_path():
+    recipe = parse_recipe(json.dumps(VALID))
+
+    assert recipe.title == "Pancakes"
+    assert recipe.ingredients[0].unit == "g"
+    assert metrics.counter("gemini.json_repairs") == 0
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        ('```json\n{"a": [1, 2,],}\n```', {"a": [1, 2]}),
+        ('Here you go: {"a": "line\nbreak"} Enjoy!', {"a": "line\nbreak"}),
+        ('{"a": {"b": [1, {"c": "trunc', {"a": {"b": [1, {"c": "trunc"}]}}),
+        ('{"a": 1, "b":', {"a": 1, "b": None}),
+        ('{"a": "brace } in string", "b": "quote \\" ok"}', None),
+    ],
+)
+def test_repair_json(raw, expected):
+    repaired = json.loads(repair_json(raw))
+
+    if expected is None:
+        expected = json.loads(raw)
+    assert repaired == expected
+
+
+def test_parse_recipe_repairs_truncated_response():
+    raw = json.dumps(VALID)[:-8]  # Cut off inside "dietary_tags"
+
+    recipe = parse_recipe(raw)
+
+    assert recipe.title == "Pancakes"
+    assert recipe.ingredients[0].item == "Flour"
+    assert metrics.counter("gemini.json_repairs") == 1
+
+
+def test_parse_recipe_defaults_missing_text_fields():
+    recipe = parse_recipe('{"ingredients": [], "instructions": []}')
+
+    assert recipe.title == "Unknown Recipe"
+    assert recipe.description == "No description"
+
+
+def test_incremental_parser_exposes_fields_as_they_stream():
+    recipe = {
+        "title": "Pancakes",
+        "ingredients": [{"item": "flour"}, {"item": "milk"}],
+        "instructions": [{"step_number": 1, "instruction": "Whisk"}],
+    }
+    text = json.dumps(recipe)
+    parser = IncrementalJSONParser()
+    partials = []
+    for start in range(0, len(text), 7):
+        parser.feed(text[start : start + 7])
+        partial = parser.partial()
+        if partial is not None:
+            partials.append(partial)
+
+    # The title and ingredients were available before any step
+    first_with_ingredient = next(p for p in partials if p.get("ingredients"))
+    assert first_with_ingredient["title"] == "Pancakes"
+    assert "instructions" not in first_with_ingredient
+    assert partials[-1] == recipe
+    assert parser.done
@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+from app.core.metrics import metrics
+from app.services.singleflight import SingleFlight
+
+
+@pytest.fixture
+def flights():
+    return SingleFlight("test.flight")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_are_coalesced(flights):
+    calls = 0
+    release = asyncio.Event()
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "result"
+
+    tasks = [asyncio.create_task(flights.do("key", work)) for _ in range(5)]
+    await asyncio.sleep(0)
+    assert flights.in_flight("key")
+
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert results == ["result"] * 5
+    assert calls == 1
+    assert metrics.counter("test.flight.leader") == 1
+    assert metrics.counter("test.flight.coalesced") == 4
+    assert not flights.in_flight("key")
+
+
+@pytest.mark.asyncio
+async def test_different_keys_run_independently(flights):
+    async def work(value):
+        await asyncio.sleep(0)
+        return value
+
+    results = await asyncio.gather(
+        flights.do("a", lambda: work("a")), flights.do("b", lambda: work("b"))
+    )
+
+    assert results == ["a", "b"]
+    assert metrics.counter("test.flight.leader") == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_with_followers(flights):
+    release = asyncio.Event()
+
+    async def failing():
+        await release.wait()
+        raise ValueError("upstream failed")
+
+    tasks = [asyncio.create_task(flights.do("key", failing)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert all(isinstance(r, ValueError) for r in results)
+    assert not flights.in_flight("key")
+
+
+@pytest.mark.asyncio
+async def test_work_survives_leader_cancellation_while_follower_waits(flights):
+    calls = 0
+    release = asyncio.Event()
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "result"
+
+    leader = asyncio.create_task(flights.do("key", work))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flights.do("key", work))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await follower == "result"
+    assert leader.cancelled()
+    assert calls == 1
+    assert metrics.counter("test.flight.leader") == 1
+
+
+@pytest.mark.asyncio
+async def test_work_is_cancelled_when_last_waiter_leaves(flights):
+    cancelled = asyncio.Event()
+
+    async def work():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    waiters = [asyncio.create_task(flights.do("key", work)) for _ in range(2)]
+    await asyncio.sleep(0)
+
+    waiters[0].cancel()
+    await asyncio.sleep(0)
+    assert not cancelled.is_set()
+    assert flights.in_flight("key")
+
+    waiters[1].cancel()
+    await asyncio.wait_for(cancelled.wait(), 1)
+    assert not flights.in_flight("key")
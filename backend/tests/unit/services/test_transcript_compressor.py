@@ -0,0 +1,66 @@
+from app.core.metrics import metrics
+from app.services.transcript_compressor import (
+    TranscriptCompressor,
+    estimate_tokens,
+    score_segments,
+    split_segments,
+)
+
+FILLER = "Smash that like button and subscribe to the channel for more."
+RECIPE = "Add 2 cups of flour and a pinch of salt, then whisk."
+
+
+def make_compressor(**overrides):
+    options = dict(
+        enabled=True,
+        min_chars=0,
+        min_score=0.25,
+        min_keep_ratio=0.0,
+        segment_words=24,
+    )
+    options.update(overrides)
+    return TranscriptCompressor(**options)
+
+
+def test_score_segments_ranks_recipe_above_filler():
+    scores = score_segments([FILLER, RECIPE, "I went to the beach yesterday."])
+
+    assert scores[1] > scores[2] > scores[0]
+
+
+def test_split_segments_windows_unpunctuated_captions():
+    segments = split_segments(" ".join(["word"] * 50) + ". Done.", 20)
+
+    assert [len(s.split()) for s in segments] == [20, 20, 10, 1]
+
+
+def test_compress_drops_filler_and_reports_savings():
+    transcript = " ".join([FILLER, RECIPE, FILLER])
+
+    result = make_compressor().compress(transcript)
+
+    assert result.text == RECIPE
+    assert result.original_tokens == estimate_tokens(transcript)
+    assert result.tokens_saved == result.original_tokens - estimate_tokens(RECIPE)
+    assert metrics.counter("transcript.compression.tokens_saved") == result.tokens_saved
+
+
+def test_compress_keeps_minimum_ratio():
+    transcript = " ".join([FILLER, "Nice weather today.", RECIPE])
+
+    result = make_compressor(min_keep_ratio=0.6).compress(transcript)
+
+    # Best scoring segments fill up the quota, original order is preserved
+    assert result.text == f"Nice weather today. {RECIPE}"
+
+
+def test_compress_skips_short_or_disabled():
+    transcript = " ".join([FILLER, RECIPE])
+
+    for compressor in (
+        make_compressor(min_chars=len(transcript) + 1),
+        make_compressor(enabled=False),
+    ):
+        result = compressor.compress(transcript)
+        assert result.text == transcript
+        assert result.tokens_saved == 0
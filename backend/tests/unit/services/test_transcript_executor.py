@@ -0,0 +1,153 @@
+import asyncio
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.core.exceptions import DeadlineExceededError, TranscriptFetchBusyError
+from app.core.metrics import metrics
+from app.services.deadlines import deadline_after
+from app.services.transcript_executor import TranscriptExecutor
+
+
+@pytest.fixture
+def executor():
+    executor = TranscriptExecutor(max_workers=1, max_queued=1, queue_timeout=0.05)
+    yield executor
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_fetch_runs_off_the_event_loop(executor):
+    loop_thread = threading.get_ident()
+    fetch_threads = []
+
+    def fake_get_transcript(self, video_id, deadline=None):
+        fetch_threads.append(threading.get_ident())
+        return f"transcript for {video_id}"
+
+    with patch(
+        "app.services.youtube.YouTubeService.get_transcript", fake_get_transcript
+    ):
+        transcript = await executor.fetch("12345678901")
+
+    assert transcript == "transcript for 12345678901"
+    assert fetch_threads[0] != loop_thread
+    assert metrics.counter("transcript.fetch.completed") == 1
+    assert metrics.gauge("transcript.fetch.in_flight") == 0
+
+
+@pytest.mark.asyncio
+async def test_fetch_times_out_waiting_for_slot(executor):
+    release = threading.Event()
+
+    def slow_get_transcript(self, video_id, deadline=None):
+        release.wait(timeout=5)
+        return "slow"
+
+    with patch(
+        "app.services.youtube.YouTubeService.get_transcript", slow_get_transcript
+    ):
+        first = asyncio.create_task(executor.fetch("a" * 11))
+        await asyncio.sleep(0.01)
+
+        with pytest.raises(TranscriptFetchBusyError):
+            await executor.fetch("b" * 11)
+
+        assert metrics.counter("transcript.fetch.timeouts") == 1
+        assert executor.queued == 0
+
+        release.set()
+        assert await first == "slow"
+
+
+@pytest.mark.asyncio
+async def test_fetch_rejects_when_queue_full(executor):
+    release = threading.Event()
+
+    def slow_get_transcript(self, video_id, deadline=None):
+        release.wait(timeout=5)
+        return "slow"
+
+    with patch(
+        "app.services.youtube.YouTubeService.get_transcript", slow_get_transcript
+    ):
+        first = asyncio.create_task(executor.fetch("a" * 11))
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(executor.fetch("b" * 11))
+        await asyncio.sleep(0)
+
+        with pytest.raises(TranscriptFetchBusyError, match="queue is full"):
+            await executor.fetch("c" * 11)
+        assert metrics.counter("transcript.fetch.rejected") == 1
+
+        release.set()
+        assert await first == "slow"
+        assert await second == "slow"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_fetch_leaves_the_queue(executor):
+    release = threading.Event()
+    fetched = []
+
+    def slow_get_transcript(self, video_id, deadline=None):
+        release.wait(timeout=5)
+        fetched.append(video_id)
+        return "slow"
+
+    with patch(
+        "app.services.youtube.YouTubeService.get_transcript", slow_get_transcript
+    ):
+        first = asyncio.create_task(executor.fetch("a" * 11))
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(executor.fetch("b" * 11))
+        await asyncio.sleep(0)
+
+        second.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await second
+        assert executor.queued == 0
+        assert metrics.counter("transcript.fetch.cancelled") == 1
+
+        release.set()
+        assert await first == "slow"
+
+    # The abandoned fetch never ran
+    assert fetched == ["a" * 11]
+
+
+@pytest.mark.asyncio
+async def test_fetch_stops_waiting_at_the_deadline(executor):
+    release = threading.Event()
+    deadlines = []
+
+    def slow_get_transcript(self, video_id, deadline=None):
+        deadlines.append(deadline)
+        release.wait(timeout=5)
+        return "slow"
+
+    deadline = deadline_after(0.02)
+    with patch(
+        "app.services.youtube.YouTubeService.get_transcript", slow_get_transcript
+    ):
+        with pytest.raises(DeadlineExceededError):
+            await executor.fetch("a" * 11, deadline)
+        release.set()
+
+    # yt-dlp gets the deadline to bound its own socket timeout
+    assert deadlines == [deadline]
+
+
+@pytest.mark.asyncio
+async def test_fetch_uses_running_worker_pool():
+    workers = MagicMock(running=True)
+    workers.fetch.return_value = "from a worker"
+    executor = TranscriptExecutor(
+        max_workers=1, max_queued=1, queue_timeout=1, workers=workers
+    )
+    try:
+        assert await executor.fetch("12345678901") == "from a worker"
+    finally:
+        executor.shutdown()
+    workers.fetch.assert_called_once_with("12345678901", None)
@@ -0,0 +1,59 @@
+import zlib
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.models.db import Transcript
+from app.services.transcript_store import TranscriptStore
+
+
+@pytest.fixture
+def mock_db():
+    return AsyncMock()
+
+
+@pytest.fixture
+def transcript_store(mock_db):
+    return TranscriptStore(mock_db)
+
+
+def mock_content(mock_db, content):
+    mock_execute_result = MagicMock()
+    mock_execute_result.scalar_one_or_none.return_value = content
+    mock_db.execute.return_value = mock_execute_result
+
+
+@pytest.mark.asyncio
+async def test_get_hit(transcript_store, mock_db):
+    mock_content(mock_db, zlib.compress(b"whisk two eggs"))
+
+    assert await transcript_store.get("vid123") == "whisk two eggs"
+
+
+@pytest.mark.asyncio
+async def test_get_miss(transcript_store, mock_db):
+    mock_content(mock_db, None)
+
+    assert await transcript_store.get("vid123") is None
+
+
+@pytest.mark.asyncio
+async def test_get_corrupt_content_is_a_miss(transcript_store, mock_db):
+    mock_content(mock_db, b"not zlib")
+
+    assert await transcript_store.get("vid123") is None
+
+
+@pytest.mark.asyncio
+async def test_save_compresses(transcript_store, mock_db):
+    transcript = "add a pinch of salt " * 100
+
+    await transcript_store.save("vid456", transcript)
+
+    saved = mock_db.merge.call_args[0][0]
+    assert isinstance(saved, Transcript)
+    assert saved.video_id == "vid456"
+    assert saved.language == "en"
+    assert len(saved.content) < len(transcript)
+    assert zlib.decompress(saved.content).decode() == transcript
+    mock_db.commit.assert_called_once()
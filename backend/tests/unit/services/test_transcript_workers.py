@@ -0,0 +1,169 @@
+import multiprocessing
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.core.exceptions import DeadlineExceededError, NoTranscriptError
+from app.core.metrics import metrics
+from app.services.deadlines import deadline_after
+from app.services.transcript_workers import TranscriptWorkerPool, serve
+from app.services.youtube import set_socket_timeout
+
+VTT = b"WEBVTT\n\n00:00:00.000 --> 00:00:02.000\nKnead the dough.\n"
+
+
+def fake_serve(conn, max_jobs, max_memory_growth):
+    # Stands in for serve() in spawned workers (patches don't cross processes)
+    jobs = 0
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        video_id, _ = job
+        if video_id.startswith("slow"):
+            time.sleep(10)
+        jobs += 1
+        if video_id.startswith("none"):
+            reply = ("no_transcript", False)
+        else:
+            reply = ("ok", f"transcript for {video_id}")
+        conn.send((*reply, jobs >= max_jobs))
+        if jobs >= max_jobs:
+            return
+
+
+@pytest.fixture
+def make_pool():
+    pools = []
+
+    def make(**kwargs):
+        options = dict(
+            enabled=True,
+            size=1,
+            max_jobs=100,
+            max_memory_growth_mb=1024,
+            timeout_seconds=30,
+            target=fake_serve,
+        )
+        options.update(kwargs)
+        pool = TranscriptWorkerPool(**options)
+        pool.start()
+        pools.append(pool)
+        return pool
+
+    yield make
+    for pool in pools:
+        pool.shutdown()
+
+
+@patch("yt_dlp.YoutubeDL")
+def test_serve_reuses_one_youtubedl_and_retires_after_max_jobs(mock_ytdl):
+    ydl = mock_ytdl.return_value.__enter__.return_value
+    ydl.extract_info.return_value = {
+        "requested_subtitles": {"en": {"url": "https://subs/en.vtt", "ext": "vtt"}}
+    }
+    ydl.urlopen.return_value.__enter__.return_value.read.return_value = VTT
+
+    parent, child = multiprocessing.Pipe()
+    worker = threading.Thread(target=serve, args=(child, 2, 1 << 40))
+    worker.start()
+
+    parent.send(("12345678901", 30))
+    assert parent.recv() == ("ok", "Knead the dough.", False)
+    parent.send(("10987654321", 5))
+    assert parent.recv() == ("ok", "Knead the dough.", True)
+    worker.join(timeout=5)
+
+    assert not worker.is_alive()
+    mock_ytdl.assert_called_once()
+    assert ydl.extract_info.call_count == 2
+    # Each job's sockets are bounded by what its caller had left
+    timeouts = [
+        call.args[1]
+        for call in ydl.params.__setitem__.call_args_list
+        if call.args[0] == "socket_timeout"
+    ]
+    assert len(timeouts) == 2 and 25 < timeouts[0] <= 30 and 1 <= timeouts[1] <= 5
+
+
+def test_pool_fetches_on_workers_and_recycles_them(make_pool):
+    pool = make_pool(max_jobs=2)
+
+    assert pool.fetch("aaaaaaaaaaa") == "transcript for aaaaaaaaaaa"
+    assert pool.fetch("bbbbbbbbbbb") == "transcript for bbbbbbbbbbb"
+    # The first worker retired after 2 jobs; a fresh one takes the next
+    assert pool.fetch("ccccccccccc") == "transcript for ccccccccccc"
+
+    assert metrics.counter("transcript.workers.recycled") == 1
+    assert metrics.counter("transcript.workers.spawned") == 2
+    assert metrics.gauge("transcript.workers.alive") == 1
+
+
+def test_pool_maps_missing_transcripts(make_pool):
+    pool = make_pool()
+
+    with pytest.raises(NoTranscriptError) as exc_info:
+        pool.fetch("nonenonenon")
+    assert not exc_info.value.transient
+    # The worker is still usable
+    assert pool.fetch("aaaaaaaaaaa") == "transcript for aaaaaaaaaaa"
+
+
+def test_pool_kills_a_worker_past_the_deadline(make_pool):
+    pool = make_pool()
+
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceededError):
+        pool.fetch("slowslowslo", deadline_after(1))
+
+    assert time.monotonic() - started < 5
+    assert metrics.counter("transcript.workers.killed") == 1
+    assert pool.fetch("aaaaaaaaaaa") == "transcript for aaaaaaaaaaa"
+
+
+def test_set_socket_timeout_updates_built_request_handlers():
+    import yt_dlp
+
+    with yt_dlp.YoutubeDL({"quiet": True}) as ydl:
+        handlers = ydl._request_director.handlers.values()
+        set_socket_timeout(ydl, 3.5)
+
+        assert ydl.params["socket_timeout"] == 3.5
+        assert handlers and all(handler.timeout == 3.5 for handler in handlers)
+
+
+def test_workers_are_started_outside_the_lock():
+    pool = TranscriptWorkerPool(
+        enabled=True, size=2, max_jobs=1, max_memory_growth_mb=1, timeout_seconds=1
+    )
+    started = []
+
+    class SlowStartingWorker:
+        def __init__(self, *args):
+            # Other callers can check workers in and out meanwhile
+            assert not pool._lock.locked()
+            self.process = MagicMock()
+            self.process.is_alive.return_value = False
+            started.append(self)
+
+    with patch("app.services.transcript_workers._Worker", SlowStartingWorker):
+        pool.start()
+        # Both idle workers have died, so checking out starts a replacement
+        worker = pool._checkout()
+
+    assert len(started) == 3 and worker is started[-1]
+    assert pool._alive == 1
+    assert metrics.counter("transcript.workers.died") == 2
+
+
+def test_disabled_pool_does_not_start():
+    pool = TranscriptWorkerPool(
+        enabled=False, size=1, max_jobs=1, max_memory_growth_mb=1, timeout_seconds=1
+    )
+    pool.start()
+    assert not pool.running
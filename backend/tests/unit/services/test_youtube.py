@@ -1,9 +1,10 @@
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 
 import pytest
 
-from app.core.exceptions import NoTranscriptError
-from app.services.youtube import YouTubeService
+from app.core.exceptions import DeadlineExceededError, NoTranscriptError
+from app.services.deadlines import deadline_after
+from app.services.youtube import YouTubeService, iter_vtt_cues, merge_caption_words
 
 
 @pytest.fixture
@@ -32,60 +33,132 @@ def test_extract_video_id_invalid():
         YouTubeService.extract_video_id("https://google.com")
 
 
+def mock_subtitles(mock_ytdl, vtt: bytes, requested=None):
+    ydl = mock_ytdl.return_value.__enter__.return_value
+    ydl.extract_info.return_value = {
+        "requested_subtitles": (
+            {"en": {"url": "https://subs.example/en.vtt", "ext": "vtt"}}
+            if requested is None
+            else requested
+        )
+    }
+    ydl.urlopen.return_value.__enter__.return_value.read.return_value = vtt
+    return ydl
+
+
 @patch("yt_dlp.YoutubeDL")
-@patch("glob.glob")
-@patch("webvtt.read")
-@patch("os.remove")
-@patch("uuid.uuid4")
-def test_get_transcript_success(
-    mock_uuid, mock_remove, mock_webvtt_read, mock_glob, mock_ytdl, youtube_service
-):
-    # Setup mocks
-    mock_uuid.return_value = "fixed-uuid"
-    mock_glob.return_value = ["/tmp/fixed-uuid.vtt"]
-
-    mock_caption = MagicMock()
-    mock_caption.text = "This is a transcript."
-    mock_webvtt_read.return_value = [mock_caption]
-
-    # Execute
+def test_get_transcript_success(mock_ytdl, youtube_service):
+    ydl = mock_subtitles(
+        mock_ytdl,
+        b"WEBVTT\n\n00:00:00.000 --> 00:00:02.000\nThis is a transcript.\n",
+    )
+
     transcript = youtube_service.get_transcript("12345678901")
 
-    # Verify
     assert transcript == "This is a transcript."
     mock_ytdl.assert_called_once()
-    mock_glob.assert_any_call("/tmp/fixed-uuid*.vtt")
+    ydl.extract_info.assert_called_once_with(
+        "https://www.youtube.com/watch?v=12345678901", download=False
+    )
+    ydl.urlopen.assert_called_once_with("https://subs.example/en.vtt")
 
 
 @patch("yt_dlp.YoutubeDL")
-@patch("glob.glob")
-@patch("os.remove")
-def test_get_transcript_no_file(mock_remove, mock_glob, mock_ytdl, youtube_service):
-    mock_glob.return_value = []  # No files found
+def test_get_transcript_no_file(mock_ytdl, youtube_service):
+    mock_subtitles(mock_ytdl, b"", requested={})  # No subtitle track
 
     with pytest.raises(NoTranscriptError):
         youtube_service.get_transcript("12345678901")
 
 
 @patch("yt_dlp.YoutubeDL")
-@patch("glob.glob")
-@patch("webvtt.read")
-@patch("os.remove")
-def test_transcript_parsing_logic(
-    mock_remove, mock_webvtt_read, mock_glob, mock_ytdl, youtube_service
-):
-    mock_glob.side_effect = [["/tmp/test.vtt"], ["/tmp/test.vtt"]]
-
-    # Mock webvtt captions
-    mock_caption1 = MagicMock()
-    mock_caption1.text = "Line 1"
-    mock_caption2 = MagicMock()
-    mock_caption2.text = "Line 1"  # duplicate check
-    mock_caption3 = MagicMock()
-    mock_caption3.text = "Line 2"
-
-    mock_webvtt_read.return_value = [mock_caption1, mock_caption2, mock_caption3]
+def test_transcript_parsing_logic(mock_ytdl, youtube_service):
+    mock_subtitles(
+        mock_ytdl,
+        b"WEBVTT\n\n"
+        b"00:00:00.000 --> 00:00:01.000\nLine 1\n\n"
+        b"00:00:01.000 --> 00:00:02.000\nLine 1\n\n"  # duplicate check
+        b"00:00:02.000 --> 00:00:03.000\nLine 2\n",
+    )
 
     result = youtube_service.get_transcript("12345678901")
 
     assert result == "Line 1 Line 2"
+
+
+@patch("yt_dlp.YoutubeDL")
+def test_get_transcript_upstream_error_is_transient(mock_ytdl, youtube_service):
+    ydl = mock_ytdl.return_value.__enter__.return_value
+    ydl.extract_info.side_effect = Exception("HTTP Error 429")
+
+    with pytest.raises(NoTranscriptError) as exc_info:
+        youtube_service.get_transcript("12345678901")
+    assert exc_info.value.transient
+
+
+@patch("yt_dlp.YoutubeDL")
+def test_get_transcript_no_file_is_not_transient(mock_ytdl, youtube_service):
+    mock_subtitles(mock_ytdl, b"", requested={})
+
+    with pytest.raises(NoTranscriptError) as exc_info:
+        youtube_service.get_transcript("12345678901")
+    assert not exc_info.value.transient
+
+
+@patch("yt_dlp.YoutubeDL")
+def test_get_transcript_deadline_bounds_socket_timeout(mock_ytdl, youtube_service):
+    mock_subtitles(mock_ytdl, b"WEBVTT\n\n00:00:00.000 --> 00:00:02.000\nHello.\n")
+
+    youtube_service.get_transcript("12345678901", deadline_after(30))
+
+    ydl_opts = mock_ytdl.call_args.args[0]
+    assert 1.0 <= ydl_opts["socket_timeout"] <= 30
+
+
+@patch("yt_dlp.YoutubeDL")
+def test_get_transcript_past_deadline_is_not_fetched(mock_ytdl, youtube_service):
+    with pytest.raises(DeadlineExceededError):
+        youtube_service.get_transcript("12345678901", deadline_after(-1))
+    mock_ytdl.assert_not_called()
+
+
+def test_iter_vtt_cues_skips_header_notes_and_tags():
+    vtt = [
+        "WEBVTT",
+        "Kind: captions",
+        "Language: en",
+        "",
+        "NOTE this is a comment",
+        "spanning lines",
+        "",
+        "cue-1",
+        "00:00:00.000 --> 00:00:02.000 align:start position:0%",
+        " ",
+        "hey<00:00:00.399><c> everybody</c>",
+        "",
+        "00:00:02.000 --> 00:00:04.000",
+        "salt &amp; pepper",
+    ]
+
+    assert list(iter_vtt_cues(vtt)) == ["hey everybody", "salt & pepper"]
+
+
+def test_merge_caption_words_rolling_auto_captions():
+    cues = [
+        "hey",
+        "hey everybody",
+        "hey everybody it's",
+        "hey everybody it's time to",
+        "time to cook",
+        "time to cook",
+        "today we make pasta",
+    ]
+
+    assert (
+        merge_caption_words(cues)
+        == "hey everybody it's time to cook today we make pasta"
+    )
+
+
+def test_merge_caption_words_skips_prefix_repeats():
+    assert merge_caption_words(["Line 1 and 2", "Line 1"]) == "Line 1 and 2"
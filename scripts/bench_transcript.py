@@ -0,0 +1,137 @@
+"""
+Microbenchmark: transcript parsing + caption de-duplication on long livestreams.
+
+Compares the previous pipeline (write subtitles to /tmp, parse with webvtt-py,
+de-duplicate with startswith checks) against the in-memory streaming parser and
+word-level merge in app.services.youtube.
+
+Usage: python scripts/bench_transcript.py [hours ...]
+The legacy column needs webvtt-py (no longer a backend dependency):
+    pip install webvtt-py
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Ensure backend path is in pythonpath
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../backend")))
+
+from app.services.youtube import YouTubeService  # noqa: E402
+
+WORDS = (
+    "add two cups of flour then whisk the eggs with a pinch of salt and pepper "
+    "heat the pan until the butter melts stir gently for five minutes"
+).split()
+
+
+def timestamp(ms: int) -> str:
+    hours, ms = divmod(ms, 3_600_000)
+    minutes, ms = divmod(ms, 60_000)
+    seconds, ms = divmod(ms, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{ms:03d}"
+
+
+def rolling_auto_captions(hours: float, seed: int = 42) -> bytes:
+    """
+    Fixture in the shape of YouTube auto-captions: every cue repeats the previous
+    line and appends new words, followed by a 10ms cue repeating both lines.
+    """
+    rng = random.Random(seed)
+    cues = ["WEBVTT", "Kind: captions", "Language: en", ""]
+    previous_line = " "  # YouTube emits a whitespace-only first line
+    ms = 0
+    while ms < hours * 3_600_000:
+        line = " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 8)))
+        tagged = line.split()[0] + "".join(
+            f"<{timestamp(ms + 200 * i)}><c> {word}</c>"
+            for i, word in enumerate(line.split()[1:], start=1)
+        )
+        cues += [
+            f"{timestamp(ms)} --> {timestamp(ms + 2000)} align:start position:0%",
+            previous_line,
+            tagged,
+            "",
+            f"{timestamp(ms + 2000)} --> {timestamp(ms + 2010)} align:start position:0%",
+            previous_line,
+            line,
+            "",
+        ]
+        previous_line = line
+        ms += 2010
+    return "\n".join(cues).encode()
+
+
+def legacy_pipeline(data: bytes) -> str:
+    import webvtt
+
+    with tempfile.NamedTemporaryFile(suffix=".en.vtt", delete=False) as f:
+        f.write(data)
+        path = f.name
+    try:
+        captions = webvtt.read(path)
+        text_lines: list[str] = []
+        last_text = ""
+        for caption in captions:
+            text = caption.text.strip()
+            if not text:
+                continue
+            if text.startswith(last_text) and last_text:
+                if text_lines:
+                    text_lines[-1] = text
+                else:
+                    text_lines.append(text)
+            elif last_text.startswith(text) and text:
+                continue
+            else:
+                text_lines.append(text)
+            last_text = text
+        return " ".join(" ".join(text_lines).split())
+    finally:
+        os.remove(path)
+
+
+def best_of(fn, data: bytes, runs: int = 3) -> tuple[float, str]:
+    best, result = float("inf"), ""
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn(data)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    hours_list = [float(h) for h in sys.argv[1:]] or [0.5, 1.0, 3.0]
+    try:
+        import webvtt  # noqa: F401
+
+        has_webvtt = True
+    except ImportError:
+        has_webvtt = False
+        print("webvtt-py not installed: showing the new pipeline only\n")
+
+    print(
+        f"{'hours':>6} {'vtt KB':>8} {'legacy s':>9} {'new s':>8} {'speedup':>8} "
+        f"{'legacy words':>13} {'new words':>10}"
+    )
+    for hours in hours_list:
+        data = rolling_auto_captions(hours)
+        new_time, new_text = best_of(YouTubeService.parse_vtt, data)
+        if has_webvtt:
+            legacy_time, legacy_text = best_of(legacy_pipeline, data)
+            print(
+                f"{hours:>6} {len(data) // 1024:>8} {legacy_time:>9.3f} "
+                f"{new_time:>8.3f} {legacy_time / new_time:>7.1f}x "
+                f"{len(legacy_text.split()):>13} {len(new_text.split()):>10}"
+            )
+        else:
+            print(
+                f"{hours:>6} {len(data) // 1024:>8} {'-':>9} {new_time:>8.3f} "
+                f"{'-':>8} {'-':>13} {len(new_text.split()):>10}"
+            )
+
+
+if __name__ == "__main__":
+    main()